@@ -0,0 +1,20 @@
+"""
+Drop the cached authentication state (see core.authentication) when a user
+changes.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.authentication import invalidate_cached_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which authentication does not depend on
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    invalidate_cached_user(instance.pk)
@@ -165,7 +165,9 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # Updates are saved with a full save(), so start from the current row
+        # rather than the request's authentication user
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
     @swagger_auto_schema(
         **swagger.retrieve_operation(
@@ -1,9 +1,120 @@
+"""
+JWT authentication from the access_token cookie or a Bearer header.
+
+Tokens carry a hash of the user's password hash (simplejwt's
+CHECK_REVOKE_TOKEN claim), so changing the password revokes every token
+issued before it; tokens of inactive users are rejected as well.
+
+With AUTH_USER_CACHE_TIMEOUT above 0 only what those checks need is cached
+per user id: (is_active, password version). request.user is then a
+LazyAuthUser that answers pk/is_active/is_authenticated from the cache and
+loads a fresh row the first time anything else is read, so views never see
+or save a cached copy of the user. accounts.signals drops the entry once a
+user change commits (last_login updates are ignored); see CACHES in
+core/settings.py. The default 0 loads the user with one query per request.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+USER_CACHE_PREFIX = "auth:user"
+# Cached for ids without a user, so bad tokens do not query either
+MISSING_USER = "missing"
+
+
+def user_cache_key(user_id):
+    return f"{USER_CACHE_PREFIX}:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached auth state once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(user_cache_key(user_id)))
+
+
+def password_version(password):
+    """The revoke claim simplejwt puts in tokens issued for this password hash."""
+    return get_md5_hash_password(password)
+
+
+def _token_is_current(is_active, current_version, version):
+    if not is_active:
+        return False
+    return not jwt_settings.CHECK_REVOKE_TOKEN or current_version == version
+
+
+def get_auth_state(user_id, timeout):
+    """(is_active, password version) of the user, cached; None if there is none."""
+    key = user_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User._default_manager.filter(pk=user_id).values_list("is_active", "password").first()
+        state = MISSING_USER if row is None else (row[0], password_version(row[1]))
+        cache.set(key, state, timeout)
+    return None if state == MISSING_USER else state
+
+
+class LazyAuthUser(SimpleLazyObject):
+    """
+    request.user of a token checked against the cached auth state. The user
+    row is loaded (once per request) the first time an attribute other than
+    pk/id/is_active/is_authenticated/is_anonymous is read.
+    """
+
+    def __init__(self, user_id):
+        super().__init__(lambda: User._default_manager.get(pk=user_id))
+        self.__dict__["_user_id"] = user_id
+
+    @property
+    def pk(self):
+        return self.__dict__["_user_id"]
+
+    id = pk
+
+    @property
+    def is_active(self):
+        return True
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+
+def get_user_for_token(user_id, version):
+    """
+    request.user for a token of user_id carrying the given password version,
+    or None if the user is gone, inactive or changed password since.
+    """
+    try:
+        user_id = User._meta.pk.to_python(user_id)
+    except ValidationError:
+        return None
+
+    timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 0)
+    if not timeout:
+        user = User._default_manager.filter(pk=user_id).first()
+        if user is None or not _token_is_current(user.is_active, password_version(user.password), version):
+            return None
+        return user
+
+    state = get_auth_state(user_id, timeout)
+    if state is None or not _token_is_current(*state, version):
+        return None
+    return LazyAuthUser(user_id)
+
+
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
         # First, try to get token from cookies
@@ -27,12 +138,8 @@ class CookieJWTAuthentication(JWTAuthentication):
         user_id = validated_token.get('user_id')
         if user_id is None:
             return None
-        try:
-            user = User._default_manager.get(pk=user_id)
-        except (User.DoesNotExist, ValueError):
-            try:
-                user = User._default_manager.get(id=user_id)
-            except (User.DoesNotExist, ValueError):
-                return None
+        user = get_user_for_token(user_id, validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM))
+        if user is None:
+            return None
 
         return (user, token)
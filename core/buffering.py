@@ -0,0 +1,97 @@
+"""
+In-process write-behind buffers.
+
+WriteBehindBuffer holds items added by request threads and writes them in
+batches from a daemon thread: every ``interval_setting`` seconds, as soon as
+``max_buffer_setting`` items are pending, and once more at interpreter exit.
+Subclasses choose how items are held (``new_pending``/``buffer``), how a
+batch is written (``write``) and what happens to a batch whose write failed
+(``restore``; dropped by default).
+
+Each worker process has its own buffer, so items still buffered when a
+process dies are lost.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    name = "buffer"
+    thread_name = "write-behind-flusher"
+    interval_setting = None
+    default_interval = 5
+    max_buffer_setting = None
+    default_max_buffer = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = self.new_pending()
+        self._wakeup = threading.Event()
+        self._thread = None
+        atexit.register(self._flush_on_exit)
+
+    def new_pending(self):
+        """An empty container for buffered items."""
+        raise NotImplementedError
+
+    def buffer(self, pending, *args):
+        """Add one item to pending (called with the lock held)."""
+        raise NotImplementedError
+
+    def write(self, batch):
+        """Write a batch taken from the buffer; return how many were written."""
+        raise NotImplementedError
+
+    def restore(self, pending, batch):
+        """Put a batch whose write failed back into pending (lock held)."""
+
+    def add(self, *args):
+        with self._lock:
+            self.buffer(self._pending, *args)
+            size = len(self._pending)
+            if self._thread is None or not self._thread.is_alive():
+                self._start()
+        if size >= getattr(settings, self.max_buffer_setting, self.default_max_buffer):
+            self._wakeup.set()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(getattr(settings, self.interval_setting, self.default_interval))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing the %s failed", self.name)
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write everything buffered so far; return what write() returns."""
+        with self._lock:
+            batch, self._pending = self._pending, self.new_pending()
+        if not batch:
+            return 0
+        try:
+            return self.write(batch)
+        except Exception:
+            with self._lock:
+                self.restore(self._pending, batch)
+            raise
+
+    def _flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing the %s at exit failed", self.name)
+        finally:
+            connections.close_all()
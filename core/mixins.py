@@ -0,0 +1,322 @@
+"""
+Reusable serializer/view mixins.
+
+QueryPlanSerializerMixin lets a serializer declare which columns and relations
+it reads, and QueryPlanViewMixin applies the matching select_related/only()
+plan to the view queryset so list pages cost a fixed number of queries.
+
+SparseFieldsetSerializerMixin/SparseFieldsetViewMixin let clients pick the
+fields they need with ``?fields=`` or ``?omit=``; QueryPlanViewMixin narrows the
+column list to match.
+
+ConditionalRetrieveMixin adds ETag/If-None-Match handling and an optional
+cached representation to retrieve views.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class QueryPlanSerializerMixin:
+    """
+    Serializer mixin that derives a queryset plan from the serializer fields.
+
+    - Plain fields contribute their source column to only().
+    - Dotted sources (e.g. "qbox.qbox_id") and nested serializers over a
+      forward relation are joined with select_related().
+    - SerializerMethodFields must declare what they read in
+      ``method_field_sources``; an undeclared method field disables only()
+      so the serializer never triggers deferred-field queries.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    method_field_sources = {}
+
+    @classmethod
+    def get_query_plan(cls, model, field_names=None):
+        """Return (only_fields or None, select_related_fields) for model."""
+        if field_names is not None:
+            field_names = frozenset(field_names)
+        return _build_query_plan(cls, model, field_names)
+
+    @classmethod
+    def setup_queryset(cls, queryset, field_names=None, extra_columns=()):
+        """
+        Apply the serializer's query plan to queryset. extra_columns are loaded
+        too, e.g. the columns a cursor paginator reads from the last row.
+        """
+        only, select_related = cls.get_query_plan(queryset.model, field_names)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        if only is not None:
+            queryset = queryset.only(*only, *extra_columns)
+        return queryset
+
+
+# Bounded: field_names come from ?fields=/?omit=, so clients choose the keys
+@lru_cache(maxsize=256)
+def _build_query_plan(serializer_class, model, field_names):
+    only = {model._meta.pk.name}
+    select_related = set(serializer_class.select_related_fields)
+    for relation in select_related:
+        only.add(relation.split("__")[0])
+
+    for name, field in serializer_class().fields.items():
+        if field_names is not None and name not in field_names:
+            continue
+        if field.source == "*":
+            if name not in serializer_class.method_field_sources:
+                only = None
+                continue
+            sources = serializer_class.method_field_sources[name]
+            pk_only = False
+        else:
+            sources = (field.source,)
+            pk_only = isinstance(field, serializers.PrimaryKeyRelatedField)
+
+        for source in sources:
+            if not _plan_source(model, source.split("."), pk_only, only, select_related):
+                only = None
+
+    return (tuple(sorted(only)) if only is not None else None,
+            tuple(sorted(select_related)))
+
+
+def _plan_source(model, attrs, pk_only, only, select_related):
+    """Record the columns/joins needed to read attrs; False if unresolvable."""
+    try:
+        field = model._meta.get_field(attrs[0])
+    except FieldDoesNotExist:
+        return False
+    if not field.concrete:
+        # Reverse relations and m2m belong in prefetch_related_fields
+        return True
+    if only is not None:
+        only.add(field.name)
+    if not field.is_relation or (pk_only and len(attrs) == 1):
+        return True
+
+    path = [field.name]
+    related_model = field.related_model
+    for attr in attrs[1:]:
+        try:
+            related_field = related_model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (related_field.is_relation and related_field.concrete):
+            break
+        path.append(related_field.name)
+        related_model = related_field.related_model
+    select_related.add("__".join(path))
+    return True
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin that drops every field not listed in
+    ``context["field_names"]`` before serialization, so pruned method fields
+    are never computed. Only the top-level serializer (or the child of a
+    top-level many=True list) is pruned; nested serializers keep all fields.
+    """
+
+    @classmethod
+    def get_sparse_field_choices(cls):
+        """Names accepted by ?fields= and ?omit=, in declaration order."""
+        return _sparse_field_choices(cls)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        field_names = self.context.get("field_names")
+        if field_names is None or not self._is_sparse_root():
+            return fields
+        return {name: field for name, field in fields.items() if name in field_names}
+
+    def _is_sparse_root(self):
+        parent = self.parent
+        if parent is None:
+            return True
+        return isinstance(parent, serializers.ListSerializer) and parent.parent is None
+
+
+@lru_cache(maxsize=None)
+def _sparse_field_choices(serializer_class):
+    return tuple(serializer_class().fields)
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin that reads ``?fields=a,b`` / ``?omit=c`` and passes the resulting
+    field names to a SparseFieldsetSerializerMixin serializer via its context.
+    Unknown names are rejected with a 400.
+    """
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    def get_sparse_field_names(self):
+        """Frozenset of field names to render, or None for all fields."""
+        if not hasattr(self, "_sparse_field_names"):
+            self._sparse_field_names = self._parse_sparse_field_names()
+        return self._sparse_field_names
+
+    def _parse_sparse_field_names(self):
+        request = getattr(self, "request", None)
+        serializer_class = self.get_serializer_class()
+        if request is None or not hasattr(serializer_class, "get_sparse_field_choices"):
+            return None
+        params = request.query_params
+        fields = _split_field_names(params.get(self.fields_query_param))
+        omit = _split_field_names(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+
+        choices = serializer_class.get_sparse_field_choices()
+        errors = {}
+        for param, names in ((self.fields_query_param, fields), (self.omit_query_param, omit)):
+            unknown = [name for name in names if name not in choices]
+            if unknown:
+                errors[param] = [f"Unknown field(s): {', '.join(unknown)}"]
+        if errors:
+            raise ValidationError(errors)
+        return frozenset(fields or choices) - frozenset(omit)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        field_names = self.get_sparse_field_names()
+        if field_names is not None:
+            context["field_names"] = field_names
+        return context
+
+
+def _split_field_names(value):
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class QueryPlanViewMixin(SparseFieldsetViewMixin):
+    """
+    View mixin that applies the serializer's query plan to get_queryset(),
+    limited to the ?fields=/?omit= selection when the serializer supports it.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_queryset"):
+            queryset = serializer_class.setup_queryset(
+                queryset,
+                self.get_sparse_field_names(),
+                self.get_query_plan_extra_columns(),
+            )
+        return queryset
+
+    def get_query_plan_extra_columns(self):
+        """Columns the paginator's cursor reads, whatever the serializer renders."""
+        ordering = getattr(self.pagination_class, "cursor_ordering", ())
+        return tuple(name.lstrip("-") for name in ordering)
+
+
+def detail_cache_key(prefix, pk):
+    return f"{prefix}:detail:{pk}"
+
+
+def invalidate_detail_cache(prefix, pks):
+    """Drop the cached representations of the given objects."""
+    cache.delete_many([detail_cache_key(prefix, pk) for pk in pks])
+
+
+class ConditionalRetrieveMixin:
+    """
+    ETag / If-None-Match support for retrieve views, plus an optional cache of
+    the rendered payload.
+
+    - The ETag is derived from the object pk, ``etag_field`` (a last-modified
+      column) and get_representation_key(), so it changes whenever the row is
+      saved. A matching If-None-Match gets a 304 without serializing.
+    - When the timeout named by ``detail_cache_timeout_setting`` is set, the
+      payload is cached under detail_cache_key(detail_cache_prefix, pk) and
+      served without any database query. Whoever changes the object must call
+      invalidate_detail_cache() (see CACHES in core/settings.py).
+    """
+    etag_field = "last_update"
+    detail_cache_prefix = None
+    detail_cache_timeout_setting = None
+
+    def get_detail_cache_timeout(self):
+        if not (self.detail_cache_prefix and self.detail_cache_timeout_setting):
+            return 0
+        return getattr(settings, self.detail_cache_timeout_setting, 0) or 0
+
+    def get_query_plan_extra_columns(self):
+        extra = getattr(super(), "get_query_plan_extra_columns", tuple)()
+        return (*extra, self.etag_field)
+
+    def get_representation_key(self):
+        """Identify this representation of the object (view and query variant)."""
+        key = type(self).__name__
+        field_names = getattr(self, "get_sparse_field_names", lambda: None)()
+        if field_names is not None:
+            key = f"{key}:{','.join(sorted(field_names))}"
+        return key
+
+    def get_etag(self, instance):
+        raw = f"{instance.pk}:{getattr(instance, self.etag_field).isoformat()}:{self.get_representation_key()}"
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def conditional_retrieve(self, request, build_payload):
+        """
+        Return the payload built by build_payload(instance), or 304 if the
+        client already has it.
+        """
+        timeout = self.get_detail_cache_timeout()
+        representation = self.get_representation_key()
+        cache_key = None
+        if timeout:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            cache_key = detail_cache_key(self.detail_cache_prefix, self.kwargs[lookup_url_kwarg])
+            cached = (cache.get(cache_key) or {}).get(representation)
+            if cached is not None:
+                return self.conditional_response(request, *cached)
+
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        if self.etag_matches(request, etag):
+            return self.not_modified_response(etag)
+
+        payload = build_payload(instance)
+        if cache_key:
+            entry = cache.get(cache_key) or {}
+            entry[representation] = (etag, payload)
+            cache.set(cache_key, entry, timeout)
+        return self.conditional_response(request, etag, payload)
+
+    def etag_matches(self, request, etag):
+        if_none_match = request.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+    def not_modified_response(self, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def conditional_response(self, request, etag, payload):
+        if self.etag_matches(request, etag):
+            return self.not_modified_response(etag)
+        response = Response(payload, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        # Let clients cache the body but revalidate on every poll
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,130 @@
+"""
+Shared pagination classes.
+
+StandardResultsPagination is page-number based by default. Clients can opt
+into keyset (cursor) pagination with ``?pagination=cursor``; subsequent pages
+are requested with the opaque ``?cursor=`` value returned as ``nextCursor``.
+Cursor pages skip the COUNT(*) and OFFSET scan, so deep pages cost the same
+as the first one. They always follow the paginator's cursor_ordering, so
+combining cursor mode with ``?ordering=`` is rejected with a 400.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as DRFValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+
+
+class StandardResultsPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "limit"
+    max_page_size = 100
+    page_query_param = "page"
+
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    # Must end in a unique column so every row has a distinct position
+    cursor_ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+    cursor_ordering_message = "Cursor pagination has a fixed order and cannot be combined with '{param}'."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
+
+    def is_cursor_mode(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == "cursor"
+            or bool(params.get(self.cursor_query_param))
+        )
+
+    def get_paginated_data(self, data):
+        """Return the ``data`` block of the success/statusCode/data envelope."""
+        if self.cursor_mode:
+            return {
+                "items": data,
+                "nextCursor": self.next_cursor,
+                "limit": self.limit,
+                "hasMore": self.next_cursor is not None,
+            }
+        return {
+            "items": data,
+            "total": self.page.paginator.count,
+            "page": self.page.number,
+            "limit": self.page.paginator.per_page,
+            "hasMore": self.page.has_next(),
+        }
+
+    # ==================== Keyset mode ====================
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        ordering_param = api_settings.ORDERING_PARAM
+        if request.query_params.get(ordering_param):
+            # Re-ordering below would silently drop the requested order
+            raise DRFValidationError({ordering_param: [self.cursor_ordering_message.format(param=ordering_param)]})
+        self.limit = self.get_page_size(request)
+        queryset = queryset.order_by(*self.cursor_ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_cursor = self.encode_cursor(rows[-1]) if has_more else None
+        return rows
+
+    def get_cursor_fields(self):
+        return [(name.lstrip("-"), name.startswith("-")) for name in self.cursor_ordering]
+
+    def get_keyset_filter(self, position):
+        """
+        Build "row comes after position" for the cursor ordering, i.e.
+        (a < x) OR (a = x AND b < y) for ("-a", "-b").
+        """
+        fields = self.get_cursor_fields()
+        keyset = Q()
+        equal = Q()
+        for (name, descending), value in zip(fields, position):
+            lookup = "lt" if descending else "gt"
+            keyset |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        # Redundant bound on the leading column so the index range scan can
+        # start at the cursor instead of relying on the OR expansion.
+        name, descending = fields[0]
+        leading = Q(**{f"{name}__{'lte' if descending else 'gte'}": position[0]})
+        return leading & keyset
+
+    def encode_cursor(self, instance):
+        position = []
+        for name, _ in self.get_cursor_fields():
+            value = getattr(instance, name)
+            position.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        raw = json.dumps(position, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            fields = self.get_cursor_fields()
+            if not isinstance(position, list) or len(position) != len(fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, position)
+            ]
+        except (TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
@@ -62,6 +62,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "corsheaders",
     'rest_framework',
     'django_filters',
@@ -145,6 +146,8 @@ SIMPLE_JWT = {
     'AUTH_COOKIE_HTTPONLY': True,
     'AUTH_COOKIE_SAMESITE': 'none',  # Change from 'strict' to 'none'
     'AUTH_COOKIE_DOMAIN': 'backend.qbox.sa',
+    # Tokens carry a hash of the password hash; a password change revokes them
+    'CHECK_REVOKE_TOKEN': True,
 }
 FORCE_SCRIPT_NAME = '/api'
 
@@ -175,6 +178,17 @@ DATABASES = {
     }
 }
 
+# Cached package details, rate cards and auth state are dropped when their rows
+# change, but that only reaches this cache: with the per-process local-memory
+# default other workers keep serving their copy until it expires. Use a cache
+# shared by all workers (Redis/Memcached) before raising the timeouts that
+# refer here.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -238,3 +252,87 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     '/home/hassaanqazi/Documents/qbox-be/venv/lib/python3.14/site-packages/drf_yasg/static',
 ]
+
+
+# Bulk package manifests (packages/bulk-create/)
+PACKAGE_MANIFEST_CHUNK_SIZE = env.int('PACKAGE_MANIFEST_CHUNK_SIZE', default=500)
+PACKAGE_MANIFEST_MAX_REPORTED_ERRORS = env.int('PACKAGE_MANIFEST_MAX_REPORTED_ERRORS', default=1000)
+
+# Package export (packages/export/): rows fetched per server-side cursor round trip
+PACKAGE_EXPORT_CHUNK_SIZE = env.int('PACKAGE_EXPORT_CHUNK_SIZE', default=2000)
+
+# Largest decoded size accepted for base64 data URI images (media/images.py)
+DATA_URI_IMAGE_MAX_BYTES = env.int('DATA_URI_IMAGE_MAX_BYTES', default=4 * 1024 * 1024)
+
+# Tracking IDs (packages/tracking.py): numbers reserved per sequence round trip,
+# and whether to append a Luhn check digit
+TRACKING_ID_BLOCK_SIZE = env.int('TRACKING_ID_BLOCK_SIZE', default=100)
+TRACKING_ID_CHECK_DIGIT = env.bool('TRACKING_ID_CHECK_DIGIT', default=True)
+
+# Seconds to cache rendered package detail responses, 0 disables (see CACHES)
+PACKAGE_DETAIL_CACHE_TIMEOUT = env.int('PACKAGE_DETAIL_CACHE_TIMEOUT', default=0)
+
+# Seconds to keep compiled service provider rate cards (see CACHES) and the
+# maximum number of items per quote request
+RATE_CARD_CACHE_TIMEOUT = env.int('RATE_CARD_CACHE_TIMEOUT', default=60)
+SERVICE_PROVIDER_QUOTE_MAX_ITEMS = env.int('SERVICE_PROVIDER_QUOTE_MAX_ITEMS', default=1000)
+
+# Delivered packages not updated for this many days are moved to the archive
+# tables by `manage.py archive_delivered_packages`, this many per transaction
+PACKAGE_ARCHIVE_AFTER_DAYS = env.int('PACKAGE_ARCHIVE_AFTER_DAYS', default=90)
+PACKAGE_ARCHIVE_BATCH_SIZE = env.int('PACKAGE_ARCHIVE_BATCH_SIZE', default=1000)
+
+# Newest packages embedded in each QBox by QboxSerializer; the full list is
+# served by qbox/<id>/packages
+QBOX_RECENT_PACKAGES_LIMIT = env.int('QBOX_RECENT_PACKAGES_LIMIT', default=5)
+
+# Qbox heartbeats are buffered per process and written with bulk_update every
+# QBOX_HEARTBEAT_FLUSH_INTERVAL seconds, or once this many boxes are pending
+QBOX_HEARTBEAT_FLUSH_INTERVAL = env.int('QBOX_HEARTBEAT_FLUSH_INTERVAL', default=5)
+QBOX_HEARTBEAT_MAX_BUFFER = env.int('QBOX_HEARTBEAT_MAX_BUFFER', default=5000)
+QBOX_HEARTBEAT_BATCH_SIZE = env.int('QBOX_HEARTBEAT_BATCH_SIZE', default=1000)
+
+# Fleet summary: cache lifetime in seconds, and default minutes without a
+# heartbeat before a box counts as stale
+QBOX_FLEET_SUMMARY_TTL = env.int('QBOX_FLEET_SUMMARY_TTL', default=30)
+QBOX_STALE_MINUTES = env.int('QBOX_STALE_MINUTES', default=10)
+
+# Qboxes loaded per join query when resyncing homeowner snapshots
+QBOX_SNAPSHOT_SYNC_BATCH_SIZE = env.int('QBOX_SNAPSHOT_SYNC_BATCH_SIZE', default=1000)
+
+# Worker processes (and job threads) rendering QR code images in the
+# background; 0 renders in the job thread without a process pool
+QR_RENDER_WORKERS = env.int('QR_RENDER_WORKERS', default=2)
+
+# String encoded in access QR codes ({token} is the access token; e.g. a deep
+# link), default PNG size in pixels, and how long rendered image URLs stay cached
+QR_PAYLOAD_TEMPLATE = env('QR_PAYLOAD_TEMPLATE', default='{token}')
+QR_IMAGE_DEFAULT_SIZE = env.int('QR_IMAGE_DEFAULT_SIZE', default=300)
+QR_IMAGE_CACHE_TIMEOUT = env.int('QR_IMAGE_CACHE_TIMEOUT', default=86400)
+
+# Signed, offline-verifiable QR access tokens (q_box/tokens.py). The signing
+# key is shared with the boxes; it defaults to a key derived from SECRET_KEY
+QR_SIGNED_TOKENS = env.bool('QR_SIGNED_TOKENS', default=False)
+QR_TOKEN_SIGNING_KEY = env('QR_TOKEN_SIGNING_KEY', default='')
+QR_RECONCILE_MAX_ITEMS = env.int('QR_RECONCILE_MAX_ITEMS', default=500)
+
+# Per-box request signing keys (q_box/device_auth.py) are derived from this
+# secret (default: derived from SECRET_KEY); signed requests older than
+# QBOX_DEVICE_SIGNATURE_MAX_AGE seconds are rejected
+QBOX_DEVICE_SECRET = env('QBOX_DEVICE_SECRET', default='')
+QBOX_DEVICE_SIGNATURE_MAX_AGE = env.int('QBOX_DEVICE_SIGNATURE_MAX_AGE', default=300)
+
+# QR codes marked Expired per UPDATE by the expire_qr_codes sweeper
+QR_EXPIRY_SWEEP_BATCH_SIZE = env.int('QR_EXPIRY_SWEEP_BATCH_SIZE', default=1000)
+
+# Qbox access log (q_box/access_log.py): flush interval in seconds, events
+# buffered before an early flush, monthly partitions created ahead, and full
+# months of events kept
+QBOX_ACCESS_LOG_FLUSH_INTERVAL = env.int('QBOX_ACCESS_LOG_FLUSH_INTERVAL', default=5)
+QBOX_ACCESS_LOG_MAX_BUFFER = env.int('QBOX_ACCESS_LOG_MAX_BUFFER', default=1000)
+QBOX_ACCESS_LOG_PARTITIONS_AHEAD = env.int('QBOX_ACCESS_LOG_PARTITIONS_AHEAD', default=3)
+QBOX_ACCESS_LOG_RETENTION_MONTHS = env.int('QBOX_ACCESS_LOG_RETENTION_MONTHS', default=12)
+
+# Seconds CookieJWTAuthentication caches the auth state (is_active, password
+# version) of a token's user; 0 loads the user on every request (see CACHES)
+AUTH_USER_CACHE_TIMEOUT = env.int('AUTH_USER_CACHE_TIMEOUT', default=0)
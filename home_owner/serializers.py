@@ -1,8 +1,7 @@
 from rest_framework import serializers
-from django.core.files.base import ContentFile
+from core.mixins import SparseFieldsetSerializerMixin
 import requests
-import base64
-import uuid
+from media.images import InvalidImage, decode_image, is_data_uri, store_data_uri, stored_name
 from .models import CustomHomeOwner, CustomHomeOwnerAddress
 from q_box.models import Qbox
 class HomeOwnerAddressSerializer(serializers.ModelSerializer):
@@ -36,7 +35,7 @@ class InstallationSerializer(serializers.Serializer):
     )
 
 
-class HomeOwnerSerializer(serializers.ModelSerializer):
+class HomeOwnerSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     address = HomeOwnerAddressSerializer(read_only=True)
     qboxes = serializers.SerializerMethodField()
     installation_qbox_image_url = serializers.SerializerMethodField()
@@ -93,31 +92,16 @@ class HomeOwnerCreateSerializer(serializers.ModelSerializer):
         if not value.startswith('data:image'):
             raise serializers.ValidationError("Must be a data URI (data:image/...;base64,...)")
             
+        # Checked here, stored under its content hash by create
         try:
-            header, encoded = value.split(',', 1)
-            image_data = base64.b64decode(encoded)
-            
-            # Very basic size limit (example: ~4MB after decode)
-            if len(image_data) > 4 * 1024 * 1024:
-                raise serializers.ValidationError("Image too large (>4MB after decoding)")
-                
-            content_type = header.split(';')[0].split(':')[1]
-            ext = 'jpg'
-            if 'png' in content_type:
-                ext = 'png'
-            elif 'webp' in content_type:
-                ext = 'webp'
-                
-            filename = f"install-{uuid.uuid4().hex}.{ext}"
-            return ContentFile(image_data, name=filename)
-            
-        except Exception as e:
+            return decode_image(value)
+        except InvalidImage as e:
             raise serializers.ValidationError(f"Invalid base64 image: {str(e)}")
 
     def create(self, validated_data):
         installation_data = validated_data.pop('installation')
         address_data = validated_data.pop('address')
-        image_content_file = validated_data.pop('installation_image_base64', None)
+        installation_image_name = stored_name(validated_data.pop('installation_image_base64', None))
         qbox_id = validated_data.pop('qbox_id')
         
         # Extract installation fields
@@ -139,8 +123,8 @@ class HomeOwnerCreateSerializer(serializers.ModelSerializer):
         )
 
         # Handle image: prefer base64, fallback to qbox_image_url
-        if image_content_file:
-            homeowner.installation_qbox_image_url = image_content_file
+        if installation_image_name:
+            homeowner.installation_qbox_image_url = installation_image_name
             homeowner.save(update_fields=['installation_qbox_image_url'])
         elif installation_qbox_image_url:
             # If it's a URL, store it directly
@@ -149,19 +133,8 @@ class HomeOwnerCreateSerializer(serializers.ModelSerializer):
             elif installation_qbox_image_url.startswith('data:image'):
                 # Handle base64 data URI from qbox_image_url field
                 try:
-                    import base64
-                    import uuid
-                    header, encoded = installation_qbox_image_url.split(',', 1)
-                    image_data = base64.b64decode(encoded)
-                    content_type = header.split(';')[0].split(':')[1]
-                    ext = 'jpg'
-                    if 'png' in content_type:
-                        ext = 'png'
-                    elif 'webp' in content_type:
-                        ext = 'webp'
-                    filename = f"install-{uuid.uuid4().hex}.{ext}"
-                    homeowner.installation_qbox_image_url = ContentFile(image_data, name=filename)
-                except Exception:
+                    homeowner.installation_qbox_image_url = store_data_uri(installation_qbox_image_url)
+                except InvalidImage:
                     pass
             homeowner.save(update_fields=['installation_qbox_image_url'])
 
@@ -196,10 +169,18 @@ class HomeOwnerUpdateSerializer(serializers.ModelSerializer):
             "installation_qbox_image_url", "qbox_image"
         ]
 
+    def validate_installation_qbox_image_url(self, value):
+        if not is_data_uri(value):
+            return value
+        try:
+            return decode_image(value)
+        except InvalidImage as e:
+            raise serializers.ValidationError(f"Invalid base64 image: {str(e)}")
+
     def update(self, instance, validated_data):
         address_data = validated_data.pop('address', None)
         qbox_image = validated_data.pop('qbox_image', None)
-        image_url = validated_data.pop('installation_qbox_image_url', None)
+        image_url = stored_name(validated_data.pop('installation_qbox_image_url', None))
 
         if address_data:
             if instance.address:
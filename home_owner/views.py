@@ -5,6 +5,7 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework import filters
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from core.mixins import SparseFieldsetViewMixin
 from .models import CustomHomeOwner
 from .serializers import (
     HomeOwnerSerializer,
@@ -33,9 +34,11 @@ class StandardResultsPagination(PageNumberPagination):
     page_query_param = "page"
 
 
-class HomeOwnerListAPIView(generics.ListAPIView):
+class HomeOwnerListAPIView(SparseFieldsetViewMixin, generics.ListAPIView):
     '''
     Get: list all home owners with pagination and filters
+
+    Supports ?fields= / ?omit= (e.g. ?omit=qboxes) to leave fields out.
     '''
     queryset = CustomHomeOwner.objects.all()
     serializer_class = HomeOwnerSerializer
@@ -0,0 +1,104 @@
+"""
+Content-addressed storage for images sent as base64 data URIs.
+
+Clients may send images inline as ``data:image/...;base64,...``. Instead of
+keeping those strings in Package.package_image / Qbox.qbox_image (and
+dragging them through every list query), they are decoded once, written to
+default_storage under their SHA-256 hash and replaced by the file URL.
+Identical images are stored once.
+
+Serializers check an image with ``decode_image`` in ``validate_*`` and only
+write it from ``create``/``update`` (``stored_name``/``stored_url``), so a
+request that fails validation leaves no file behind.
+"""
+import base64
+import binascii
+import hashlib
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+DATA_URI_RE = re.compile(r"^data:(?P<content_type>image/[\w.+-]+)(?:;[\w=-]+)*;base64,(?P<data>.*)$", re.S)
+
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+
+IMAGE_DIRECTORY = "images"
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class DecodedImage(namedtuple("DecodedImage", ["data", "extension"])):
+    """A checked data URI image that has not been written to storage yet."""
+    __slots__ = ()
+
+
+def is_data_uri(value):
+    return isinstance(value, str) and value.startswith("data:")
+
+
+def decode_data_uri(value):
+    """Return (bytes, extension) for a base64 image data URI."""
+    match = DATA_URI_RE.match(value)
+    if not match:
+        raise InvalidImage("Must be a base64 image data URI (data:image/...;base64,...)")
+
+    content_type = match.group("content_type").lower()
+    if content_type not in IMAGE_EXTENSIONS:
+        raise InvalidImage(f"Unsupported image type '{content_type}'")
+
+    try:
+        data = base64.b64decode("".join(match.group("data").split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidImage("Invalid base64 image data")
+    if not data:
+        raise InvalidImage("Empty image")
+
+    max_size = getattr(settings, "DATA_URI_IMAGE_MAX_BYTES", 4 * 1024 * 1024)
+    if len(data) > max_size:
+        raise InvalidImage(f"Image too large (>{max_size // (1024 * 1024)}MB after decoding)")
+    return data, IMAGE_EXTENSIONS[content_type]
+
+
+def store_image(data, extension):
+    """Store image bytes under their hash and return the storage name."""
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{IMAGE_DIRECTORY}/{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+    if not default_storage.exists(name):
+        # A concurrent writer may win the race; storage then picks a free name
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def store_data_uri(value):
+    """Store a data URI image and return its storage name."""
+    return store_image(*decode_data_uri(value))
+
+
+def decode_image(value):
+    """Check a data URI image without storing it; see stored_name/stored_url."""
+    return DecodedImage(*decode_data_uri(value))
+
+
+def stored_name(value):
+    """Store a DecodedImage and return its storage name; other values pass through."""
+    if isinstance(value, DecodedImage):
+        return store_image(value.data, value.extension)
+    return value
+
+
+def stored_url(value):
+    """Store a DecodedImage and return its file URL; other values pass through."""
+    if isinstance(value, DecodedImage):
+        return default_storage.url(stored_name(value))
+    return value
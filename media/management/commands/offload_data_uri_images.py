@@ -0,0 +1,57 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from home_owner.models import CustomHomeOwner
+from media.images import InvalidImage, store_data_uri
+from packages.caching import invalidate_package_details
+from packages.models import Package
+from q_box.models import Qbox
+
+# (model, field, keep the storage URL rather than the storage name)
+IMAGE_FIELDS = [
+    (Package, "package_image", True),
+    (Qbox, "qbox_image", True),
+    (CustomHomeOwner, "installation_qbox_image_url", False),
+]
+
+
+class Command(BaseCommand):
+    help = "Move base64 data URI images stored in database rows to content-addressed files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be rewritten",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Rows fetched per database round trip (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        for model, field, keep_url in IMAGE_FIELDS:
+            label = f"{model.__name__}.{field}"
+            rows = model.objects.filter(**{f"{field}__startswith": "data:"})
+            if options["dry_run"]:
+                self.stdout.write(f"{label}: {rows.count()} rows with data URIs")
+                continue
+
+            moved = failed = 0
+            for pk, value in rows.values_list("pk", field).iterator(chunk_size=options["batch_size"]):
+                try:
+                    name = store_data_uri(value)
+                except InvalidImage as e:
+                    failed += 1
+                    self.stderr.write(f"{label} {pk}: {e}")
+                    continue
+                # update() leaves last_update/updated_at and signals alone
+                model.objects.filter(pk=pk).update(
+                    **{field: default_storage.url(name) if keep_url else name}
+                )
+                if model is Package:
+                    invalidate_package_details([pk])
+                moved += 1
+            self.stdout.write(self.style.SUCCESS(f"{label}: moved {moved} images, {failed} invalid"))
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('package_timeline', '0001_initial'),
+        ('packages', '0011_archived_package'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPackageTimeline',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date_and_time', models.DateTimeField(verbose_name='Date and Time')),
+                ('status', models.CharField(blank=True, max_length=100, verbose_name='Status')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('issue_related_to', models.CharField(blank=True, max_length=100, verbose_name='Issue Related To')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='packages.archivedpackage', verbose_name='Package')),
+            ],
+            options={
+                'verbose_name': 'Archived Package Timeline',
+                'verbose_name_plural': 'Archived Package Timelines',
+                'ordering': ['-date_and_time'],
+            },
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from packages.models import Package
+from packages.models import ArchivedPackage, Package
 import uuid
 
 class PackageTimeline(models.Model):
@@ -28,3 +28,29 @@ class PackageTimeline(models.Model):
      
     def __str__(self):
         return f"{self.status} - {self.package}"
+
+
+class ArchivedPackageTimeline(models.Model):
+    """Timeline rows of an ArchivedPackage, moved together with the package."""
+    id=models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    date_and_time=models.DateTimeField(verbose_name=_("Date and Time"))
+    status=models.CharField(max_length=100,verbose_name=_("Status"), blank=True)
+    description=models.TextField(verbose_name=_("Description"), blank=True)
+    issue_related_to=models.CharField(max_length=100,verbose_name=_("Issue Related To"), blank=True)
+    package=models.ForeignKey(
+        ArchivedPackage,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name=("Package")
+    )
+    class Meta:
+     ordering=["-date_and_time"]
+     verbose_name=_("Archived Package Timeline")
+     verbose_name_plural=_("Archived Package Timelines")
+
+    def __str__(self):
+        return f"{self.status} - {self.package}"
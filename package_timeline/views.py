@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from .models import PackageTimeline
+from .models import ArchivedPackageTimeline, PackageTimeline
 from .serializers import PackageTimelineSerializer
 from rest_framework import permissions as permission
 from rest_framework.pagination import PageNumberPagination
@@ -128,7 +128,7 @@ class PackageTimelineDetailView(APIView):
 
 class PackageTimelineByPackageIdView(APIView):
     """
-    GET: Retrieve timelines by package ID
+    GET: Retrieve timelines by package ID (archived packages included)
     """
     permission_classes=[permission.AllowAny]
     @swagger_auto_schema(
@@ -148,6 +148,9 @@ class PackageTimelineByPackageIdView(APIView):
                 "message":"Invalid package ID format"
             },status=status.HTTP_400_BAD_REQUEST)
         
+        if not timelines.exists():
+            # Delivered packages may have been moved to the archive tables
+            timelines=ArchivedPackageTimeline.objects.filter(package_id=package_uuid)
         if not timelines.exists():
             return Response({
                 "success":False,
@@ -0,0 +1,101 @@
+"""
+Archive tier for delivered packages.
+
+archive_delivered_packages() moves Delivered packages whose last_update is
+older than the cutoff, with their PackageTimeline rows, into ArchivedPackage
+and ArchivedPackageTimeline. It works in batches of
+``PACKAGE_ARCHIVE_BATCH_SIZE`` packages, one transaction per batch:
+
+- the batch is picked with SELECT ... FOR UPDATE SKIP LOCKED, so packages
+  being updated are left for the next run,
+- rows are copied with INSERT ... SELECT and removed with DELETE, so they
+  never pass through Python and last_update (and so the detail ETag) is kept.
+
+The rows are deleted without Package signals, so PackageCounter keeps
+counting archived packages. The detail endpoints fall back to the archive
+table for ids not found in the hot table.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from package_timeline.models import ArchivedPackageTimeline, PackageTimeline
+from .models import ArchivedPackage, Package
+
+
+def get_archive_cutoff(days=None):
+    """Packages last updated before this moment are archived."""
+    if days is None:
+        days = getattr(settings, "PACKAGE_ARCHIVE_AFTER_DAYS", 90)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_packages(cutoff):
+    return Package.objects.filter(
+        package_type=Package.PackageType.DELIVERED,
+        last_update__lt=cutoff,
+    )
+
+
+def archive_delivered_packages(cutoff, batch_size=None):
+    """Archive every package of archivable_packages(cutoff); return how many."""
+    batch_size = batch_size or getattr(settings, "PACKAGE_ARCHIVE_BATCH_SIZE", 1000)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                archivable_packages(cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by("last_update")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return archived
+            archive_packages(ids)
+        archived += len(ids)
+
+
+def archive_packages(ids, archived_at=None):
+    """
+    Move the given packages and their timelines to the archive tables.
+    Call inside a transaction that has locked the package rows.
+    """
+    archived_at = archived_at or timezone.now()
+    with connection.cursor() as cursor:
+        _copy_rows(cursor, Package, ArchivedPackage, "id", ids, {"archived_at": archived_at})
+        _copy_rows(cursor, PackageTimeline, ArchivedPackageTimeline, "package_id", ids)
+        _delete_rows(cursor, PackageTimeline, "package_id", ids)
+        _delete_rows(cursor, Package, "id", ids)
+
+
+def _key_filter(model, key, ids):
+    """(sql, params) for "key IN (ids)" on model."""
+    field = model._meta.get_field(key)
+    sql = f"{connection.ops.quote_name(field.column)} IN ({', '.join(['%s'] * len(ids))})"
+    return sql, [field.get_db_prep_value(pk, connection) for pk in ids]
+
+
+def _copy_rows(cursor, source, target, key, ids, extra=None):
+    """INSERT INTO target ... SELECT the matching rows of source, plus extra values."""
+    extra = extra or {}
+    quote = connection.ops.quote_name
+    columns = ", ".join(
+        quote(field.column) for field in target._meta.concrete_fields
+        if field.name not in extra
+    )
+    extra_fields = [target._meta.get_field(name) for name in extra]
+    where, params = _key_filter(source, key, ids)
+    cursor.execute(
+        f"INSERT INTO {quote(target._meta.db_table)} "
+        f"({', '.join([columns] + [quote(field.column) for field in extra_fields])}) "
+        f"SELECT {', '.join([columns] + ['%s'] * len(extra_fields))} "
+        f"FROM {quote(source._meta.db_table)} WHERE {where}",
+        [field.get_db_prep_value(extra[field.name], connection) for field in extra_fields] + params,
+    )
+
+
+def _delete_rows(cursor, model, key, ids):
+    where, params = _key_filter(model, key, ids)
+    cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE {where}", params)
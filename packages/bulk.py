@@ -0,0 +1,280 @@
+"""
+Bulk package ingestion from courier manifests.
+
+A manifest is an NDJSON file (one package object per line) or a CSV file
+with a header row. Rows are read lazily from the upload and handled in
+chunks of ``PACKAGE_MANIFEST_CHUNK_SIZE``:
+
+- every row is validated with PackageManifestRowSerializer (the
+  PackageCreateSerializer rules),
+- tracking_id uniqueness and qbox existence are checked with one query per
+  chunk instead of one per row, and missing tracking IDs are reserved with
+  one sequence update per chunk,
+- valid rows are written with one bulk_create for PackageDetails and one
+  for Package, plus the PackageCounter deltas, inside a transaction per
+  chunk.
+
+Only the current chunk and the (capped) error report are held in memory, so
+memory use does not depend on the size of the manifest.
+
+Chunks commit one by one, so a manifest that turns unreadable part way
+(e.g. invalid UTF-8 on a later line) is not an all-or-nothing failure: the
+rows read before the bad line are still ingested, reading stops there, and
+the report carries the error as fileError next to what was created.
+"""
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from q_box.models import Qbox
+from .models import ArchivedPackage, Package, PackageCounter, PackageDetails
+from .serializers import PackageManifestRowSerializer
+from .tracking import PREFIX_INCOMING, allocate_tracking_ids
+
+MANIFEST_FORMATS = ("ndjson", "csv")
+
+# CSV has no nesting, so details are given as "details.<field>" columns
+CSV_DETAILS_PREFIX = "details."
+# CSV cells holding JSON values
+CSV_JSON_COLUMNS = ("payment_charges",)
+
+
+class ManifestError(Exception):
+    """The manifest as a whole cannot be read (unknown format, bad encoding...)."""
+
+
+def get_manifest_format(uploaded_file, requested=None):
+    """Pick the manifest format from the request, file extension or content type."""
+    if requested:
+        requested = requested.lower()
+        if requested not in MANIFEST_FORMATS:
+            raise ManifestError(
+                f"Unsupported manifest format '{requested}'. Use one of: {', '.join(MANIFEST_FORMATS)}."
+            )
+        return requested
+
+    name = (uploaded_file.name or "").lower()
+    content_type = (getattr(uploaded_file, "content_type", "") or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+        return "ndjson"
+    raise ManifestError("Cannot detect manifest format. Upload a .csv or .ndjson file or pass 'format'.")
+
+
+def _decode_lines(uploaded_file):
+    # File.__iter__ reads the upload chunk by chunk and yields lines
+    for line_number, line in enumerate(uploaded_file, start=1):
+        try:
+            yield line.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise ManifestError(f"Line {line_number} is not valid UTF-8.")
+
+
+def iter_ndjson_rows(uploaded_file):
+    """Yield (row_number, data or None, parse_error or None); blank lines are skipped."""
+    row_number = 0
+    for line in _decode_lines(uploaded_file):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Each line must be a JSON object."
+            continue
+        yield row_number, data, None
+
+
+def iter_csv_rows(uploaded_file):
+    """Yield (row_number, data or None, parse_error or None) for each CSV data row."""
+    reader = csv.DictReader(_decode_lines(uploaded_file))
+    for row_number, row in enumerate(reader, start=1):
+        if None in row:
+            yield row_number, None, "Row has more columns than the header."
+            continue
+        try:
+            yield row_number, _csv_row_to_data(row), None
+        except ValueError as e:
+            yield row_number, None, str(e)
+
+
+def _csv_row_to_data(row):
+    data = {}
+    details = {}
+    for column, value in row.items():
+        # Empty cells mean "not provided" so model defaults apply
+        if value is None or value == "":
+            continue
+        if column.startswith(CSV_DETAILS_PREFIX):
+            details[column[len(CSV_DETAILS_PREFIX):]] = value
+        elif column in CSV_JSON_COLUMNS:
+            try:
+                data[column] = json.loads(value)
+            except ValueError:
+                raise ValueError(f"Column '{column}' must contain valid JSON.")
+        else:
+            data[column] = value
+    if details:
+        data["details"] = details
+    return data
+
+
+def iter_manifest_rows(uploaded_file, manifest_format):
+    if manifest_format == "csv":
+        return iter_csv_rows(uploaded_file)
+    return iter_ndjson_rows(uploaded_file)
+
+
+class ManifestReport:
+    """Counts plus a per-row error list capped at max_errors entries."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.total = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # Why reading the manifest stopped early, if it did
+        self.file_error = None
+
+    def add_error(self, row_number, errors, tracking_id=None):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({
+                "row": row_number,
+                "trackingId": tracking_id or None,
+                "errors": errors,
+            })
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errorsTruncated": self.failed > len(self.errors),
+            "fileError": self.file_error,
+        }
+
+
+def ingest_manifest(uploaded_file, manifest_format, chunk_size=None, max_errors=None):
+    """Validate and insert every row of the manifest; return a ManifestReport."""
+    chunk_size = chunk_size or getattr(settings, "PACKAGE_MANIFEST_CHUNK_SIZE", 500)
+    if max_errors is None:
+        max_errors = getattr(settings, "PACKAGE_MANIFEST_MAX_REPORTED_ERRORS", 1000)
+
+    report = ManifestReport(max_errors)
+    rows = _until_file_error(iter_manifest_rows(uploaded_file, manifest_format), report)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        report.total += len(chunk)
+        _ingest_chunk(chunk, report)
+    return report
+
+
+def _until_file_error(rows, report):
+    """Stop at an unreadable line, keeping the rows before it, and record why."""
+    try:
+        yield from rows
+    except ManifestError as e:
+        report.file_error = str(e)
+
+
+def _ingest_chunk(chunk, report):
+    valid = []
+    for row_number, data, parse_error in chunk:
+        if parse_error:
+            report.add_error(row_number, {"non_field_errors": [parse_error]})
+            continue
+        serializer = PackageManifestRowSerializer(data=data)
+        if serializer.is_valid():
+            valid.append((row_number, serializer.validated_data))
+        else:
+            report.add_error(row_number, serializer.errors, data.get("tracking_id"))
+
+    valid = _check_chunk_references(valid, report)
+    if not valid:
+        return
+
+    # One sequence round trip for the whole chunk, outside the insert
+    # transaction so the sequence row is not locked while inserting
+    missing = [data for _, data in valid if not data.get("tracking_id")]
+    for data, tracking_id in zip(missing, allocate_tracking_ids(PREFIX_INCOMING, len(missing))):
+        data["tracking_id"] = tracking_id
+
+    try:
+        with transaction.atomic():
+            _bulk_insert(valid)
+    except IntegrityError as e:
+        # A concurrent writer took one of the tracking ids after the check
+        for row_number, validated_data in valid:
+            report.add_error(
+                row_number,
+                {"non_field_errors": [f"Chunk rejected by the database: {e}"]},
+                validated_data.get("tracking_id"),
+            )
+        return
+    report.created += len(valid)
+
+
+def _check_chunk_references(valid, report):
+    """Resolve qbox ids and check tracking_id uniqueness for the whole chunk."""
+    tracking_ids = [data["tracking_id"] for _, data in valid if data.get("tracking_id")]
+    taken = set()
+    if tracking_ids:
+        for model in (Package, ArchivedPackage):
+            taken.update(model.objects.filter(tracking_id__in=tracking_ids).values_list("tracking_id", flat=True))
+
+    qbox_ids = {data["qbox"] for _, data in valid if data.get("qbox")}
+    qboxes = Qbox.objects.in_bulk(qbox_ids) if qbox_ids else {}
+
+    checked = []
+    for row_number, data in valid:
+        tracking_id = data.get("tracking_id")
+        errors = {}
+        if tracking_id:
+            if tracking_id in taken:
+                errors["tracking_id"] = ["package with this tracking id already exists."]
+            else:
+                taken.add(tracking_id)
+        qbox_id = data.get("qbox")
+        if qbox_id and qbox_id not in qboxes:
+            errors["qbox"] = [f'Invalid pk "{qbox_id}" - object does not exist.']
+        if errors:
+            report.add_error(row_number, errors, tracking_id)
+            continue
+        data = dict(data)
+        data["qbox"] = qboxes.get(qbox_id)
+        checked.append((row_number, data))
+    return checked
+
+
+def _bulk_insert(valid):
+    packages = []
+    details = []
+    for _, data in valid:
+        details_data = data.pop("details", None)
+        package = Package(**data)
+        if details_data:
+            package.details = PackageDetails(**details_data)
+            details.append(package.details)
+        packages.append(package)
+
+    PackageDetails.objects.bulk_create(details)
+    for package in packages:
+        if package.details is not None:
+            # Re-assign so details_id picks up the pk set by bulk_create
+            package.details = package.details
+    Package.objects.bulk_create(packages)
+    # bulk_create sends no post_save, so update the counters here
+    PackageCounter.apply_deltas(Counter(package.counter_key for package in packages))
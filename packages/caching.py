@@ -0,0 +1,24 @@
+"""
+Invalidation of the cached package detail representations
+(see core.mixins.ConditionalRetrieveMixin).
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from core.mixins import invalidate_detail_cache
+
+PACKAGE_DETAIL_CACHE_PREFIX = "package"
+
+
+def detail_cache_enabled():
+    return bool(getattr(settings, "PACKAGE_DETAIL_CACHE_TIMEOUT", 0))
+
+
+def invalidate_package_details(pks):
+    """Drop cached package details once the current transaction commits."""
+    if not detail_cache_enabled():
+        return
+    # Invalidating before commit would let a concurrent read cache the old row
+    transaction.on_commit(partial(invalidate_detail_cache, PACKAGE_DETAIL_CACHE_PREFIX, list(pks)))
@@ -0,0 +1,57 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import Q
+from rest_framework import filters
+
+
+class PackageSearchFilter(filters.SearchFilter):
+    """
+    Package search that can use indexes, limited to the view's search_fields.
+
+    On PostgreSQL each search term matches either:
+    - a substring of ``tracking_id`` (pg_trgm GIN index), so partial tracking
+      numbers from the support desk stay fast, or
+    - every word of the term as a word prefix in the view's other
+      ``search_fields``. The trigger-maintained ``search_vector`` (GIN index,
+      all searchable columns) finds the candidate rows, and a vector built
+      from the view's fields only rechecks them, so columns a view does not
+      search never match.
+
+    So apart from tracking_id, PostgreSQL matches word prefixes ("acme" finds
+    "Acme Logistics", "logis" finds it too, "cme" does not). Any other
+    database (SQLite for local testing) uses DRF's SearchFilter, i.e.
+    substring ICONTAINS over the same ``search_fields``.
+    """
+    search_config = "simple"
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms or connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        fields = [field.lstrip("^=@$") for field in self.get_search_fields(view, request) or ()]
+        word_fields = [field for field in fields if field != "tracking_id"]
+        if word_fields:
+            queryset = queryset.alias(
+                view_search_vector=SearchVector(*word_fields, config=self.search_config)
+            )
+        for term in search_terms:
+            queryset = queryset.filter(self.get_term_filter(term, "tracking_id" in fields, bool(word_fields)))
+        return queryset
+
+    def get_term_filter(self, term, search_tracking_id, search_words):
+        term_filter = Q(pk__in=[])
+        if search_tracking_id:
+            term_filter |= Q(tracking_id__icontains=term)
+        words = re.findall(r"\w+", term)
+        if search_words and words:
+            # Words are \w-only, so they are safe inside a raw tsquery
+            query = SearchQuery(
+                " & ".join(f"{word}:*" for word in words),
+                config=self.search_config,
+                search_type="raw",
+            )
+            term_filter |= Q(search_vector=query) & Q(view_search_vector=query)
+        return term_filter
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from packages.archive import archivable_packages, archive_delivered_packages, get_archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move old Delivered packages and their timelines to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Archive packages last updated more than this many days ago "
+                 "(default: PACKAGE_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Packages moved per transaction (default: PACKAGE_ARCHIVE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many packages would be archived",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options["days"])
+        if options["dry_run"]:
+            count = archivable_packages(cutoff).count()
+            self.stdout.write(f"{count} packages last updated before {cutoff.isoformat()} would be archived")
+            return
+        archived = archive_delivered_packages(cutoff, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} packages last updated before {cutoff.isoformat()}"))
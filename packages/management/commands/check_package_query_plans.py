@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from packages.views import (
+    DeliveredPackagesAPIView,
+    IncomingPackagesAPIView,
+    OutgoingPackagesAPIView,
+    PackageListAPIView,
+)
+
+# (view, query params) for every filter/order combination the list endpoints
+# serve without a search term
+LIST_CASES = [
+    (PackageListAPIView, {}),
+    (PackageListAPIView, {"package_type": "Incoming"}),
+    (PackageListAPIView, {"package_type": "Outgoing", "outgoing_status": "Sent"}),
+    (PackageListAPIView, {"pagination": "cursor"}),
+    (PackageListAPIView, {"package_type": "Delivered", "pagination": "cursor"}),
+    (OutgoingPackagesAPIView, {}),
+    (OutgoingPackagesAPIView, {"outgoing_status": "Return"}),
+    (OutgoingPackagesAPIView, {"pagination": "cursor"}),
+    (DeliveredPackagesAPIView, {}),
+    (IncomingPackagesAPIView, {}),
+    (IncomingPackagesAPIView, {"pagination": "cursor"}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the first page of every package list endpoint and fail if "
+        "one needs a sequential scan or a sort (PostgreSQL only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print every plan, not only the failing ones",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans can only be checked on PostgreSQL.")
+
+        factory = APIRequestFactory()
+        failures = 0
+        for view_class, params in LIST_CASES:
+            queryset = self.get_first_page(view_class, factory.get("/", params))
+            with transaction.atomic():
+                # Small test tables would otherwise always be scanned
+                # sequentially; this asks whether an index *can* serve the page
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = queryset.explain()
+
+            problems = [
+                name for name, marker in (("sequential scan", "Seq Scan"), ("sort", "Sort"))
+                if marker in plan
+            ]
+            label = f"{view_class.__name__} {params or ''}".strip()
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {label}: {', '.join(problems)}"))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok   {label}"))
+                if options["verbose_plans"]:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"{failures} list queries are not served by an index")
+
+    def get_first_page(self, view_class, http_request):
+        """The queryset for the view's first page, built like the view does."""
+        view = view_class()
+        view.request = Request(http_request)
+        view.args = ()
+        view.kwargs = {}
+        view.format_kwarg = None
+        queryset = view.filter_queryset(view.get_queryset())
+
+        paginator = view.pagination_class()
+        limit = paginator.get_page_size(view.request)
+        if paginator.is_cursor_mode(view.request):
+            return queryset.order_by(*paginator.cursor_ordering)[:limit + 1]
+        return queryset[:limit]
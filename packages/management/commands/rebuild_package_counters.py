@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from packages.models import ArchivedPackage, Package, PackageCounter
+
+
+class Command(BaseCommand):
+    help = "Recompute PackageCounter from the package and archive tables and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift, do not write anything",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if connection.vendor == "postgresql" and not options["check"]:
+                # Block package writes (not reads) so no delta lands mid-rebuild
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LOCK TABLE {Package._meta.db_table} IN SHARE MODE")
+
+            # Archived packages are still counted
+            expected = Counter()
+            for model in (Package, ArchivedPackage):
+                for row in (
+                    model.objects.order_by()
+                    .values("qbox_id", "package_type", "shipment_status")
+                    .annotate(count=Count("id"))
+                ):
+                    expected[(row["qbox_id"], row["package_type"], row["shipment_status"])] += row["count"]
+            stored = {
+                (qbox_id, package_type, shipment_status): count
+                for qbox_id, package_type, shipment_status, count in
+                PackageCounter.objects.values_list("qbox_id", "package_type", "shipment_status", "count")
+            }
+
+            drift = {
+                key: (stored.get(key, 0), expected.get(key, 0))
+                for key in expected.keys() | stored.keys()
+                if stored.get(key, 0) != expected.get(key, 0)
+            }
+            for (qbox_id, package_type, shipment_status), (found, actual) in sorted(drift.items(), key=str):
+                self.stdout.write(
+                    f"{qbox_id or 'No Qbox'} / {package_type} / {shipment_status}: "
+                    f"stored {found}, actual {actual}"
+                )
+
+            if options["check"] or not drift:
+                self.stdout.write(self.style.SUCCESS(f"{len(drift)} counters out of date"))
+                return
+
+            PackageCounter.objects.all().delete()
+            PackageCounter.objects.bulk_create(
+                PackageCounter(qbox_id=qbox_id, package_type=package_type, shipment_status=shipment_status, count=count)
+                for (qbox_id, package_type, shipment_status), count in expected.items()
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt package counters, fixed {len(drift)} entries"))
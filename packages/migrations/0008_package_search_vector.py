@@ -0,0 +1,86 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:03
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Columns folded into the search vector. Keep in sync with
+# packages.filters.PackageSearchFilter.
+SEARCH_VECTOR_COLUMNS = [
+    "tracking_id", "merchant_name", "service_provider",
+    "driver_name", "city", "outgoing_status",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    """
+    PostgreSQL only: trigger that maintains search_vector, GIN index over it
+    and a trigram index for partial tracking_id lookups. Other databases keep
+    search_vector NULL and PackageSearchFilter falls back to ICONTAINS.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    document = " || ' ' || ".join(
+        f"coalesce(NEW.{column}, '')" for column in SEARCH_VECTOR_COLUMNS
+    )
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION packages_package_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('simple', {document});
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    schema_editor.execute(f"""
+        CREATE TRIGGER packages_package_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF {", ".join(SEARCH_VECTOR_COLUMNS)}
+        ON packages_package
+        FOR EACH ROW EXECUTE FUNCTION packages_package_search_vector_update();
+    """)
+    # Fire the trigger once for existing rows
+    schema_editor.execute("UPDATE packages_package SET tracking_id = tracking_id;")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS pkg_search_vector_gin "
+        "ON packages_package USING gin (search_vector);"
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trgm = cursor.fetchone() is not None
+    if has_trgm:
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        # Django compiles icontains to UPPER(col::text) LIKE UPPER(%s), so the
+        # trigram index has to be on that exact expression.
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS pkg_tracking_id_trgm "
+            "ON packages_package USING gin ((UPPER(tracking_id::text)) gin_trgm_ops);"
+        )
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS pkg_tracking_id_trgm;")
+    schema_editor.execute("DROP INDEX IF EXISTS pkg_search_vector_gin;")
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS packages_package_search_vector_trigger ON packages_package;"
+    )
+    schema_editor.execute("DROP FUNCTION IF EXISTS packages_package_search_vector_update();")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0007_package_package_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Package = apps.get_model('packages', 'Package')
+    PackageCounter = apps.get_model('packages', 'PackageCounter')
+    rows = (
+        Package.objects.using(schema_editor.connection.alias)
+        .order_by()
+        .values('qbox_id', 'package_type', 'shipment_status')
+        .annotate(count=Count('id'))
+    )
+    PackageCounter.objects.using(schema_editor.connection.alias).bulk_create(
+        PackageCounter(**row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0008_package_search_vector'),
+        ('q_box', '0004_alter_qboxaccessqrcode_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('package_type', models.CharField(choices=[('Incoming', 'Incoming'), ('Outgoing', 'Outgoing'), ('Delivered', 'Delivered')], max_length=20)),
+                ('shipment_status', models.CharField(choices=[('Shipment-Created', 'Shipment Created'), ('Out-for-Pickup', 'Out for Pickup'), ('Pickup-Completed', 'Pickup Completed'), ('Pickup-Failed', 'Pickup Failed'), ('Out-for-Delivery', 'Out for Delivery'), ('Issue-Logged', 'Issue Logged'), ('Delivery-Completed', 'Delivery Completed'), ('Delivery-Failed', 'Delivery Failed'), ('Return-Completed', 'Return Completed')], max_length=30)),
+                ('count', models.IntegerField(default=0)),
+                ('qbox', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='package_counters', to='q_box.qbox')),
+            ],
+            options={
+                'verbose_name': 'Package Counter',
+                'verbose_name_plural': 'Package Counters',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('qbox__isnull', False)), fields=('qbox', 'package_type', 'shipment_status'), name='uniq_pkg_counter_qbox'), models.UniqueConstraint(condition=models.Q(('qbox__isnull', True)), fields=('package_type', 'shipment_status'), name='uniq_pkg_counter_no_qbox')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0009_package_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackingSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Tracking Sequence',
+                'verbose_name_plural': 'Tracking Sequences',
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0010_tracking_sequence'),
+        ('q_box', '0004_alter_qboxaccessqrcode_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPackage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tracking_id', models.CharField(db_index=True, help_text='Unique tracking number', max_length=20, unique=True)),
+                ('merchant_name', models.CharField(blank=True, max_length=100)),
+                ('service_provider', models.CharField(blank=True, help_text='Courier / logistics company (Aramex, DHL, local provider...)', max_length=100)),
+                ('driver_name', models.CharField(blank=True, help_text='Name of driver currently assigned (if any)', max_length=100)),
+                ('qr_code', models.CharField(blank=True, help_text='QR code value or URL', max_length=100)),
+                ('package_type', models.CharField(choices=[('Incoming', 'Incoming'), ('Outgoing', 'Outgoing'), ('Delivered', 'Delivered')], default='Incoming', help_text='Type of package: Incoming, Outgoing, or Delivered', max_length=20)),
+                ('outgoing_status', models.CharField(blank=True, choices=[('Sent', 'Sent'), ('Return', 'Return')], help_text='Status for Outgoing packages: Sent or Return', max_length=20, null=True)),
+                ('city', models.CharField(blank=True, help_text='City name (required for Incoming packages)', max_length=100)),
+                ('item_value', models.DecimalField(blank=True, decimal_places=2, help_text='Value of the item in the package', max_digits=10, null=True)),
+                ('recipient_name', models.CharField(blank=True, help_text='Recipient name for outgoing packages', max_length=200)),
+                ('recipient_phone', models.CharField(blank=True, help_text='Recipient phone number', max_length=20)),
+                ('recipient_email', models.EmailField(blank=True, help_text='Recipient email address', max_length=254)),
+                ('description', models.TextField(blank=True, help_text='Package description')),
+                ('package_image', models.URLField(blank=True, default='', help_text='Package image URL - http://..., https://..., or base64 data URI')),
+                ('payment_method', models.CharField(blank=True, default='Apple Pay', help_text='Payment method for outgoing packages', max_length=50)),
+                ('payment_currency', models.CharField(blank=True, default='SAR', help_text='Payment currency', max_length=10)),
+                ('payment_charges', models.JSONField(blank=True, default=list, help_text='Payment charges as JSON array')),
+                ('shipment_status', models.CharField(choices=[('Shipment-Created', 'Shipment Created'), ('Out-for-Pickup', 'Out for Pickup'), ('Pickup-Completed', 'Pickup Completed'), ('Pickup-Failed', 'Pickup Failed'), ('Out-for-Delivery', 'Out for Delivery'), ('Issue-Logged', 'Issue Logged'), ('Delivery-Completed', 'Delivery Completed'), ('Delivery-Failed', 'Delivery Failed'), ('Return-Completed', 'Return Completed')], default='Shipment-Created', max_length=30)),
+                ('last_update', models.DateTimeField(auto_now=True, help_text='Last time any field was changed')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('archived_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('details', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_package', to='packages.packagedetails')),
+                ('qbox', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_packages', to='q_box.qbox')),
+            ],
+            options={
+                'verbose_name': 'Archived Package',
+                'verbose_name_plural': 'Archived Packages',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-16 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0011_archived_package'),
+    ]
+
+    operations = [
+        # Superseded by the package_type prefix of pkg_type_created_idx
+        migrations.RemoveIndex(
+            model_name='package',
+            name='packages_pa_package_759aea_idx',
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['-created_at', '-id'], name='pkg_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['package_type', '-created_at', '-id'], name='pkg_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('package_type', 'Outgoing')), fields=['outgoing_status', '-created_at', '-id'], name='pkg_outgoing_created_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0012_package_list_indexes'),
+    ]
+
+    operations = [
+        # Superseded by the qbox prefix of pkg_qbox_created_idx
+        migrations.RemoveIndex(
+            model_name='package',
+            name='packages_pa_qbox_id_b8943c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['qbox', '-created_at', '-id'], name='pkg_qbox_created_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 import uuid
 
@@ -25,7 +27,12 @@ class PackageDetails(models.Model):
         return " / ".join(filter(None, parts)) or "No details"
 
 
-class Package(models.Model):
+class AbstractPackage(models.Model):
+    """
+    Columns shared by the hot Package table and the ArchivedPackage table.
+    Relations are declared on the concrete models so each gets its own
+    related_name.
+    """
     class PackageType(models.TextChoices):
         INCOMING = "Incoming", "Incoming"
         OUTGOING = "Outgoing", "Outgoing"
@@ -46,20 +53,46 @@ class Package(models.Model):
         DELIVERY_FAILED     = "Delivery-Failed",     "Delivery Failed"
         RETURN_COMPLETED    = "Return-Completed",    "Return Completed"
 
+    # shipment_status -> statuses it may move to; completed statuses are final
+    SHIPMENT_STATUS_TRANSITIONS = {
+        ShipmentStatus.SHIPMENT_CREATED: {
+            ShipmentStatus.OUT_FOR_PICKUP, ShipmentStatus.OUT_FOR_DELIVERY, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.OUT_FOR_PICKUP: {
+            ShipmentStatus.PICKUP_COMPLETED, ShipmentStatus.PICKUP_FAILED, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.PICKUP_FAILED: {
+            ShipmentStatus.OUT_FOR_PICKUP, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.PICKUP_COMPLETED: {
+            ShipmentStatus.OUT_FOR_DELIVERY, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.OUT_FOR_DELIVERY: {
+            ShipmentStatus.DELIVERY_COMPLETED, ShipmentStatus.DELIVERY_FAILED, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.DELIVERY_FAILED: {
+            ShipmentStatus.OUT_FOR_DELIVERY, ShipmentStatus.RETURN_COMPLETED, ShipmentStatus.ISSUE_LOGGED,
+        },
+        ShipmentStatus.ISSUE_LOGGED: {
+            ShipmentStatus.OUT_FOR_PICKUP, ShipmentStatus.OUT_FOR_DELIVERY, ShipmentStatus.RETURN_COMPLETED,
+        },
+        ShipmentStatus.DELIVERY_COMPLETED: set(),
+        ShipmentStatus.RETURN_COMPLETED: set(),
+    }
+
+    @classmethod
+    def get_status_sources(cls, target_status):
+        """Statuses from which a package may move to target_status."""
+        return [
+            source for source, targets in cls.SHIPMENT_STATUS_TRANSITIONS.items()
+            if target_status in targets
+        ]
+
     id = models.UUIDField(
         primary_key=True,
         default=uuid.uuid4,
         editable=False
     )
-    qbox = models.ForeignKey(
-        'q_box.Qbox',                     
-        on_delete=models.SET_NULL,          
-        null=True,
-        blank=True,
-        related_name="packages",
-        help_text="The Qbox this package is currently associated with / delivered to"
-    )
-
     tracking_id = models.CharField(
         max_length=20,              
         unique=True,
@@ -180,6 +213,22 @@ class Package(models.Model):
         default=timezone.now,
         editable=False
     )
+
+    class Meta:
+        abstract = True
+        ordering = ["-created_at"]
+
+
+class Package(AbstractPackage):
+    qbox = models.ForeignKey(
+        'q_box.Qbox',                     
+        on_delete=models.SET_NULL,          
+        null=True,
+        blank=True,
+        related_name="packages",
+        help_text="The Qbox this package is currently associated with / delivered to"
+    )
+
     details = models.OneToOneField(
         PackageDetails,
         on_delete=models.SET_NULL,
@@ -188,17 +237,155 @@ class Package(models.Model):
         related_name="package"
     )
 
+    # Maintained by a database trigger on PostgreSQL (see migration 0008);
+    # stays NULL on other databases, where search falls back to ICONTAINS.
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
+
     def __str__(self):
         qbox_str = f" → Qbox {self.qbox.qbox_id}" if self.qbox else ""
         return f"Package {self.tracking_id} ({self.shipment_status}){qbox_str}"
 
+    def save(self, *args, **kwargs):
+        # PackageCounter deltas are applied by signals during save(); keep
+        # them in the same transaction as the row itself.
+        with transaction.atomic(using=kwargs.get("using") or self._state.db):
+            super().save(*args, **kwargs)
+
+    @property
+    def counter_key(self):
+        """(qbox_id, package_type, shipment_status) bucket in PackageCounter."""
+        return (self.qbox_id, self.package_type, self.shipment_status)
+
     class Meta:
         verbose_name = "Package"
         verbose_name_plural = "Packages"
         ordering = ["-created_at"]
+        # The list endpoints filter on package_type (and outgoing_status for
+        # Outgoing) or qbox and order by -created_at, or (-created_at, -id) in
+        # cursor mode; these indexes return those pages in order without a sort.
+        # `manage.py check_package_query_plans` verifies the plans.
         indexes = [
             models.Index(fields=["tracking_id"]),
-            models.Index(fields=["qbox"]),
             models.Index(fields=["shipment_status"]),
-            models.Index(fields=["package_type"]),
+            models.Index(fields=["-created_at", "-id"], name="pkg_created_idx"),
+            models.Index(fields=["qbox", "-created_at", "-id"], name="pkg_qbox_created_idx"),
+            models.Index(fields=["package_type", "-created_at", "-id"], name="pkg_type_created_idx"),
+            models.Index(
+                fields=["outgoing_status", "-created_at", "-id"],
+                condition=Q(package_type="Outgoing"),
+                name="pkg_outgoing_created_idx",
+            ),
+        ]
+
+
+class ArchivedPackage(AbstractPackage):
+    """
+    Delivered packages moved out of the Package table by
+    ``manage.py archive_delivered_packages`` (see packages.archive).
+
+    Rows keep their id, tracking_id and last_update, are read-only, and are
+    still counted in PackageCounter.
+    """
+    qbox = models.ForeignKey(
+        'q_box.Qbox',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_packages"
+    )
+    details = models.OneToOneField(
+        PackageDetails,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_package"
+    )
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Archived package {self.tracking_id} ({self.shipment_status})"
+
+    class Meta:
+        verbose_name = "Archived Package"
+        verbose_name_plural = "Archived Packages"
+        ordering = ["-created_at"]
+
+
+class PackageCounter(models.Model):
+    """
+    Number of packages per (qbox, package_type, shipment_status).
+
+    Maintained transactionally by packages.signals for single-row saves and
+    deletes, and by the bulk code paths via apply_deltas(). Packages without a
+    qbox are counted in the qbox=NULL rows. Run ``manage.py
+    rebuild_package_counters`` to repair drift.
+    """
+    qbox = models.ForeignKey(
+        'q_box.Qbox',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="package_counters"
+    )
+    package_type = models.CharField(max_length=20, choices=Package.PackageType.choices)
+    shipment_status = models.CharField(max_length=30, choices=Package.ShipmentStatus.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Package Counter"
+        verbose_name_plural = "Package Counters"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["qbox", "package_type", "shipment_status"],
+                condition=Q(qbox__isnull=False),
+                name="uniq_pkg_counter_qbox",
+            ),
+            models.UniqueConstraint(
+                fields=["package_type", "shipment_status"],
+                condition=Q(qbox__isnull=True),
+                name="uniq_pkg_counter_no_qbox",
+            ),
         ]
+
+    def __str__(self):
+        return f"{self.qbox_id or 'No Qbox'} / {self.package_type} / {self.shipment_status}: {self.count}"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Add {(qbox_id, package_type, shipment_status): delta} to the counters.
+        Call inside the transaction that changes the packages.
+        """
+        for (qbox_id, package_type, shipment_status), delta in deltas.items():
+            if not delta:
+                continue
+            lookup = {"qbox_id": qbox_id, "package_type": package_type, "shipment_status": shipment_status}
+            if cls.objects.filter(**lookup).update(count=F("count") + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(count=delta, **lookup)
+            except IntegrityError:
+                # Another transaction created the row first
+                cls.objects.filter(**lookup).update(count=F("count") + delta)
+
+
+class TrackingSequence(models.Model):
+    """
+    Next free number per tracking ID prefix (TRK, SND, RET...).
+
+    Numbers are handed out in blocks by packages.tracking, so a row is only
+    touched once per block, not once per package.
+    """
+    prefix = models.CharField(max_length=10, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        verbose_name = "Tracking Sequence"
+        verbose_name_plural = "Tracking Sequences"
+
+    def __str__(self):
+        return f"{self.prefix}: {self.next_value}"
@@ -1,13 +1,29 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Package, PackageDetails
-import uuid
+from core.mixins import QueryPlanSerializerMixin, SparseFieldsetSerializerMixin
+from media.images import InvalidImage, decode_image, stored_url
+from service_provider.pricing import billable_kg, get_rate_cards, parse_weight
+from .caching import invalidate_package_details
+from .models import ArchivedPackage, Package, PackageCounter, PackageDetails
+from .tracking import PREFIX_INCOMING, PREFIX_RETURN, PREFIX_SEND, allocate_tracking_id
+
+# Shown when a package has no stored charges and its courier has no rate card
+DEFAULT_CHARGES = [
+    {"key": "Base delivery fee (First 5 Kg's)", "value": 5},
+    {"key": "Additional per Kg", "value": 10},
+    {"key": "Tax Fuel", "value": 5},
+]
+
 
 class PackageDetailsSerializer(serializers.ModelSerializer):
     class Meta:
         model = PackageDetails
         fields = ["id", "package_type", "package_size", "package_weight", "summary"]
 
-class PackageSerializer(serializers.ModelSerializer):
+class PackageSerializer(SparseFieldsetSerializerMixin, QueryPlanSerializerMixin, serializers.ModelSerializer):
     details = PackageDetailsSerializer(read_only=True)
     type = serializers.SerializerMethodField()
     trackingId = serializers.CharField(source="tracking_id")
@@ -21,6 +37,14 @@ class PackageSerializer(serializers.ModelSerializer):
     imageUrl = serializers.SerializerMethodField()
     attributes = serializers.SerializerMethodField()
     paymentSummary = serializers.SerializerMethodField()
+
+    method_field_sources = {
+        "type": ("package_type",),
+        "imageUrl": (),
+        "attributes": ("details", "item_value"),
+        "paymentSummary": ("payment_method", "payment_charges", "payment_currency",
+                           "service_provider", "details"),
+    }
     
     class Meta:
         model = Package
@@ -60,26 +84,24 @@ class PackageSerializer(serializers.ModelSerializer):
         return attributes
     
     def get_paymentSummary(self, obj):
-        if hasattr(obj, 'payment_method') and obj.payment_method:
-            return {
-                "paymentMethod": obj.payment_method,
-                "charges": obj.payment_charges if hasattr(obj, 'payment_charges') and obj.payment_charges else [
-                    {"key": "Base delivery fee (First 5 Kg's)", "value": 5},
-                    {"key": "Additional per Kg", "value": 10},
-                    {"key": "Tax Fuel", "value": 5},
-                ],
-                "currency": obj.payment_currency if hasattr(obj, 'payment_currency') and obj.payment_currency else "SAR"
-            }
         return {
-            "paymentMethod": "Apple Pay",
-            "charges": [
-                {"key": "Base delivery fee (First 5 Kg's)", "value": 5},
-                {"key": "Additional per Kg", "value": 10},
-                {"key": "Tax Fuel", "value": 5},
-            ],
-            "currency": "SAR"
+            "paymentMethod": obj.payment_method or "Apple Pay",
+            "charges": obj.payment_charges or self.quote_charges(obj),
+            "currency": obj.payment_currency or "SAR",
         }
 
+    def quote_charges(self, obj):
+        """Charges from the courier's rate card, or the default charges if it has none."""
+        if not hasattr(self, "_rate_cards"):
+            # Looked up once per serializer, so a list page costs one cache read
+            self._rate_cards = get_rate_cards()
+        card = self._rate_cards.get_by_name(obj.service_provider)
+        if card is None:
+            return DEFAULT_CHARGES
+        weight = parse_weight(obj.details.package_weight) if obj.details else None
+        charges, _ = card.quote(billable_kg(weight or 1))
+        return charges
+
 class PackageListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Package
@@ -90,7 +112,7 @@ class PackageListSerializer(serializers.ModelSerializer):
         ]
 
 
-class IncomingPackageSerializer(serializers.Serializer):
+class IncomingPackageSerializer(SparseFieldsetSerializerMixin, QueryPlanSerializerMixin, serializers.Serializer):
     """Serializer for incoming package detail response matching frontend requirements"""
     id = serializers.UUIDField()
     trackingId = serializers.CharField(source="tracking_id")
@@ -102,6 +124,12 @@ class IncomingPackageSerializer(serializers.Serializer):
     imageUrl = serializers.SerializerMethodField()
     attributes = serializers.SerializerMethodField()
 
+    method_field_sources = {
+        "type": (),
+        "imageUrl": (),
+        "attributes": ("details", "item_value"),
+    }
+
     def get_type(self, obj):
         return "PACKAGE_TYPE.INCOMING"
 
@@ -222,7 +250,7 @@ class OutgoingPackageSerializer(serializers.Serializer):
         }
 
 
-class DeliveredPackageSerializer(serializers.Serializer):
+class DeliveredPackageSerializer(SparseFieldsetSerializerMixin, QueryPlanSerializerMixin, serializers.Serializer):
     """Serializer for delivered package detail response matching frontend requirements"""
     id = serializers.UUIDField()
     type = serializers.SerializerMethodField()
@@ -234,6 +262,12 @@ class DeliveredPackageSerializer(serializers.Serializer):
     imageUrl = serializers.SerializerMethodField()
     attributes = serializers.SerializerMethodField()
 
+    method_field_sources = {
+        "type": (),
+        "imageUrl": (),
+        "attributes": ("details", "item_value"),
+    }
+
     def get_type(self, obj):
         return "PACKAGE_TYPE.DELIVERED"
 
@@ -318,10 +352,16 @@ class PackageCreateSerializer(serializers.ModelSerializer):
         
         return data
 
+    def validate_tracking_id(self, value):
+        # The unique validator only sees the hot table
+        if value and ArchivedPackage.objects.filter(tracking_id=value).exists():
+            raise serializers.ValidationError("package with this tracking id already exists.")
+        return value
+
     def create(self, validated_data):
         # Auto-generate tracking_id if not provided
         if not validated_data.get('tracking_id'):
-            validated_data['tracking_id'] = f"TRK-{str(uuid.uuid4())[:8].upper()}"
+            validated_data['tracking_id'] = allocate_tracking_id(PREFIX_INCOMING)
         
         details_data = validated_data.pop('details', None)
         package = Package.objects.create(**validated_data)
@@ -333,6 +373,22 @@ class PackageCreateSerializer(serializers.ModelSerializer):
         
         return package
 
+class PackageManifestRowSerializer(PackageCreateSerializer):
+    """
+    One row of a bulk manifest. Same rules as PackageCreateSerializer, but the
+    per-row database checks (tracking_id uniqueness, qbox lookup) are done once
+    per chunk by packages.bulk.
+    """
+    qbox = serializers.UUIDField(required=False, allow_null=True)
+
+    class Meta(PackageCreateSerializer.Meta):
+        extra_kwargs = {
+            "tracking_id": {"required": False, "allow_blank": True, "validators": []}
+        }
+
+    def validate_tracking_id(self, value):
+        return value
+
 class PackageUpdateSerializer(serializers.ModelSerializer):
     details = PackageDetailsSerializer(required=False)
     
@@ -432,10 +488,87 @@ class PackageStatusUpdateSerializer(serializers.Serializer):
         return data
 
 
+class PackageBulkStatusUpdateSerializer(serializers.Serializer):
+    """
+    Move many packages to one shipment_status.
+
+    Packages whose current status cannot move to shipment_status (see
+    Package.SHIPMENT_STATUS_TRANSITIONS) are reported and left untouched; the
+    rest are updated with a single UPDATE and get a PackageTimeline row each,
+    all in one transaction.
+    """
+    package_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs of the packages to move"
+    )
+    shipment_status = serializers.ChoiceField(
+        choices=Package.ShipmentStatus.choices,
+        help_text="Target shipment status"
+    )
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    issue_related_to = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+
+    def create(self, validated_data):
+        from package_timeline.models import PackageTimeline
+
+        target = validated_data['shipment_status']
+        package_ids = list(dict.fromkeys(validated_data['package_ids']))
+        allowed_sources = set(Package.get_status_sources(target))
+
+        with transaction.atomic():
+            # Lock the rows so concurrent transitions see the new status
+            current = {
+                pk: (qbox_id, package_type, shipment_status)
+                for pk, qbox_id, package_type, shipment_status in
+                Package.objects.select_for_update()
+                .filter(id__in=package_ids)
+                .values_list("id", "qbox_id", "package_type", "shipment_status")
+            }
+            updated_ids = [pk for pk in package_ids if pk in current and current[pk][2] in allowed_sources]
+            if updated_ids:
+                Package.objects.filter(id__in=updated_ids).update(
+                    shipment_status=target,
+                    last_update=timezone.now(),
+                )
+                PackageTimeline.objects.bulk_create([
+                    PackageTimeline(
+                        package_id=pk,
+                        status=target,
+                        description=validated_data['description'],
+                        issue_related_to=validated_data['issue_related_to'],
+                    )
+                    for pk in updated_ids
+                ])
+                # QuerySet.update() sends no signals, so update the counters and
+                # drop cached details here
+                deltas = Counter()
+                for pk in updated_ids:
+                    qbox_id, package_type, shipment_status = current[pk]
+                    deltas[(qbox_id, package_type, shipment_status)] -= 1
+                    deltas[(qbox_id, package_type, target)] += 1
+                PackageCounter.apply_deltas(deltas)
+                invalidate_package_details(updated_ids)
+
+        return {
+            "updated": updated_ids,
+            "rejected": [
+                {
+                    "id": pk,
+                    "currentStatus": current[pk][2],
+                    "reason": f"Cannot move from {current[pk][2]} to {target}."
+                }
+                for pk in package_ids if pk in current and current[pk][2] not in allowed_sources
+            ],
+            "notFound": [pk for pk in package_ids if pk not in current],
+        }
+
+
 class SendPackageSerializer(serializers.Serializer):
     """Serializer for creating a Send Package with camelCase field names"""
     shippingCompany = serializers.CharField(max_length=100, required=True, help_text="Shipping company name")
-    qboxImage = serializers.CharField(max_length=500, required=True, help_text="URL or base64 data URI of the package image (http://..., https://..., or data:image/...;base64,...)")
+    qboxImage = serializers.CharField(required=True, help_text="URL or base64 data URI of the package image (http://..., https://..., or data:image/...;base64,...)")
     packageDescription = serializers.CharField(required=True, help_text="Description of the package")
     packageItemValue = serializers.DecimalField(max_digits=10, decimal_places=2, required=True, help_text="Value of the package item")
     currency = serializers.CharField(max_length=10, required=True, help_text="Currency code (e.g., SAR)")
@@ -464,9 +597,11 @@ class SendPackageSerializer(serializers.Serializer):
                 # Store HTTP URLs directly
                 return value
             elif value.startswith('data:image'):
-                # Handle base64 data URI - return as-is for URLField storage
-                # This makes the image accessible as a data URL
-                return value
+                # Checked here, stored as a file by create/update
+                try:
+                    return decode_image(value)
+                except InvalidImage as e:
+                    raise serializers.ValidationError(str(e))
         
         return value
 
@@ -484,7 +619,7 @@ class SendPackageSerializer(serializers.Serializer):
                 pass
         
         # Extract package image
-        package_image = validated_data.pop('qboxImage', '')
+        package_image = stored_url(validated_data.pop('qboxImage', ''))
         
         # Create PackageDetails for the package
         details_data = {
@@ -494,7 +629,7 @@ class SendPackageSerializer(serializers.Serializer):
         details = PackageDetails.objects.create(**details_data)
         
         # Auto-generate tracking_id
-        tracking_id = f"SND-{str(uuid.uuid4())[:8].upper()}"
+        tracking_id = allocate_tracking_id(PREFIX_SEND)
         
         # Create the package as Outgoing with Sent status
         package = Package.objects.create(
@@ -517,7 +652,7 @@ class SendPackageSerializer(serializers.Serializer):
 
 class ReturnPackageSerializer(serializers.Serializer):
     """Serializer for creating a Return Package with camelCase field names"""
-    returnPackageImage = serializers.CharField(max_length=500, required=True, help_text="URL or base64 data URI of the return package image (http://..., https://..., or data:image/...;base64,...)")
+    returnPackageImage = serializers.CharField(required=True, help_text="URL or base64 data URI of the return package image (http://..., https://..., or data:image/...;base64,...)")
     packageDescription = serializers.CharField(required=True, help_text="Description of the return package")
     packageItemValue = serializers.DecimalField(max_digits=10, decimal_places=2, required=True, help_text="Value of the package item")
     currency = serializers.CharField(max_length=10, required=True, help_text="Currency code (e.g., SAR)")
@@ -543,16 +678,18 @@ class ReturnPackageSerializer(serializers.Serializer):
                 # Store HTTP URLs directly
                 return value
             elif value.startswith('data:image'):
-                # Handle base64 data URI - return as-is for URLField storage
-                # This makes the image accessible as a data URL
-                return value
+                # Checked here, stored as a file by create/update
+                try:
+                    return decode_image(value)
+                except InvalidImage as e:
+                    raise serializers.ValidationError(str(e))
         
         return value
 
     def create(self, validated_data):
         """Create a new outgoing package with 'Return' status"""
         # Extract package image
-        package_image = validated_data.pop('returnPackageImage', '')
+        package_image = stored_url(validated_data.pop('returnPackageImage', ''))
         
         # Create PackageDetails for the package
         details_data = {
@@ -562,7 +699,7 @@ class ReturnPackageSerializer(serializers.Serializer):
         details = PackageDetails.objects.create(**details_data)
         
         # Auto-generate tracking_id
-        tracking_id = f"RET-{str(uuid.uuid4())[:8].upper()}"
+        tracking_id = allocate_tracking_id(PREFIX_RETURN)
         
         # Create the package as Outgoing with Return status
         package = Package.objects.create(
@@ -581,7 +718,7 @@ class ReturnPackageSerializer(serializers.Serializer):
         return package
 
 
-class OutgoingPackageSerializer(serializers.ModelSerializer):
+class OutgoingPackageSerializer(SparseFieldsetSerializerMixin, QueryPlanSerializerMixin, serializers.ModelSerializer):
     """Serializer for Outgoing packages (both Send and Return) with camelCase field names"""
     details = PackageDetailsSerializer(read_only=True)
     
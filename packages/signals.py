@@ -0,0 +1,84 @@
+"""
+Keep PackageCounter and the cached package details in step with single-row
+Package saves and deletes.
+
+Bulk code paths (QuerySet.update, bulk_create) do not send these signals and
+call PackageCounter.apply_deltas() / invalidate_package_details() themselves.
+"""
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from q_box.models import Qbox
+from .caching import detail_cache_enabled, invalidate_package_details
+from .models import Package, PackageCounter, PackageDetails
+
+COUNTER_FIELDS = {"qbox", "qbox_id", "package_type", "shipment_status"}
+
+
+@receiver(pre_save, sender=Package)
+def remember_counter_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_counter_key = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not COUNTER_FIELDS.intersection(update_fields):
+        return
+    # Package.save() runs in a transaction, so the row stays locked until the
+    # counter delta is written.
+    instance._previous_counter_key = (
+        Package.objects.using(kwargs.get("using"))
+        .select_for_update()
+        .filter(pk=instance.pk)
+        .values_list("qbox_id", "package_type", "shipment_status")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Package)
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_package_details([instance.pk])
+    previous = getattr(instance, "_previous_counter_key", None)
+    current = instance.counter_key
+    if created:
+        PackageCounter.apply_deltas({current: 1})
+    elif previous is not None and previous != current:
+        PackageCounter.apply_deltas({previous: -1, current: 1})
+
+
+@receiver(post_delete, sender=Package)
+def update_counters_on_delete(sender, instance, **kwargs):
+    invalidate_package_details([instance.pk])
+    PackageCounter.apply_deltas({instance.counter_key: -1})
+
+
+@receiver(post_save, sender=PackageDetails)
+def invalidate_details_owner(sender, instance, raw=False, **kwargs):
+    if raw or not detail_cache_enabled():
+        return
+    invalidate_package_details(
+        Package.objects.filter(details=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(pre_delete, sender=Qbox)
+def move_counters_off_deleted_qbox(sender, instance, **kwargs):
+    """
+    Deleting a Qbox sets package.qbox to NULL without sending Package signals,
+    so bump last_update of its packages (their ETags and cached details
+    change), and move its counts to the qbox=NULL rows; its own rows are
+    cascade-deleted.
+    """
+    package_pks = list(instance.packages.values_list("pk", flat=True))
+    if package_pks:
+        Package.objects.filter(pk__in=package_pks).update(last_update=timezone.now())
+        invalidate_package_details(package_pks)
+    deltas = Counter()
+    for package_type, shipment_status, count in PackageCounter.objects.filter(
+        qbox=instance
+    ).values_list("package_type", "shipment_status", "count"):
+        deltas[(None, package_type, shipment_status)] += count
+    PackageCounter.apply_deltas(deltas)
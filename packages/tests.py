@@ -143,6 +143,37 @@ class PackagesAPITester:
             print(f"  Response: {response.text}")
             return False
     
+    def bulk_create_packages(self):
+        """Test creating packages from an NDJSON manifest"""
+        print("\n" + "="*50)
+        print("BULK CREATING PACKAGES...")
+        print("="*50)
+        
+        rows = [
+            {"tracking_id": generate_unique_tracking_id(), "city": "Riyadh", "merchant_name": "Manifest Merchant"},
+            {"tracking_id": generate_unique_tracking_id(), "city": "Jeddah", "details": {"package_size": "Small"}},
+            {"package_type": "Outgoing"},  # invalid: outgoing_status missing
+        ]
+        manifest = "\n".join(json.dumps(row) for row in rows)
+        
+        response = self.session.post(
+            f"{PACKAGES_URL}bulk-create/",
+            files={"file": ("manifest.ndjson", manifest, "application/x-ndjson")},
+            headers={"Content-Type": None}
+        )
+        
+        if response.status_code == 201:
+            data = response.json().get("data", {})
+            print(f"✓ Manifest processed")
+            print(f"  Created: {data.get('created')}, Failed: {data.get('failed')}")
+            for error in data.get("errors", []):
+                print(f"    - Row {error.get('row')}: {error.get('errors')}")
+            return data.get("created") == 2 and data.get("failed") == 1
+        else:
+            print(f"✗ Failed to bulk create packages: {response.status_code}")
+            print(f"  Response: {response.text}")
+            return False
+    
     def get_package_detail(self):
         """Test getting package details"""
         if not self.package_id:
@@ -219,6 +250,35 @@ class PackagesAPITester:
             print(f"  Response: {response.text}")
             return False
     
+    def bulk_change_shipment_status(self):
+        """Test moving packages to a new shipment status in bulk"""
+        if not self.package_id:
+            print("\n✗ No package ID available for bulk status test")
+            return False
+            
+        print("\n" + "="*50)
+        print("BULK CHANGING SHIPMENT STATUS...")
+        print("="*50)
+        
+        response = self.session.post(
+            f"{PACKAGES_URL}bulk-change-status/",
+            json={
+                "package_ids": [self.package_id, str(uuid.uuid4())],
+                "shipment_status": "Out-for-Pickup",
+                "description": "Picked up by test driver"
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            print(f"✓ Shipment statuses updated")
+            print(f"  Updated: {len(data.get('updated', []))}, Rejected: {len(data.get('rejected', []))}, Not found: {len(data.get('notFound', []))}")
+            return self.package_id in data.get("updated", [])
+        else:
+            print(f"✗ Failed to bulk change shipment status: {response.status_code}")
+            print(f"  Response: {response.text}")
+            return False
+    
     def delete_package(self):
         """Test deleting package"""
         if not self.package_id:
@@ -250,10 +310,12 @@ class PackagesAPITester:
         
         tests = [
             ("Create Package", self.create_package),
+            ("Bulk Create Packages", self.bulk_create_packages),
             ("List Packages", self.list_packages),
             ("Get Package Detail", self.get_package_detail),
             ("Update Package", self.update_package),
             ("Change Package Status", self.change_package_status),
+            ("Bulk Change Shipment Status", self.bulk_change_shipment_status),
             ("Delete Package", self.delete_package),
         ]
         
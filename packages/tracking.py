@@ -0,0 +1,112 @@
+"""
+Tracking ID allocation.
+
+IDs look like ``TRK-0000000420`` (9 digits plus a Luhn check digit by
+default). Numbers come from one TrackingSequence row per prefix:
+
+- reserve_block() moves the sequence forward by N in a single
+  ``UPDATE ... RETURNING`` round trip,
+- allocate_tracking_id() serves single IDs from an in-process block of
+  TRACKING_ID_BLOCK_SIZE numbers, so the sequence row is touched once per
+  block,
+- allocate_tracking_ids() reserves exactly N numbers for bulk creation.
+
+IDs are unique but not ordered across processes, and unused numbers of a
+block are skipped when the process exits. The numeric part is never 8
+characters long, so new IDs cannot clash with the legacy ``TRK-`` + 8 hex
+character IDs.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import TrackingSequence
+
+PREFIX_INCOMING = "TRK"
+PREFIX_SEND = "SND"
+PREFIX_RETURN = "RET"
+
+NUMBER_WIDTH = 9
+
+
+def luhn_check_digit(number):
+    """Luhn (mod 10) check digit for a string of digits."""
+    total = 0
+    for index, digit in enumerate(reversed(number)):
+        value = int(digit)
+        if index % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_check_digit(tracking_id):
+    """True if the number part of tracking_id ends in a valid Luhn check digit."""
+    number = tracking_id.rsplit("-", 1)[-1]
+    return number.isdigit() and len(number) > 1 and luhn_check_digit(number[:-1]) == number[-1]
+
+
+def format_tracking_id(prefix, value):
+    number = f"{value:0{NUMBER_WIDTH}d}"
+    if getattr(settings, "TRACKING_ID_CHECK_DIGIT", True):
+        number += luhn_check_digit(number)
+    return f"{prefix}-{number}"
+
+
+def reserve_block(prefix, size):
+    """Reserve size numbers for prefix; return the first one."""
+    table = connection.ops.quote_name(TrackingSequence._meta.db_table)
+    sql = f"UPDATE {table} SET next_value = next_value + %s WHERE prefix = %s RETURNING next_value"
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [size, prefix])
+            row = cursor.fetchone()
+        if row is not None:
+            return row[0] - size
+        try:
+            with transaction.atomic():
+                TrackingSequence.objects.create(prefix=prefix)
+        except IntegrityError:
+            # Created concurrently; the UPDATE will find it now
+            pass
+
+
+class TrackingIdAllocator:
+    """Per-process cache of reserved number blocks, one per prefix."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def allocate(self, prefix):
+        if connection.in_atomic_block:
+            # The reservation would roll back with the caller's transaction
+            # while a cached block survived it, so never cache here.
+            return format_tracking_id(prefix, reserve_block(prefix, 1))
+
+        with self._lock:
+            next_value, end = self._blocks.get(prefix, (0, 0))
+            if next_value >= end:
+                size = getattr(settings, "TRACKING_ID_BLOCK_SIZE", 100)
+                next_value = reserve_block(prefix, size)
+                end = next_value + size
+            self._blocks[prefix] = (next_value + 1, end)
+        return format_tracking_id(prefix, next_value)
+
+
+allocator = TrackingIdAllocator()
+
+
+def allocate_tracking_id(prefix=PREFIX_INCOMING):
+    return allocator.allocate(prefix)
+
+
+def allocate_tracking_ids(prefix, count):
+    """Reserve count tracking IDs in one round trip."""
+    if count <= 0:
+        return []
+    start = reserve_block(prefix, count)
+    return [format_tracking_id(prefix, value) for value in range(start, start + count)]
@@ -1,10 +1,14 @@
 from django.urls import path
 from .views import (
     PackageListAPIView,
+    PackageExportAPIView,
+    PackageCountsAPIView,
     PackageDetailAPIView,
     PackageCreateAPIView,
+    PackageBulkCreateAPIView,
     PackageUpdateAPIView,
     PackageStatusUpdateAPIView,
+    PackageBulkStatusUpdateAPIView,
     PackageDeleteAPIView,
     SendPackageAPIView,
     ReturnPackageAPIView,
@@ -23,7 +27,11 @@ from .views import (
 urlpatterns = [
     # List and Create endpoints
     path('', PackageListAPIView.as_view(), name='package-list'),
+    path('export/', PackageExportAPIView.as_view(), name='package-export'),
+    path('counts/', PackageCountsAPIView.as_view(), name='package-counts'),
     path('create/', PackageCreateAPIView.as_view(), name='package-create'),
+    path('bulk-create/', PackageBulkCreateAPIView.as_view(), name='package-bulk-create'),
+    path('bulk-change-status/', PackageBulkStatusUpdateAPIView.as_view(), name='package-bulk-status'),
     
     # Send and Return package endpoints
     path('send/', SendPackageAPIView.as_view(), name='package-send'),
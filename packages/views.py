@@ -1,15 +1,27 @@
+import uuid
+
+from django.http import Http404
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
 from rest_framework import filters
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import swagger_auto_schema, no_body
 from drf_yasg import openapi
-from .models import Package
+from core.mixins import ConditionalRetrieveMixin, QueryPlanViewMixin
+from core.pagination import StandardResultsPagination
+from service_provider.pricing import rate_card_version
+from .bulk import MANIFEST_FORMATS, ManifestError, get_manifest_format, ingest_manifest
+from .caching import PACKAGE_DETAIL_CACHE_PREFIX
+from .export import EXPORT_FORMATS, export_response
+from .filters import PackageSearchFilter
+from .models import ArchivedPackage, Package, PackageCounter
 from .serializers import (
     PackageSerializer,
     PackageCreateSerializer,
+    PackageManifestRowSerializer,
     PackageStatusUpdateSerializer,
+    PackageBulkStatusUpdateSerializer,
     PackageUpdateSerializer,
     SendPackageSerializer,
     ReturnPackageSerializer,
@@ -47,28 +59,59 @@ outgoing_status_schema = openapi.Schema(
 )
 
 
-class StandardResultsPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "limit"
-    max_page_size = 100
-    page_query_param = "page"
+pagination_parameters = [
+    openapi.Parameter(
+        'pagination',
+        openapi.IN_QUERY,
+        description="Set to 'cursor' for keyset pagination (returns nextCursor instead of total). Cursor pages are always newest first and cannot be combined with 'ordering' (400)",
+        type=openapi.TYPE_STRING,
+        enum=["cursor"]
+    ),
+    openapi.Parameter(
+        'cursor',
+        openapi.IN_QUERY,
+        description="Opaque nextCursor value from the previous page (cursor pagination only)",
+        type=openapi.TYPE_STRING
+    ),
+]
+
+
+sparse_fieldset_parameters = [
+    openapi.Parameter(
+        'fields',
+        openapi.IN_QUERY,
+        description="Comma-separated response fields to return (default: all)",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'omit',
+        openapi.IN_QUERY,
+        description="Comma-separated response fields to leave out",
+        type=openapi.TYPE_STRING
+    ),
+]
 
 
-class PackageListAPIView(generics.ListAPIView):
+class PackageListAPIView(QueryPlanViewMixin, generics.ListAPIView):
     '''
     Get: List all packages with pagination and filters
     
     Query Parameters:
     - search: Search by tracking_id, merchant_name, service_provider, driver_name
+      (full-text + trigram indexes on PostgreSQL, see PackageSearchFilter)
     - ordering: Order by field (tracking_id, merchant_name, service_provider, driver_name, created_at, last_update, package_type, shipment_status)
     - package_type: Filter by package type (Incoming, Outgoing, Delivered)
     - outgoing_status: Filter by outgoing status (Sent, Return) - only applicable for Outgoing packages
+    - pagination: 'cursor' switches to keyset pagination ordered by (created_at, id); pass nextCursor back as cursor.
+      Cannot be combined with ordering (400)
+    - fields / omit: comma-separated serializer fields to keep / drop; the SQL
+      column list is narrowed to match
     '''
     queryset = Package.objects.all()
     serializer_class = PackageSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PackageSearchFilter, filters.OrderingFilter]
     search_fields = ["tracking_id", "merchant_name", "service_provider", "driver_name"]
     ordering_fields = ["tracking_id", "merchant_name", "service_provider", "driver_name", "created_at", "last_update", "package_type", "shipment_status"]
     ordering = ["-created_at"]
@@ -109,19 +152,15 @@ class PackageListAPIView(generics.ListAPIView):
                 type=openapi.TYPE_STRING,
                 enum=Package.OutgoingStatus.choices
             ),
+            *pagination_parameters,
+            *sparse_fieldset_parameters,
         ]
     )
     def get_paginated_response(self, data):
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(data),
             "message": "List Packages"
         })
 
@@ -145,6 +184,142 @@ class PackageListAPIView(generics.ListAPIView):
         })
 
 
+class PackageCountsAPIView(generics.GenericAPIView):
+    '''
+    Get: Package counts by package type and shipment status
+
+    Read from the PackageCounter table, so the cost does not depend on the number
+    of packages.
+
+    Query Parameters:
+    - qbox: Qbox UUID for a single box, or 'none' for packages without a box.
+      Omit for totals over all packages.
+    '''
+    queryset = PackageCounter.objects.all()
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[Package] Package counts",
+        operation_description="Counts of packages per package type and shipment status, optionally for one Qbox.",
+        tags=["Package"],
+        manual_parameters=[
+            openapi.Parameter(
+                'qbox',
+                openapi.IN_QUERY,
+                description="Qbox UUID, or 'none' for packages without a Qbox",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={
+            200: create_success_response(
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "qbox": openapi.Schema(type=openapi.TYPE_STRING),
+                        "total": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "byType": openapi.Schema(type=openapi.TYPE_OBJECT),
+                        "byStatus": openapi.Schema(type=openapi.TYPE_OBJECT),
+                    }
+                ),
+                description="Package counts"
+            ),
+            400: ValidationErrorResponse,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        qbox = request.query_params.get('qbox')
+        if qbox == 'none':
+            queryset = queryset.filter(qbox__isnull=True)
+        elif qbox:
+            try:
+                queryset = queryset.filter(qbox_id=uuid.UUID(qbox))
+            except ValueError:
+                return Response({
+                    "success": False,
+                    "statusCode": status.HTTP_400_BAD_REQUEST,
+                    "data": None,
+                    "message": "qbox must be a UUID or 'none'."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        by_type = dict.fromkeys(Package.PackageType.values, 0)
+        by_status = dict.fromkeys(Package.ShipmentStatus.values, 0)
+        for package_type, shipment_status, count in queryset.values_list("package_type", "shipment_status", "count"):
+            by_type[package_type] = by_type.get(package_type, 0) + count
+            by_status[shipment_status] = by_status.get(shipment_status, 0) + count
+
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": {
+                "qbox": qbox or None,
+                "total": sum(by_type.values()),
+                "byType": by_type,
+                "byStatus": by_status,
+            },
+            "message": "Package counts"
+        }, status=status.HTTP_200_OK)
+
+
+class PackageExportAPIView(PackageListAPIView):
+    '''
+    Get: Export packages as a streamed CSV or NDJSON file
+
+    Accepts the same search, ordering, package_type and outgoing_status filters as
+    the package list, without pagination. Rows are streamed from a server-side
+    cursor, so any number of packages can be exported.
+
+    Query Parameters:
+    - export_format: 'csv' (default) or 'ndjson'
+    '''
+    pagination_class = None
+
+    @swagger_auto_schema(
+        operation_summary="[Package] Export packages",
+        operation_description="Stream all packages matching the list filters as CSV or NDJSON.",
+        tags=["Package"],
+        manual_parameters=[
+            openapi.Parameter(
+                'export_format',
+                openapi.IN_QUERY,
+                description="File format: csv (default) or ndjson",
+                type=openapi.TYPE_STRING,
+                enum=list(EXPORT_FORMATS)
+            ),
+            openapi.Parameter(
+                'package_type',
+                openapi.IN_QUERY,
+                description="Filter by package type (Incoming, Outgoing, Delivered)",
+                type=openapi.TYPE_STRING,
+                enum=Package.PackageType.values
+            ),
+            openapi.Parameter(
+                'outgoing_status',
+                openapi.IN_QUERY,
+                description="Filter by outgoing status (Sent, Return) - only for Outgoing packages",
+                type=openapi.TYPE_STRING,
+                enum=Package.OutgoingStatus.values
+            ),
+        ],
+        responses={
+            200: openapi.Response(description="CSV or NDJSON file"),
+            400: ValidationErrorResponse,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, export_format)
+
+
 class PackageCreateAPIView(generics.CreateAPIView):
     '''
     Post: Create a new package
@@ -191,14 +366,154 @@ class PackageCreateAPIView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PackageDetailAPIView(generics.RetrieveAPIView):
+class PackageBulkCreateAPIView(generics.GenericAPIView):
     '''
-    Get: Retrieve a single package
+    Post: Create packages in bulk from a courier manifest
+
+    Upload the manifest as multipart field 'file':
+    - **NDJSON** (.ndjson / .jsonl): one package object per line, same fields as package create.
+    - **CSV** (.csv): header row with package create field names. Details go in
+      'details.package_type', 'details.package_size', 'details.package_weight' columns;
+      'payment_charges' holds a JSON array. Empty cells are treated as not provided.
+
+    Rows are validated with the package create rules and written in chunks, so a
+    bad row only fails itself. The response reports created/failed counts and
+    the errors per row (row numbers are 1-based data rows). If the file turns
+    unreadable part way, the rows before that line are kept and the 400
+    response still carries the report, with the reason in 'fileError'.
+    '''
+    queryset = Package.objects.all()
+    serializer_class = PackageManifestRowSerializer
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        operation_summary="[Package] Bulk create packages from a manifest",
+        operation_description="Upload an NDJSON or CSV manifest. Rows are validated like package create and inserted in chunks; the response contains a per-row error report.",
+        tags=["Package"],
+        request_body=no_body,
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="Manifest file (.ndjson/.jsonl or .csv)",
+                type=openapi.TYPE_FILE,
+                required=True
+            ),
+            openapi.Parameter(
+                'format',
+                openapi.IN_FORM,
+                description="Manifest format; detected from the file name when omitted",
+                type=openapi.TYPE_STRING,
+                enum=list(MANIFEST_FORMATS)
+            ),
+        ],
+        responses={
+            201: create_success_response(
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "total": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "created": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "failed": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "errors": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                        ),
+                        "errorsTruncated": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        "fileError": openapi.Schema(type=openapi.TYPE_STRING),
+                    }
+                ),
+                description="Manifest processed"
+            ),
+            **COMMON_RESPONSES
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": "Manifest file is required in the 'file' field."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            manifest_format = get_manifest_format(uploaded_file, request.data.get('format'))
+        except ManifestError as e:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        report = ingest_manifest(uploaded_file, manifest_format)
+        if report.file_error:
+            # Rows before the unreadable line are already committed; report them
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": report.as_dict(),
+                "message": f"{report.file_error} Reading stopped there: {report.created} packages created, {report.failed} rows failed"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_201_CREATED,
+            "data": report.as_dict(),
+            "message": f"{report.created} packages created, {report.failed} rows failed"
+        }, status=status.HTTP_201_CREATED)
+
+
+class RateCardVersionMixin:
+    '''
+    For detail views whose payload quotes charges from the rate cards: the
+    rate-card version is part of the representation key, so pricing changes
+    move the ETag and bypass cached payloads.
+    '''
+
+    def get_representation_key(self):
+        return f"{super().get_representation_key()}:rates-{rate_card_version()}"
+
+
+class ArchivedPackageFallbackMixin:
+    '''
+    Look packages up in ArchivedPackage when they are not in the hot table, so
+    archived packages stay readable through the detail endpoints.
+    '''
+    archive_queryset = ArchivedPackage.objects.all()
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            pass
+        queryset = self.archive_queryset.all()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_queryset"):
+            queryset = serializer_class.setup_queryset(
+                queryset,
+                self.get_sparse_field_names(),
+                self.get_query_plan_extra_columns(),
+            )
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = generics.get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class PackageDetailAPIView(ArchivedPackageFallbackMixin, RateCardVersionMixin, ConditionalRetrieveMixin, QueryPlanViewMixin, generics.RetrieveAPIView):
+    '''
+    Get: Retrieve a single package (archived packages included)
     '''
     queryset = Package.objects.all()
     serializer_class = PackageSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "id"
+    detail_cache_prefix = PACKAGE_DETAIL_CACHE_PREFIX
+    detail_cache_timeout_setting = "PACKAGE_DETAIL_CACHE_TIMEOUT"
 
     @swagger_auto_schema(
         **swagger.retrieve_operation(
@@ -208,17 +523,15 @@ class PackageDetailAPIView(generics.RetrieveAPIView):
         )
     )
     def get(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response({
+        return self.conditional_retrieve(request, lambda instance: {
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": serializer.data,
+            "data": self.get_serializer(instance).data,
             "message": "Get Package"
-        }, status=status.HTTP_200_OK)
+        })
 
 
-class IncomingPackageDetailAPIView(generics.RetrieveAPIView):
+class IncomingPackageDetailAPIView(ConditionalRetrieveMixin, QueryPlanViewMixin, generics.RetrieveAPIView):
     '''
     Get: Retrieve a single incoming package with formatted response
     '''
@@ -226,6 +539,8 @@ class IncomingPackageDetailAPIView(generics.RetrieveAPIView):
     serializer_class = IncomingPackageSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "id"
+    detail_cache_prefix = PACKAGE_DETAIL_CACHE_PREFIX
+    detail_cache_timeout_setting = "PACKAGE_DETAIL_CACHE_TIMEOUT"
 
     @swagger_auto_schema(
         **swagger.retrieve_operation(
@@ -236,16 +551,16 @@ class IncomingPackageDetailAPIView(generics.RetrieveAPIView):
     )
     def get(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            return self.conditional_retrieve(
+                request, lambda instance: self.get_serializer(instance).data
+            )
         except Package.DoesNotExist:
             return Response({
                 "detail": "Incoming package not found"
             }, status=status.HTTP_404_NOT_FOUND)
 
 
-class OutgoingPackageDetailAPIView(generics.RetrieveAPIView):
+class OutgoingPackageDetailAPIView(ConditionalRetrieveMixin, QueryPlanViewMixin, generics.RetrieveAPIView):
     '''
     Get: Retrieve a single outgoing package with formatted response
     '''
@@ -253,6 +568,8 @@ class OutgoingPackageDetailAPIView(generics.RetrieveAPIView):
     serializer_class = OutgoingPackageSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "id"
+    detail_cache_prefix = PACKAGE_DETAIL_CACHE_PREFIX
+    detail_cache_timeout_setting = "PACKAGE_DETAIL_CACHE_TIMEOUT"
 
     @swagger_auto_schema(
         **swagger.retrieve_operation(
@@ -263,23 +580,25 @@ class OutgoingPackageDetailAPIView(generics.RetrieveAPIView):
     )
     def get(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            return self.conditional_retrieve(
+                request, lambda instance: self.get_serializer(instance).data
+            )
         except Package.DoesNotExist:
             return Response({
                 "detail": "Outgoing package not found"
             }, status=status.HTTP_404_NOT_FOUND)
 
 
-class DeliveredPackageDetailAPIView(generics.RetrieveAPIView):
+class DeliveredPackageDetailAPIView(ArchivedPackageFallbackMixin, ConditionalRetrieveMixin, QueryPlanViewMixin, generics.RetrieveAPIView):
     '''
-    Get: Retrieve a single delivered package with formatted response
+    Get: Retrieve a single delivered package with formatted response (archived packages included)
     '''
     queryset = Package.objects.filter(package_type=Package.PackageType.DELIVERED)
     serializer_class = DeliveredPackageSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = "id"
+    detail_cache_prefix = PACKAGE_DETAIL_CACHE_PREFIX
+    detail_cache_timeout_setting = "PACKAGE_DETAIL_CACHE_TIMEOUT"
 
     @swagger_auto_schema(
         **swagger.retrieve_operation(
@@ -290,9 +609,9 @@ class DeliveredPackageDetailAPIView(generics.RetrieveAPIView):
     )
     def get(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            return self.conditional_retrieve(
+                request, lambda instance: self.get_serializer(instance).data
+            )
         except Package.DoesNotExist:
             return Response({
                 "detail": "Delivered package not found"
@@ -394,6 +713,51 @@ class PackageStatusUpdateAPIView(generics.UpdateAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class PackageBulkStatusUpdateAPIView(generics.GenericAPIView):
+    '''
+    Post: Move many packages to one shipment status
+
+    Each package must be allowed to move from its current shipment status to the
+    target (see Package.SHIPMENT_STATUS_TRANSITIONS). Allowed packages are updated
+    together and get a timeline entry each; the others are returned in 'rejected'
+    or 'notFound' and left unchanged.
+    '''
+    queryset = Package.objects.all()
+    serializer_class = PackageBulkStatusUpdateSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[Package] Bulk update shipment status",
+        operation_description="Move up to 500 packages to one shipment status. Invalid transitions are reported per package and skipped.",
+        tags=["Package"],
+        request_body=PackageBulkStatusUpdateSerializer,
+        responses={
+            200: create_success_response(
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "updated": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID)),
+                        "rejected": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                        "notFound": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID)),
+                    }
+                ),
+                description="Shipment statuses updated"
+            ),
+            400: ValidationErrorResponse,
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": result,
+            "message": f"{len(result['updated'])} packages moved to {serializer.validated_data['shipment_status']}"
+        }, status=status.HTTP_200_OK)
+
+
 class PackageDeleteAPIView(generics.DestroyAPIView):
     '''
     Delete: Remove a package
@@ -450,7 +814,7 @@ class SendPackageAPIView(generics.CreateAPIView):
         "statusCode": 201,
         "data": {
             "id": "uuid",
-            "tracking_id": "SND-ABC12345",
+            "tracking_id": "SND-0000000422",
             "merchant_name": "Sardar Hussain",
             "service_provider": "mainDoor",
             "outgoing_status": "Sent",
@@ -594,7 +958,7 @@ class ReturnPackageAPIView(generics.CreateAPIView):
         "statusCode": 201,
         "data": {
             "id": "uuid",
-            "tracking_id": "RET-ABC12345",
+            "tracking_id": "RET-0000000422",
             "outgoing_status": "Return",
             "package_type": "Outgoing",
             "shipment_status": "Shipment-Created",
@@ -690,7 +1054,7 @@ class ReturnPackageAPIView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class OutgoingPackagesAPIView(generics.ListAPIView):
+class OutgoingPackagesAPIView(QueryPlanViewMixin, generics.ListAPIView):
     '''
     Get: List all outgoing packages (includes both Send and Return packages)
     
@@ -707,7 +1071,7 @@ class OutgoingPackagesAPIView(generics.ListAPIView):
     serializer_class = OutgoingPackageSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PackageSearchFilter, filters.OrderingFilter]
     search_fields = ['tracking_id', 'service_provider', 'outgoing_status', 'merchant_name']
     ordering_fields = ['tracking_id', 'created_at', 'last_update', 'shipment_status']
     ordering = ['-created_at']
@@ -741,6 +1105,8 @@ class OutgoingPackagesAPIView(generics.ListAPIView):
                 type=openapi.TYPE_STRING,
                 enum=Package.OutgoingStatus.choices
             ),
+            *pagination_parameters,
+            *sparse_fieldset_parameters,
         ],
         responses={
             200: create_success_response(
@@ -753,13 +1119,7 @@ class OutgoingPackagesAPIView(generics.ListAPIView):
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(data),
             "message": "List Packages"
         })
     
@@ -781,7 +1141,7 @@ class OutgoingPackagesAPIView(generics.ListAPIView):
         })
 
 
-class DeliveredPackagesAPIView(generics.ListAPIView):
+class DeliveredPackagesAPIView(QueryPlanViewMixin, generics.ListAPIView):
     '''
     Get: List all delivered packages
     '''
@@ -789,7 +1149,7 @@ class DeliveredPackagesAPIView(generics.ListAPIView):
     serializer_class = PackageSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PackageSearchFilter, filters.OrderingFilter]
     search_fields = ['tracking_id', 'merchant_name', 'service_provider', 'driver_name']
     ordering_fields = ['tracking_id', 'merchant_name', 'service_provider', 'driver_name', 'created_at', 'last_update']
     ordering = ['-created_at']
@@ -798,13 +1158,7 @@ class DeliveredPackagesAPIView(generics.ListAPIView):
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(data),
             "message": "Delivered packages"
         })
 
@@ -812,6 +1166,7 @@ class DeliveredPackagesAPIView(generics.ListAPIView):
         operation_summary="[Package] List delivered packages",
         operation_description="Retrieve a paginated list of all delivered packages",
         tags=["Package"],
+        manual_parameters=[*pagination_parameters, *sparse_fieldset_parameters],
         responses={
             200: create_success_response(
                 get_serializer_schema(PackageSerializer, many=True),
@@ -823,13 +1178,7 @@ class DeliveredPackagesAPIView(generics.ListAPIView):
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(data),
             "message": "Delivered packages"
         })
 
@@ -851,7 +1200,7 @@ class DeliveredPackagesAPIView(generics.ListAPIView):
         })
 
 
-class IncomingPackagesAPIView(generics.ListAPIView):
+class IncomingPackagesAPIView(QueryPlanViewMixin, generics.ListAPIView):
     '''
     Get: List all incoming packages
     '''
@@ -859,7 +1208,7 @@ class IncomingPackagesAPIView(generics.ListAPIView):
     serializer_class = PackageSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PackageSearchFilter, filters.OrderingFilter]
     search_fields = ['tracking_id', 'merchant_name', 'service_provider', 'driver_name', 'city']
     ordering_fields = ['tracking_id', 'merchant_name', 'service_provider', 'driver_name', 'city', 'created_at', 'last_update']
     ordering = ['-created_at']
@@ -868,6 +1217,7 @@ class IncomingPackagesAPIView(generics.ListAPIView):
         operation_summary="[Package] List incoming packages",
         operation_description="Retrieve a paginated list of all incoming packages",
         tags=["Package"],
+        manual_parameters=[*pagination_parameters, *sparse_fieldset_parameters],
         responses={
             200: create_success_response(
                 get_serializer_schema(PackageSerializer, many=True),
@@ -879,13 +1229,7 @@ class IncomingPackagesAPIView(generics.ListAPIView):
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(data),
             "message": "Incoming packages"
         })
 
@@ -0,0 +1,285 @@
+"""
+Atomic redemption of access QR codes.
+
+redeem_access_token() grants a user access in one transaction of two
+statements:
+
+1. UPDATE ... SET current_users = current_users + 1 (and status Expired
+   when that fills the code) for the code with this token, only if it is
+   active, not expired and not full, RETURNING the code and its Qbox
+   (joined with UPDATE ... FROM). The row lock taken by the UPDATE
+   serialises concurrent scans of one code, and the condition is re-checked
+   after waiting for it, so current_users never passes max_users.
+2. INSERT the QboxAccessUser. The (qr_code, user_identifier) unique
+   constraint rejects a user who already redeemed the code; the transaction
+   is then rolled back, undoing the increment.
+
+The single-statement UPDATE ... FROM ... RETURNING needs PostgreSQL (other
+databases cannot return the joined Qbox columns). Elsewhere the same
+conditional UPDATE is issued through the ORM and the claimed code is read
+back in the same transaction, which keeps the guarantees for one extra
+query.
+
+Only when the UPDATE matches nothing is the code read again, to tell an
+unknown token from an expired or full code or a returning user. Signed
+tokens (see tokens.py) are checked first, so forged and expired ones are
+rejected without a query.
+
+reconcile_offline_redemptions() records the redemptions a box admitted while
+it could not reach the backend, after checking them against the signed
+token claims and the code's current state, and recounts current_users.
+Online redemption attempts are logged by the redeem view, reconciled grants
+here, both through access_log.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .access_log import record_access
+from .models import Qbox, QboxAccessEvent, QboxAccessQRCode, QboxAccessUser
+from .tokens import ExpiredAccessToken, InvalidAccessToken, is_signed_token, verify_access_token
+
+
+class Redemption:
+    GRANTED = "granted"
+    ALREADY_GRANTED = "already_granted"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    FULL = "full"
+
+    __slots__ = ("outcome", "qr_code")
+
+    def __init__(self, outcome, qr_code=None):
+        self.outcome = outcome
+        # QboxAccessQRCode with qbox loaded, or None for INVALID
+        self.qr_code = qr_code
+
+
+RETURNED_FIELDS = ("id", "location", "address", "expires_at", "max_users", "current_users", "status")
+
+
+def _claim_sql():
+    quote = connection.ops.quote_name
+    qr_table, qbox_table = quote(QboxAccessQRCode._meta.db_table), quote(Qbox._meta.db_table)
+
+    def column(name, model=QboxAccessQRCode):
+        table = qbox_table if model is Qbox else qr_table
+        return f"{table}.{quote(model._meta.get_field(name).column)}"
+
+    returning = [column(name) for name in RETURNED_FIELDS] + [column("id", Qbox), column("qbox_id", Qbox)]
+    return (
+        f"UPDATE {qr_table} SET "
+        f"{quote('current_users')} = {column('current_users')} + 1, "
+        # The redemption that uses the last slot expires the code
+        f"{quote('status')} = CASE WHEN {column('current_users')} + 1 >= {column('max_users')} "
+        f"THEN %s ELSE {column('status')} END, "
+        f"{quote('updated_at')} = %s "
+        f"FROM {qbox_table} "
+        f"WHERE {column('qbox')} = {column('id', Qbox)} "
+        f"AND {column('access_token')} = %s "
+        f"AND {column('is_active')} "
+        f"AND ({column('expires_at')} IS NULL OR {column('expires_at')} > %s) "
+        f"AND {column('current_users')} < {column('max_users')} "
+        f"RETURNING {', '.join(returning)}"
+    )
+
+
+def _claim(access_token, now):
+    """Increment current_users of a redeemable code; return it, or None."""
+    if connection.vendor != "postgresql":
+        return _claim_orm(access_token, now)
+    now = QboxAccessQRCode._meta.get_field("expires_at").get_db_prep_value(now, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(_claim_sql(), [QboxAccessQRCode.Status.EXPIRED, now, access_token, now])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    values = dict(zip(RETURNED_FIELDS, row))
+    values["id"] = QboxAccessQRCode._meta.pk.to_python(values["id"])
+    qr_code = QboxAccessQRCode(access_token=access_token, **values)
+    qr_code.qbox = Qbox(id=Qbox._meta.pk.to_python(row[-2]), qbox_id=row[-1])
+    return qr_code
+
+
+def _claim_orm(access_token, now):
+    """_claim() for databases without UPDATE ... FROM ... RETURNING."""
+    claimed = (
+        QboxAccessQRCode.objects
+        .filter(access_token=access_token, is_active=True, current_users__lt=F("max_users"))
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        .update(
+            current_users=F("current_users") + 1,
+            status=Case(
+                When(current_users__gte=F("max_users") - 1, then=Value(QboxAccessQRCode.Status.EXPIRED)),
+                default=F("status"),
+            ),
+            updated_at=now,
+        )
+    )
+    if not claimed:
+        return None
+    return (
+        QboxAccessQRCode.objects.select_related("qbox")
+        .only(*RETURNED_FIELDS, "access_token", "qbox__id", "qbox__qbox_id")
+        .get(access_token=access_token)
+    )
+
+
+def _reason(access_token, user_identifier, now):
+    """Why a code could not be claimed (the slow path)."""
+    qr_code = (
+        QboxAccessQRCode.objects.select_related("qbox")
+        .only(
+            "id", "location", "address", "expires_at", "max_users", "current_users",
+            "is_active", "qbox__id", "qbox__qbox_id",
+        )
+        .filter(access_token=access_token)
+        .first()
+    )
+    if qr_code is None:
+        return Redemption(Redemption.INVALID)
+    if not qr_code.is_active or (qr_code.expires_at and qr_code.expires_at <= now):
+        return Redemption(Redemption.EXPIRED, qr_code)
+    if QboxAccessUser.objects.filter(qr_code=qr_code, user_identifier=user_identifier).exists():
+        return Redemption(Redemption.ALREADY_GRANTED, qr_code)
+    return Redemption(Redemption.FULL, qr_code)
+
+
+def redeem_access_token(access_token, user_identifier, user_name=""):
+    """Grant user_identifier access through the code with access_token."""
+    now = timezone.now()
+    if is_signed_token(access_token):
+        try:
+            verify_access_token(access_token, now)
+        except ExpiredAccessToken:
+            return Redemption(Redemption.EXPIRED)
+        except InvalidAccessToken:
+            return Redemption(Redemption.INVALID)
+
+    qr_code = None
+    try:
+        with transaction.atomic():
+            qr_code = _claim(access_token, now)
+            if qr_code is None:
+                return _reason(access_token, user_identifier, now)
+            QboxAccessUser.objects.create(
+                qr_code=qr_code,
+                user_identifier=user_identifier,
+                user_name=user_name,
+                access_type="qr_code",
+            )
+    except IntegrityError:
+        if qr_code is None:
+            raise
+        # Already redeemed by this user; the increment was rolled back
+        qr_code.current_users -= 1
+        return Redemption(Redemption.ALREADY_GRANTED, qr_code)
+    return Redemption(Redemption.GRANTED, qr_code)
+
+
+def _offline_claims(qbox, access_token):
+    """Claims of a signed token issued for qbox, or None for any other token."""
+    if not is_signed_token(access_token):
+        # Random tokens can only be redeemed online
+        return None
+    try:
+        # Expired is fine as long as the redemption happened before it
+        claims = verify_access_token(access_token, allow_expired=True)
+    except InvalidAccessToken:
+        return None
+    return claims if claims.qbox_id == qbox.qbox_id else None
+
+
+def _redeemed_in_time(entry, claims, now):
+    redeemed_at = entry["redeemed_at"]
+    if redeemed_at > now:
+        return False
+    return claims.expires_at is None or redeemed_at <= claims.expires_at
+
+
+def reconcile_offline_redemptions(qbox, entries):
+    """
+    Record redemptions the authenticated box admitted offline: a list of
+    {"access_token", "user_identifier", "user_name", "redeemed_at"}.
+
+    Only signed tokens issued for this box count, and only redemptions made
+    before the token's expiry (and not in the future). The code's current
+    state is then checked too: it must still be active, the redemption must
+    fall before its expires_at, and at most max_users users are recorded,
+    earliest redemptions first. Users already recorded are skipped.
+    current_users of the affected codes is recounted and new grants go to
+    the access log. Return (entries accepted, users newly recorded).
+    """
+    now = timezone.now()
+    claims = {
+        access_token: _offline_claims(qbox, access_token)
+        for access_token in {entry["access_token"] for entry in entries}
+    }
+    candidates = [
+        entry for entry in entries
+        if claims[entry["access_token"]] is not None
+        and _redeemed_in_time(entry, claims[entry["access_token"]], now)
+    ]
+    if not candidates:
+        return 0, 0
+
+    with transaction.atomic():
+        # Lock the codes so online redemptions and this recount do not race
+        codes = {
+            qr_code.access_token: qr_code
+            for qr_code in QboxAccessQRCode.objects.select_for_update()
+            .filter(qbox=qbox, access_token__in={entry["access_token"] for entry in candidates})
+            .only("id", "access_token", "is_active", "expires_at", "max_users")
+            .order_by("pk")
+        }
+        accepted = [
+            entry for entry in candidates
+            if entry["access_token"] in codes
+            and codes[entry["access_token"]].is_active
+            and (codes[entry["access_token"]].expires_at is None
+                 or entry["redeemed_at"] <= codes[entry["access_token"]].expires_at)
+        ]
+        if not accepted:
+            return 0, 0
+        qr_code_ids = {qr_code.pk for qr_code in codes.values()}
+
+        seen = set(
+            QboxAccessUser.objects.filter(qr_code_id__in=qr_code_ids)
+            .values_list("qr_code_id", "user_identifier")
+        )
+        users = Counter(qr_code_id for qr_code_id, _ in seen)
+        access_users, granted = [], []
+        for entry in sorted(accepted, key=lambda entry: entry["redeemed_at"]):
+            qr_code = codes[entry["access_token"]]
+            key = (qr_code.pk, entry["user_identifier"])
+            if key in seen or users[qr_code.pk] >= qr_code.max_users:
+                continue
+            seen.add(key)
+            users[qr_code.pk] += 1
+            access_users.append(QboxAccessUser(
+                qr_code=qr_code,
+                user_identifier=entry["user_identifier"],
+                user_name=entry.get("user_name", ""),
+                access_type="offline",
+            ))
+            granted.append((qr_code.pk, entry["user_identifier"]))
+        QboxAccessUser.objects.bulk_create(access_users)
+
+        counts = (
+            QboxAccessUser.objects.filter(qr_code=OuterRef("pk"))
+            .order_by().values("qr_code").annotate(count=Count("id")).values("count")
+        )
+        QboxAccessQRCode.objects.filter(pk__in=qr_code_ids).update(
+            current_users=Coalesce(Subquery(counts), 0),
+            updated_at=now,
+        )
+        QboxAccessQRCode.objects.filter(
+            pk__in=qr_code_ids, status=QboxAccessQRCode.Status.ACTIVE, current_users__gte=F("max_users")
+        ).update(status=QboxAccessQRCode.Status.EXPIRED, updated_at=now)
+
+    for qr_code_id, user_identifier in granted:
+        record_access(qbox.pk, qr_code_id, user_identifier, QboxAccessEvent.Outcome.GRANTED, access_type="offline")
+    return len(accepted), len(access_users)
@@ -0,0 +1,194 @@
+"""
+Append-only QR access log with daily per-box rollups.
+
+record_access() buffers one QboxAccessEvent in process. A flusher thread
+(core.buffering) writes the buffer every QBOX_ACCESS_LOG_FLUSH_INTERVAL seconds, or as soon
+as QBOX_ACCESS_LOG_MAX_BUFFER events are pending. A flush is one
+transaction with one bulk INSERT for the events and one counter update per
+(qbox, day) in QboxAccessDailyRollup. Events still buffered when a process
+dies are lost, and so are their rollup counts.
+
+On PostgreSQL the event table is partitioned by month on accessed_at (see
+migration 0009). maintain_access_log() creates the partitions for the
+coming months, moving rows of those months out of the default partition,
+and drops those older than QBOX_ACCESS_LOG_RETENTION_MONTHS.
+Other databases get a plain table, and old rows are deleted instead.
+Rollups are kept.
+"""
+import re
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.buffering import WriteBehindBuffer
+from .models import QboxAccessDailyRollup, QboxAccessEvent
+
+ROLLUP_FIELDS = {
+    QboxAccessEvent.Outcome.GRANTED: "granted",
+    QboxAccessEvent.Outcome.ALREADY_GRANTED: "already_granted",
+    QboxAccessEvent.Outcome.DENIED: "denied",
+}
+
+
+class AccessLogBuffer(WriteBehindBuffer):
+    name = "Qbox access log"
+    thread_name = "qbox-access-log-flusher"
+    interval_setting = "QBOX_ACCESS_LOG_FLUSH_INTERVAL"
+    max_buffer_setting = "QBOX_ACCESS_LOG_MAX_BUFFER"
+
+    def new_pending(self):
+        return []
+
+    def buffer(self, pending, event):
+        pending.append(event)
+
+    def write(self, events):
+        """Write buffered events and their rollup counts; return how many."""
+        deltas = Counter()
+        for event in events:
+            if event.qbox_id is not None:
+                day = timezone.localdate(event.accessed_at)
+                deltas[(event.qbox_id, day, ROLLUP_FIELDS[event.outcome])] += 1
+        with transaction.atomic():
+            QboxAccessEvent.objects.bulk_create(events)
+            apply_rollup_deltas(deltas)
+        return len(events)
+
+
+def apply_rollup_deltas(deltas):
+    """Add {(qbox_id, day, field): delta} to the daily rollups."""
+    for (qbox_id, day, field), delta in deltas.items():
+        lookup = {"qbox_id": qbox_id, "day": day}
+        if QboxAccessDailyRollup.objects.filter(**lookup).update(**{field: F(field) + delta}):
+            continue
+        try:
+            with transaction.atomic():
+                QboxAccessDailyRollup.objects.create(**{field: delta}, **lookup)
+        except IntegrityError:
+            # Another flush created the row first
+            QboxAccessDailyRollup.objects.filter(**lookup).update(**{field: F(field) + delta})
+
+
+access_log_buffer = AccessLogBuffer()
+
+
+def record_access(qbox_id, qr_code_id, user_identifier, outcome, access_type="qr_code"):
+    """Log one redemption attempt; written by the next flush."""
+    access_log_buffer.add(QboxAccessEvent(
+        qbox_id=qbox_id,
+        qr_code_id=qr_code_id,
+        user_identifier=user_identifier[:200],
+        outcome=outcome,
+        access_type=access_type,
+        accessed_at=timezone.now(),
+    ))
+
+
+# ==================== Partitions and retention ====================
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def retention_cutoff(months=None):
+    """First day of the oldest month kept."""
+    if months is None:
+        months = getattr(settings, "QBOX_ACCESS_LOG_RETENTION_MONTHS", 12)
+    month = _month_start(timezone.now().date())
+    for _ in range(months):
+        month = _month_start(month - timedelta(days=1))
+    return month
+
+
+def _partitions(cursor, table):
+    """{month: partition name} of the monthly partitions of table."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s",
+        [table],
+    )
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})(\d{{2}})$")
+    months = {}
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+
+def _create_partition(cursor, table, name, month):
+    """
+    Create the partition of table for month. PostgreSQL refuses while the
+    default partition holds rows of that month, so those are moved into the
+    new partition (the caller's transaction keeps this atomic).
+    """
+    quote = connection.ops.quote_name
+    default = quote(table + "_default")
+    bounds = [month.isoformat(), _next_month(month).isoformat()]
+    in_month = f"{quote('accessed_at')} >= %s AND {quote('accessed_at')} < %s"
+
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})", bounds)
+    (stranded,) = cursor.fetchone()
+    if stranded:
+        moved = quote(f"{name}_moved")
+        cursor.execute(f"CREATE TEMPORARY TABLE {moved} ON COMMIT DROP AS SELECT * FROM {default} WHERE {in_month}", bounds)
+        cursor.execute(f"DELETE FROM {default} WHERE {in_month}", bounds)
+    cursor.execute(
+        f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)",
+        bounds,
+    )
+    if stranded:
+        cursor.execute(f"INSERT INTO {quote(name)} SELECT * FROM {moved}")
+        cursor.execute(f"DROP TABLE {moved}")
+
+
+def maintain_access_log(months_ahead=None, retention_months=None):
+    """
+    Create missing monthly partitions up to months_ahead months from now and
+    drop (or, without partitioning, delete) events older than the retention.
+    Return (created partitions, dropped partitions, deleted rows).
+    """
+    if months_ahead is None:
+        months_ahead = getattr(settings, "QBOX_ACCESS_LOG_PARTITIONS_AHEAD", 3)
+    cutoff = retention_cutoff(retention_months)
+    table = QboxAccessEvent._meta.db_table
+    quote = connection.ops.quote_name
+
+    if connection.vendor != "postgresql":
+        deleted, _ = QboxAccessEvent.objects.filter(accessed_at__date__lt=cutoff).delete()
+        return [], [], deleted
+
+    created, dropped = [], []
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = _partitions(cursor, table)
+        # Partition bounds are UTC months (Django's database session time zone)
+        month = _month_start(timezone.now().date())
+        for _ in range(months_ahead + 1):
+            if month not in existing:
+                name = f"{table}_p{month:%Y%m}"
+                _create_partition(cursor, table, name, month)
+                created.append(name)
+            month = _next_month(month)
+
+        for month, name in sorted(existing.items()):
+            if _next_month(month) <= cutoff:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+                dropped.append(name)
+
+        # Stragglers that landed in the default partition
+        cursor.execute(
+            f"DELETE FROM {quote(table + '_default')} WHERE {quote('accessed_at')} < %s",
+            [cutoff.isoformat()],
+        )
+        deleted = cursor.rowcount
+    return created, dropped, deleted
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class QBoxConfig(AppConfig):
     name = 'q_box'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,37 @@
+"""
+Expiry sweeper for QboxAccessQRCode.status.
+
+Saves, redemptions (access.py) and manual toggles keep status up to date
+as they happen; the one change nothing writes is time passing expires_at.
+expire_qr_codes() moves Active codes past expires_at to Expired with bulk
+UPDATEs of QR_EXPIRY_SWEEP_BATCH_SIZE rows, found through the
+(status, expires_at) index. Run it periodically with the expire_qr_codes
+command; until the next sweep, get_status() reports such codes as Expired
+but SQL filters on status still see them as Active.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import QboxAccessQRCode
+
+
+def expire_qr_codes(now=None, batch_size=None):
+    """Mark Active codes with expires_at <= now as Expired; return how many."""
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, "QR_EXPIRY_SWEEP_BATCH_SIZE", 1000)
+    expired = 0
+    while True:
+        ids = list(
+            QboxAccessQRCode.objects.filter(
+                status=QboxAccessQRCode.Status.ACTIVE,
+                expires_at__lte=now,
+            )
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return expired
+        # Re-check status so codes changed since the SELECT are left alone
+        expired += QboxAccessQRCode.objects.filter(
+            pk__in=ids, status=QboxAccessQRCode.Status.ACTIVE
+        ).update(status=QboxAccessQRCode.Status.EXPIRED, updated_at=now)
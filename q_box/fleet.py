@@ -0,0 +1,78 @@
+"""
+Cached fleet health summary for Qbox devices.
+
+The status/camera counts come from one aggregate query over Qbox; the stale
+count ("no heartbeat for N minutes") is a range count on the last_online
+index. Results are cached for QBOX_FLEET_SUMMARY_TTL seconds per stale
+window. Qbox saves and deletes bump a version number in the cache, which
+invalidates every cached window at once (see signals.py). Heartbeat flushes
+do not, since they run every few seconds; the short TTL bounds how far
+last_online-based counts can lag.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Qbox
+
+VERSION_CACHE_KEY = "qbox:fleet_summary:version"
+
+
+def _summary_cache_key(stale_minutes):
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+    return f"qbox:fleet_summary:{version}:{stale_minutes}"
+
+
+def compute_fleet_summary(stale_minutes):
+    counts = Qbox.objects.order_by().aggregate(
+        total=Count("pk"),
+        online=Count("pk", filter=Q(status=Qbox.Status.ONLINE)),
+        offline=Count("pk", filter=Q(status=Qbox.Status.OFFLINE)),
+        error=Count("pk", filter=Q(status=Qbox.Status.ERROR)),
+        camera_not_working=Count("pk", filter=Q(camera_status=Qbox.CameraStatus.NOT_WORKING)),
+        never_online=Count("pk", filter=Q(last_online__isnull=True)),
+    )
+    stale_since = timezone.now() - timedelta(minutes=stale_minutes)
+    return {
+        "total": counts["total"],
+        "byStatus": {
+            Qbox.Status.ONLINE: counts["online"],
+            Qbox.Status.OFFLINE: counts["offline"],
+            Qbox.Status.ERROR: counts["error"],
+        },
+        "cameraNotWorking": counts["camera_not_working"],
+        "neverOnline": counts["never_online"],
+        "stale": Qbox.objects.filter(last_online__lt=stale_since).count(),
+        "staleMinutes": stale_minutes,
+        "staleSince": stale_since,
+        "generatedAt": timezone.now(),
+    }
+
+
+def get_fleet_summary(stale_minutes=None):
+    """Return the cached summary for the stale window, computing it on a miss."""
+    if stale_minutes is None:
+        stale_minutes = getattr(settings, "QBOX_STALE_MINUTES", 10)
+    key = _summary_cache_key(stale_minutes)
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_fleet_summary(stale_minutes)
+        cache.set(key, summary, getattr(settings, "QBOX_FLEET_SUMMARY_TTL", 30))
+    return summary
+
+
+def invalidate_fleet_summary():
+    """Drop every cached summary once the current transaction commits."""
+    transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        # Key expired or never set
+        cache.set(VERSION_CACHE_KEY, 1, None)
@@ -0,0 +1,88 @@
+"""
+Write-behind buffer for Qbox device heartbeats.
+
+Heartbeats are merged per device in an in-process buffer (newer values win)
+and written by a flusher thread (core.buffering) every
+QBOX_HEARTBEAT_FLUSH_INTERVAL seconds, or as soon as QBOX_HEARTBEAT_MAX_BUFFER
+devices are pending. A flush costs one
+lookup of the device ids plus one bulk_update per set of reported fields, so
+a box that pings many times between flushes is written once.
+
+Each worker process has its own buffer and flushes it on its own schedule,
+so a flush may carry heartbeats older than a row already written by another
+worker: every value is only written if the row's last_online is not newer
+than the heartbeat's. A flush that fails puts its heartbeats back into the
+buffer (under any newer ones) for the next attempt. Heartbeats still
+buffered when a process dies are lost; the next ping of the box brings its
+row up to date. bulk_update() sends no signals and leaves updated_at alone.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+
+from core.buffering import WriteBehindBuffer
+from .models import Qbox
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_FIELDS = ("status", "led_indicator", "camera_status", "last_online")
+
+
+class HeartbeatBuffer(WriteBehindBuffer):
+    name = "Qbox heartbeat buffer"
+    thread_name = "qbox-heartbeat-flusher"
+    interval_setting = "QBOX_HEARTBEAT_FLUSH_INTERVAL"
+    max_buffer_setting = "QBOX_HEARTBEAT_MAX_BUFFER"
+    default_max_buffer = 5000
+
+    def new_pending(self):
+        return {}
+
+    def buffer(self, pending, qbox_id, values):
+        """Merge {field: value} for the device with this qbox_id."""
+        pending.setdefault(qbox_id, {}).update(values)
+
+    def restore(self, pending, batch):
+        # Values buffered since the failed flush are newer and win
+        for qbox_id, values in batch.items():
+            pending[qbox_id] = {**values, **pending.get(qbox_id, {})}
+
+    def write(self, pending):
+        """Write buffered heartbeats; return the number of boxes updated."""
+        pks = dict(Qbox.objects.filter(qbox_id__in=pending).values_list("qbox_id", "pk"))
+        unknown = len(pending) - len(pks)
+        if unknown:
+            logger.warning("Dropped heartbeats of %d unknown Qbox ids", unknown)
+
+        # bulk_update writes the same columns for every object, so boxes are
+        # grouped by the fields they reported
+        groups = defaultdict(list)
+        for qbox_id, values in pending.items():
+            if qbox_id in pks:
+                groups[tuple(sorted(values))].append(Qbox(pk=pks[qbox_id], **_unless_newer(values)))
+
+        batch_size = getattr(settings, "QBOX_HEARTBEAT_BATCH_SIZE", 1000)
+        updated = 0
+        for fields, qboxes in groups.items():
+            updated += Qbox.objects.bulk_update(qboxes, fields, batch_size=batch_size)
+        return updated
+
+
+def _unless_newer(values):
+    """
+    Wrap each value in a CASE that keeps the current column when the row was
+    already written with a newer last_online (by another worker's flush).
+    """
+    last_online = values.get("last_online")
+    if last_online is None:
+        return values
+    older = Q(last_online__isnull=True) | Q(last_online__lte=last_online)
+    return {
+        field: Case(When(older, then=Value(value)), default=F(field))
+        for field, value in values.items()
+    }
+
+
+heartbeat_buffer = HeartbeatBuffer()
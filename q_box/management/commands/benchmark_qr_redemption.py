@@ -0,0 +1,71 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from q_box.access import Redemption, redeem_access_token
+from q_box.models import Qbox, QboxAccessQRCode, QboxAccessUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Redeem one throwaway QR code from many threads at once and check that "
+        "max_users holds and no user is recorded twice (PostgreSQL only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent redeemers (default: 16)")
+        parser.add_argument("--attempts", type=int, default=500, help="Total redemptions (default: 500)")
+        parser.add_argument("--users", type=int, default=100, help="Distinct user identifiers (default: 100)")
+        parser.add_argument("--max-users", type=int, default=50, help="max_users of the QR code (default: 50)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The redemption benchmark needs PostgreSQL (SQLite serialises all writers).")
+
+        qbox = Qbox.objects.create(qbox_id=f"BENCH-{uuid.uuid4().hex[:8].upper()}")
+        try:
+            qr_code = QboxAccessQRCode.objects.create(
+                qbox=qbox, name="Redemption benchmark", location="-", address="-",
+                max_users=options["max_users"], valid_duration=1,
+            )
+            users = [f"bench-user-{i}" for i in range(options["users"])]
+
+            def redeem(i):
+                try:
+                    return redeem_access_token(qr_code.access_token, users[i % len(users)]).outcome
+                finally:
+                    connections.close_all()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                outcomes = Counter(pool.map(redeem, range(options["attempts"])))
+            elapsed = time.perf_counter() - started
+
+            qr_code.refresh_from_db(fields=["current_users"])
+            recorded = QboxAccessUser.objects.filter(qr_code=qr_code).count()
+            expected = min(options["max_users"], len(users), options["attempts"])
+
+            self.stdout.write(
+                f"{options['attempts']} redemptions on {options['threads']} threads in {elapsed:.2f}s "
+                f"({options['attempts'] / elapsed:.0f}/s, {elapsed / options['attempts'] * 1000:.2f} ms avg)"
+            )
+            for outcome, count in sorted(outcomes.items()):
+                self.stdout.write(f"  {outcome}: {count}")
+
+            problems = []
+            if qr_code.current_users != expected:
+                problems.append(f"current_users is {qr_code.current_users}, expected {expected}")
+            if recorded != qr_code.current_users:
+                problems.append(f"{recorded} access users recorded for current_users {qr_code.current_users}")
+            if outcomes[Redemption.GRANTED] != expected:
+                problems.append(f"{outcomes[Redemption.GRANTED]} grants, expected {expected}")
+            if problems:
+                raise CommandError("; ".join(problems))
+            self.stdout.write(self.style.SUCCESS(f"ok: {expected} grants, max_users held"))
+        finally:
+            # Cascades to the QR code and its access users
+            qbox.delete()
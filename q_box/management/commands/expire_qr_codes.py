@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from q_box.expiry import expire_qr_codes
+
+
+class Command(BaseCommand):
+    help = "Mark access QR codes whose expires_at has passed as Expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Codes updated per statement (default: QR_EXPIRY_SWEEP_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Keep running and sweep every this many seconds instead of once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_qr_codes(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} QR codes"))
+            if not options["interval"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from q_box.access_log import maintain_access_log, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming monthly partitions of the Qbox access log and drop "
+        "the ones past retention. Run it at least monthly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="Partitions to keep ready after the current month (default: QBOX_ACCESS_LOG_PARTITIONS_AHEAD)",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=None,
+            help="Full months of events to keep (default: QBOX_ACCESS_LOG_RETENTION_MONTHS)",
+        )
+
+    def handle(self, *args, **options):
+        created, dropped, deleted = maintain_access_log(options["months_ahead"], options["retention_months"])
+        for name in created:
+            self.stdout.write(f"created {name}")
+        for name in dropped:
+            self.stdout.write(f"dropped {name}")
+        cutoff = retention_cutoff(options["retention_months"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Access log kept from {cutoff.isoformat()}: {len(created)} partitions created, "
+            f"{len(dropped)} dropped, {deleted} old rows deleted"
+        ))
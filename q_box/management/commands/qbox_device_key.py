@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from q_box.device_auth import device_key
+from q_box.models import Qbox
+
+
+class Command(BaseCommand):
+    help = "Print the request signing key to provision on a Qbox (see q_box.device_auth)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("qbox_id", help="qbox_id of the box")
+
+    def handle(self, *args, **options):
+        if not Qbox.objects.filter(qbox_id=options["qbox_id"]).exists():
+            raise CommandError(f"No Qbox with qbox_id {options['qbox_id']}.")
+        self.stdout.write(device_key(options["qbox_id"]))
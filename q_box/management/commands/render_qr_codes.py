@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from q_box.models import QboxAccessQRCode
+from q_box.qr_rendering import render_qr_code
+
+
+class Command(BaseCommand):
+    help = "Render the images of QR codes that are still Pending or whose rendering Failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pending-only",
+            action="store_true",
+            help="Skip QR codes whose rendering Failed",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [QboxAccessQRCode.ImageStatus.PENDING]
+        if not options["pending_only"]:
+            statuses.append(QboxAccessQRCode.ImageStatus.FAILED)
+        ids = list(
+            QboxAccessQRCode.objects.filter(image_status__in=statuses)
+            .order_by("created_at")
+            .values_list("id", flat=True)
+        )
+        rendered = sum(render_qr_code(qr_code_id) for qr_code_id in ids)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} of {len(ids)} QR code images"))
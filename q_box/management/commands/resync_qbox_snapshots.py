@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from q_box.snapshots import resync_all_qbox_snapshots
+
+
+class Command(BaseCommand):
+    help = "Recompute the homeowner name/address snapshots of every Qbox and fix the stale ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Boxes checked per query and transaction (default: QBOX_SNAPSHOT_SYNC_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        checked, changed = resync_all_qbox_snapshots(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} Qboxes, updated {changed} snapshots"))
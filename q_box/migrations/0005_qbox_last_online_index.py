@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('q_box', '0004_alter_qboxaccessqrcode_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qbox',
+            index=models.Index(fields=['last_online'], name='qbox_last_online_idx'),
+        ),
+    ]
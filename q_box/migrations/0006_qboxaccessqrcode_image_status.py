@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+def mark_rendered_images_ready(apps, schema_editor):
+    QboxAccessQRCode = apps.get_model('q_box', 'QboxAccessQRCode')
+    QboxAccessQRCode.objects.exclude(qr_code_url="").update(image_status="Ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('q_box', '0005_qbox_last_online_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qboxaccessqrcode',
+            name='image_status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Ready', 'Ready'), ('Failed', 'Failed')], default='Pending', help_text='Whether the QR code image has been rendered (see q_box.qr_rendering)', max_length=10),
+        ),
+        migrations.RunPython(mark_rendered_images_ready, migrations.RunPython.noop),
+    ]
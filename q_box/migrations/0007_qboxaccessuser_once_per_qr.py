@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def drop_duplicate_access_users(apps, schema_editor):
+    # Keep the first access of every (qr_code, user_identifier), then recount
+    # current_users of the QR codes that lost rows
+    QboxAccessQRCode = apps.get_model('q_box', 'QboxAccessQRCode')
+    QboxAccessUser = apps.get_model('q_box', 'QboxAccessUser')
+    duplicates = (
+        QboxAccessUser.objects.order_by()
+        .values('qr_code_id', 'user_identifier')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+    )
+    affected = set()
+    for row in duplicates:
+        affected.add(row['qr_code_id'])
+        keep = (
+            QboxAccessUser.objects.filter(
+                qr_code_id=row['qr_code_id'], user_identifier=row['user_identifier']
+            )
+            .order_by('accessed_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        QboxAccessUser.objects.filter(
+            qr_code_id=row['qr_code_id'], user_identifier=row['user_identifier']
+        ).exclude(id=keep).delete()
+
+    remaining = (
+        QboxAccessUser.objects.filter(qr_code_id=OuterRef('pk'))
+        .order_by()
+        .values('qr_code_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    QboxAccessQRCode.objects.filter(pk__in=affected).update(
+        current_users=Coalesce(Subquery(remaining), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('q_box', '0006_qboxaccessqrcode_image_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_access_users, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='qboxaccessuser',
+            constraint=models.UniqueConstraint(fields=('qr_code', 'user_identifier'), name='qbox_access_user_once_per_qr'),
+        ),
+    ]
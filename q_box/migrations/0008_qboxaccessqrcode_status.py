@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:30
+
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+def set_expired_status(apps, schema_editor):
+    QboxAccessQRCode = apps.get_model('q_box', 'QboxAccessQRCode')
+    QboxAccessQRCode.objects.filter(
+        Q(is_active=False) | Q(expires_at__lte=timezone.now()) | Q(current_users__gte=F('max_users'))
+    ).update(status='Expired')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('q_box', '0007_qboxaccessuser_once_per_qr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qboxaccessqrcode',
+            name='status',
+            field=models.CharField(choices=[('Active', 'Active'), ('Expired', 'Expired')], default='Active', help_text='Persisted is_valid(): set on save, by redemptions and by the expiry sweeper (see q_box.expiry)', max_length=10),
+        ),
+        migrations.RunPython(set_expired_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='qboxaccessqrcode',
+            index=models.Index(fields=['status', '-created_at'], name='qr_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qboxaccessqrcode',
+            index=models.Index(fields=['status', 'expires_at'], name='qr_status_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:10
+
+import datetime
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def partition_access_events(apps, schema_editor):
+    """Recreate the event table as a monthly range-partitioned table (PostgreSQL only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    table = apps.get_model('q_box', 'QboxAccessEvent')._meta.db_table
+    schema_editor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(table + '_old')}")
+    schema_editor.execute(
+        f"CREATE TABLE {quote(table)} (LIKE {quote(table + '_old')} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({quote('accessed_at')})"
+    )
+    schema_editor.execute(f"DROP TABLE {quote(table + '_old')}")
+    schema_editor.execute(f"ALTER TABLE {quote(table)} ADD PRIMARY KEY ({quote('id')}, {quote('accessed_at')})")
+    schema_editor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT")
+
+    # This month and the next two; manage.py maintain_access_log keeps ahead
+    month = django.utils.timezone.now().date().replace(day=1)
+    for _ in range(3):
+        following = (month + datetime.timedelta(days=32)).replace(day=1)
+        schema_editor.execute(
+            f"CREATE TABLE {quote(f'{table}_p{month:%Y%m}')} PARTITION OF {quote(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [month.isoformat(), following.isoformat()],
+        )
+        month = following
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('q_box', '0008_qboxaccessqrcode_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QboxAccessEvent',
+            fields=[
+                ('pk', models.CompositePrimaryKey('id', 'accessed_at', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False)),
+                ('accessed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user_identifier', models.CharField(max_length=200)),
+                ('outcome', models.CharField(choices=[('granted', 'Granted'), ('already_granted', 'Already granted'), ('denied', 'Denied')], max_length=20)),
+                ('access_type', models.CharField(default='qr_code', max_length=50)),
+                ('qbox', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='q_box.qbox')),
+                ('qr_code', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='q_box.qboxaccessqrcode')),
+            ],
+            options={
+                'verbose_name': 'Qbox Access Event',
+                'verbose_name_plural': 'Qbox Access Events',
+            },
+        ),
+        # Indexes are added after partitioning so they are created on the
+        # partitioned table and inherited by every partition
+        migrations.RunPython(partition_access_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='qboxaccessevent',
+            index=models.Index(fields=['qbox', '-accessed_at'], name='qbox_access_event_qbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qboxaccessevent',
+            index=models.Index(fields=['qr_code', '-accessed_at'], name='qbox_access_event_qr_idx'),
+        ),
+        migrations.CreateModel(
+            name='QboxAccessDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('granted', models.IntegerField(default=0)),
+                ('already_granted', models.IntegerField(default=0)),
+                ('denied', models.IntegerField(default=0)),
+                ('qbox', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_rollups', to='q_box.qbox')),
+            ],
+            options={
+                'verbose_name': 'Qbox Access Daily Rollup',
+                'verbose_name_plural': 'Qbox Access Daily Rollups',
+                'constraints': [models.UniqueConstraint(fields=('qbox', 'day'), name='uniq_qbox_access_rollup_day')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='qboxaccessuser',
+            index=models.Index(fields=['qr_code', '-accessed_at', '-id'], name='qr_access_user_recent_idx'),
+        ),
+    ]
@@ -63,35 +63,37 @@ class Qbox(models.Model):
             return f"Qbox {self.qbox_id} — {self.homeowner.full_name}"
         return f"Qbox {self.qbox_id} — Unassigned"
 
+    SNAPSHOT_FIELDS = ('homeowner_name_snapshot', 'short_address_snapshot', 'city_snapshot')
+
+    @staticmethod
+    def snapshot_for(homeowner):
+        """
+        Snapshot field values for a homeowner (or None), as a dict.
+        Reads homeowner.address, so select_related('homeowner__address')
+        when computing snapshots for many boxes.
+        """
+        if not homeowner:
+            return dict.fromkeys(Qbox.SNAPSHOT_FIELDS, "")
+        address = homeowner.address
+        return {
+            'homeowner_name_snapshot': homeowner.full_name,
+            'short_address_snapshot': (
+                address.short_address or address.building_number or address.street or ""
+            ) if address else "",
+            'city_snapshot': (address.city or "") if address else "",
+        }
+
     def sync_with_homeowner(self, save=True):
         """
         Updates snapshot fields from the current homeowner.
-        Call this after assigning a homeowner or after homeowner profile changes.
+        Call this after assigning a homeowner; profile and address changes
+        are synced by q_box.snapshots.
         """
-        if self.homeowner:
-            self.homeowner_name_snapshot = self.homeowner.full_name
-            if self.homeowner.address:
-                self.short_address_snapshot = (
-                    self.homeowner.address.short_address
-                    or self.homeowner.address.building_number
-                    or self.homeowner.address.street
-                    or ""
-                )
-                self.city_snapshot = self.homeowner.address.city or ""
-            else:
-                self.short_address_snapshot = ""
-                self.city_snapshot = ""
-        else:
-            self.homeowner_name_snapshot = ""
-            self.short_address_snapshot = ""
-            self.city_snapshot = ""
+        for field, value in self.snapshot_for(self.homeowner).items():
+            setattr(self, field, value)
 
         if save:
-            self.save(update_fields=[
-                'homeowner_name_snapshot',
-                'short_address_snapshot',
-                'city_snapshot'
-            ])
+            self.save(update_fields=list(self.SNAPSHOT_FIELDS))
 
     class Meta:
         verbose_name = "Qbox Device"
@@ -100,6 +102,8 @@ class Qbox(models.Model):
         indexes = [
             models.Index(fields=['qbox_id']),
             models.Index(fields=['homeowner']),
+            # Stale-device counts in the fleet summary
+            models.Index(fields=['last_online'], name='qbox_last_online_idx'),
         ]
 
 
@@ -115,6 +119,11 @@ class QboxAccessQRCode(models.Model):
         ACTIVE = "Active", "Active"
         EXPIRED = "Expired", "Expired"
 
+    class ImageStatus(models.TextChoices):
+        PENDING = "Pending", "Pending"
+        READY = "Ready", "Ready"
+        FAILED = "Failed", "Failed"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     qbox = models.ForeignKey(
         Qbox,
@@ -189,11 +198,23 @@ class QboxAccessQRCode(models.Model):
         default="",
         help_text="URL to the generated QR code image"
     )
+    image_status = models.CharField(
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        help_text="Whether the QR code image has been rendered (see q_box.qr_rendering)"
+    )
     
     is_active = models.BooleanField(
         default=True,
         help_text="Whether this QR code is currently active (manually toggled)"
     )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.ACTIVE,
+        help_text="Persisted is_valid(): set on save, by redemptions and by the expiry sweeper (see q_box.expiry)"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -201,6 +222,8 @@ class QboxAccessQRCode(models.Model):
     def __str__(self):
         return f"{self.name} - {self.qbox.qbox_id}"
 
+    STATUS_SOURCE_FIELDS = frozenset({'is_active', 'expires_at', 'current_users', 'max_users'})
+
     def save(self, *args, **kwargs):
         # Generate access token if not set
         if not self.access_token:
@@ -209,13 +232,22 @@ class QboxAccessQRCode(models.Model):
         
         # Calculate expires_at based on duration
         if not self.expires_at:
-            if self.duration_type == self.DurationType.DAYS:
-                self.expires_at = timezone.now() + timezone.timedelta(days=self.valid_duration)
-            else:  # minutes
-                self.expires_at = timezone.now() + timezone.timedelta(minutes=self.valid_duration)
+            self.expires_at = self.default_expires_at()
+        
+        # Keep the persisted status in step with the fields it depends on
+        self.status = self.Status.ACTIVE if self.is_valid() else self.Status.EXPIRED
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.STATUS_SOURCE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'status'}
         
         super().save(*args, **kwargs)
 
+    def default_expires_at(self):
+        """Expiry from now according to duration_type and valid_duration"""
+        if self.duration_type == self.DurationType.DAYS:
+            return timezone.now() + timezone.timedelta(days=self.valid_duration)
+        return timezone.now() + timezone.timedelta(minutes=self.valid_duration)
+
     def is_valid(self):
         """Check if the QR code is still valid"""
         if not self.is_active:
@@ -236,7 +268,10 @@ class QboxAccessQRCode(models.Model):
     
     def get_status(self):
         """Get the current status of the QR code (Active/Expired)"""
-        return self.Status.ACTIVE if self.is_valid() else self.Status.EXPIRED
+        # Codes past expires_at stay Active in the table until the next sweep
+        if self.status == self.Status.ACTIVE and self.expires_at and timezone.now() > self.expires_at:
+            return self.Status.EXPIRED
+        return self.status
     
     def get_remaining_users(self):
         """Get remaining users that can use this QR code"""
@@ -264,6 +299,10 @@ class QboxAccessQRCode(models.Model):
             models.Index(fields=['qbox']),
             models.Index(fields=['access_token']),
             models.Index(fields=['expires_at']),
+            # History/list filtered by status, newest first
+            models.Index(fields=['status', '-created_at'], name='qr_status_created_idx'),
+            # Expiry sweeper: Active codes past expires_at
+            models.Index(fields=['status', 'expires_at'], name='qr_status_expires_idx'),
         ]
 
 
@@ -302,3 +341,87 @@ class QboxAccessUser(models.Model):
         verbose_name = "Qbox Access User"
         verbose_name_plural = "Qbox Access Users"
         ordering = ["-accessed_at"]
+        indexes = [
+            # Keyset pagination of a QR code's users, newest first
+            models.Index(fields=['qr_code', '-accessed_at', '-id'], name='qr_access_user_recent_idx'),
+        ]
+        constraints = [
+            # A user redeems a QR code once (see q_box.access)
+            models.UniqueConstraint(
+                fields=['qr_code', 'user_identifier'],
+                name='qbox_access_user_once_per_qr',
+            ),
+        ]
+
+
+class QboxAccessEvent(models.Model):
+    """
+    Append-only log of QR code scans, one row per redemption attempt.
+
+    Rows are written in batches by q_box.access_log and never updated. On
+    PostgreSQL the table is range-partitioned by month on accessed_at, so
+    retention drops whole partitions. qbox and qr_code are not database
+    foreign keys: the log outlives deleted boxes and codes.
+    """
+    class Outcome(models.TextChoices):
+        GRANTED = "granted", "Granted"
+        ALREADY_GRANTED = "already_granted", "Already granted"
+        DENIED = "denied", "Denied"
+
+    pk = models.CompositePrimaryKey("id", "accessed_at")
+    id = models.UUIDField(default=uuid.uuid4, editable=False)
+    accessed_at = models.DateTimeField(default=timezone.now)
+    qbox = models.ForeignKey(
+        Qbox,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    qr_code = models.ForeignKey(
+        QboxAccessQRCode,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    user_identifier = models.CharField(max_length=200)
+    outcome = models.CharField(max_length=20, choices=Outcome.choices)
+    access_type = models.CharField(max_length=50, default="qr_code")
+
+    def __str__(self):
+        return f"{self.user_identifier} - {self.outcome} at {self.accessed_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        verbose_name = "Qbox Access Event"
+        verbose_name_plural = "Qbox Access Events"
+        indexes = [
+            models.Index(fields=['qbox', '-accessed_at'], name='qbox_access_event_qbox_idx'),
+            models.Index(fields=['qr_code', '-accessed_at'], name='qbox_access_event_qr_idx'),
+        ]
+
+
+class QboxAccessDailyRollup(models.Model):
+    """
+    Access counts per (qbox, day), kept up to date by q_box.access_log as
+    events are flushed. Analytics read these instead of the event log.
+    """
+    qbox = models.ForeignKey(
+        Qbox,
+        on_delete=models.CASCADE,
+        related_name="access_rollups",
+    )
+    day = models.DateField()
+    granted = models.IntegerField(default=0)
+    already_granted = models.IntegerField(default=0)
+    denied = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.qbox_id} / {self.day}: {self.granted} granted, {self.denied} denied"
+
+    class Meta:
+        verbose_name = "Qbox Access Daily Rollup"
+        verbose_name_plural = "Qbox Access Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['qbox', 'day'], name='uniq_qbox_access_rollup_day'),
+        ]
@@ -0,0 +1,69 @@
+"""
+Pure QR code rendering, run inside the worker processes of qr_rendering.
+
+This module must not import Django models: pool processes import it fresh
+(spawn/forkserver) without setting Django up.
+
+render_qr() draws a payload as PNG or SVG at roughly ``size`` pixels. PNGs
+use whole pixels per module, so they come out at most one module narrower
+than requested. SVGs are one <path> with a module-based viewBox, so they
+scale to any size without blurring and need no PIL to render.
+"""
+from io import BytesIO
+
+import qrcode
+
+BORDER = 4
+FORMATS = ("png", "svg")
+MIN_SIZE = 64
+MAX_SIZE = 1024
+
+
+def _make_qr(data):
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(data, size):
+    qr = _make_qr(data)
+    qr.box_size = max(1, size // (qr.modules_count + 2 * BORDER))
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def render_svg(data, size):
+    matrix = _make_qr(data).get_matrix()  # includes the border
+    width = len(matrix)
+    # One subpath per horizontal run of dark modules
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < width:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < width and row[x]:
+                x += 1
+            runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {width} {width}" shape-rendering="crispEdges">'
+        f'<rect width="{width}" height="{width}" fill="#fff"/>'
+        f'<path d="{"".join(runs)}" fill="#000"/></svg>'
+    ).encode()
+
+
+def render_qr(data, fmt="png", size=300):
+    """Return the bytes of a QR code encoding the string data."""
+    if fmt == "svg":
+        return render_svg(data, size)
+    return render_png(data, size)
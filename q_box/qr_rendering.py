@@ -0,0 +1,201 @@
+"""
+Background rendering of QboxAccessQRCode images.
+
+Creating a QR code only stores the row with image_status Pending and calls
+enqueue_qr_render(), which schedules the job once the transaction commits.
+A job runs on a small thread pool: it loads the row, renders the PNG in a
+process pool (qrcode/PIL are CPU bound and would hold the GIL), saves the
+file to storage and marks the row Ready, or Failed if anything raises.
+
+Serializers never render; they return qr_code_url, which stays empty until
+the image is Ready. QR_RENDER_WORKERS sets the size of both pools; 0 renders
+in the job thread instead of a process pool. Jobs still queued when a process
+exits are lost and the rows stay Pending; the render_qr_codes command renders
+Pending and Failed rows.
+
+Rendered images are cached by payload: each (payload, format, size) variant
+is stored once under qrcodes/cache/ with the sha256 of the payload in its
+name, and its name/URL is remembered in the Django cache, so a variant is
+rendered at most once and then only looked up. The payload is the short
+string from qr_payload(), not the QR code's display data.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .models import QboxAccessQRCode
+from .qr_images import render_qr
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = "qrcodes/cache"
+
+_lock = threading.Lock()
+_threads = None
+_processes = None
+_queued_variants = set()
+
+
+def _workers():
+    return getattr(settings, "QR_RENDER_WORKERS", 2)
+
+
+def _get_thread_pool():
+    global _threads
+    with _lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=max(1, _workers()), thread_name_prefix="qr-render")
+        return _threads
+
+
+def _get_process_pool():
+    global _processes
+    with _lock:
+        if _processes is None:
+            # Never fork: this process runs flusher and render threads whose
+            # locks a forked child would inherit. forkserver children start
+            # from a clean single-threaded server; qr_images needs no Django
+            _processes = ProcessPoolExecutor(
+                max_workers=_workers(), mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _processes
+
+
+def _reset_process_pool(broken):
+    global _processes
+    with _lock:
+        if _processes is broken:
+            _processes = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def qr_payload(qr_code):
+    """
+    The string encoded in the QR code image: the access token in
+    QR_PAYLOAD_TEMPLATE (e.g. "https://app.example.com/qr/{token}"). The
+    scanning app redeems the token; the display data comes from the API.
+    """
+    template = getattr(settings, "QR_PAYLOAD_TEMPLATE", "{token}")
+    return template.format(token=qr_code.access_token)
+
+
+def default_image_size():
+    return getattr(settings, "QR_IMAGE_DEFAULT_SIZE", 300)
+
+
+def _variant(payload, fmt, size):
+    """(storage name, cache key) of a rendered variant."""
+    digest = hashlib.sha256(payload.encode()).hexdigest()[:32]
+    return f"{IMAGE_CACHE_DIR}/{digest}-{size}.{fmt}", f"qr_image:{digest}:{size}:{fmt}"
+
+
+def get_cached_image(payload, fmt, size):
+    """(name, url) of a rendered variant, or None if it was never rendered."""
+    name, key = _variant(payload, fmt, size)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    if not default_storage.exists(name):
+        return None
+    cached = (name, default_storage.url(name))
+    cache.set(key, cached, getattr(settings, "QR_IMAGE_CACHE_TIMEOUT", 86400))
+    return cached
+
+
+def render_image(data, fmt, size):
+    """
+    Render PNGs in the process pool (or inline when QR_RENDER_WORKERS is 0).
+    SVGs are only string building and are rendered inline.
+    """
+    if fmt == "svg" or _workers() <= 0:
+        return render_qr(data, fmt, size)
+    pool = _get_process_pool()
+    try:
+        return pool.submit(render_qr, data, fmt, size).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM killed); start a fresh pool for the next job
+        _reset_process_pool(pool)
+        raise
+
+
+def get_or_render_image(payload, fmt, size):
+    """(name, url) of a variant, rendering and storing it on a cache miss."""
+    cached = get_cached_image(payload, fmt, size)
+    if cached is not None:
+        return cached
+    name, key = _variant(payload, fmt, size)
+    content = render_image(payload, fmt, size)
+    if not default_storage.exists(name):
+        # A concurrent render may have stored it first; keep that file
+        name = default_storage.save(name, ContentFile(content))
+    cached = (name, default_storage.url(name))
+    cache.set(key, cached, getattr(settings, "QR_IMAGE_CACHE_TIMEOUT", 86400))
+    return cached
+
+
+def render_qr_code(qr_code_id):
+    """Render and store the default image of one QR code; return True on success."""
+    try:
+        qr_code = QboxAccessQRCode.objects.get(pk=qr_code_id)
+    except QboxAccessQRCode.DoesNotExist:
+        return False
+
+    try:
+        name, url = get_or_render_image(qr_payload(qr_code), "png", default_image_size())
+    except Exception:
+        logger.exception("Rendering QR code %s failed", qr_code_id)
+        QboxAccessQRCode.objects.filter(pk=qr_code_id).update(
+            image_status=QboxAccessQRCode.ImageStatus.FAILED
+        )
+        return False
+
+    # update() instead of save() so concurrent edits of the row are kept
+    QboxAccessQRCode.objects.filter(pk=qr_code_id).update(
+        qr_code_image=name,
+        qr_code_url=url,
+        image_status=QboxAccessQRCode.ImageStatus.READY,
+    )
+    return True
+
+
+def _run(qr_code_id):
+    try:
+        render_qr_code(qr_code_id)
+    except Exception:
+        logger.exception("QR code render job %s failed", qr_code_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_qr_render(qr_code_id):
+    """Render the image in the background once the current transaction commits."""
+    transaction.on_commit(lambda: _get_thread_pool().submit(_run, qr_code_id))
+
+
+def _run_variant(payload, fmt, size):
+    try:
+        get_or_render_image(payload, fmt, size)
+    except Exception:
+        logger.exception("Rendering a %s QR image at %dpx failed", fmt, size)
+    finally:
+        with _lock:
+            _queued_variants.discard((payload, fmt, size))
+
+
+def enqueue_image_variant(payload, fmt, size):
+    """Render a variant in the background unless it is already queued."""
+    variant = (payload, fmt, size)
+    with _lock:
+        if variant in _queued_variants:
+            return
+        _queued_variants.add(variant)
+    _get_thread_pool().submit(_run_variant, payload, fmt, size)
@@ -1,12 +1,22 @@
+from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
+from core.mixins import SparseFieldsetSerializerMixin
 from .models import Qbox, QboxAccessQRCode, QboxAccessUser
-import qrcode
-from io import BytesIO
-from django.core.files import File
+from media.images import InvalidImage, decode_image, stored_url
+from .qr_rendering import enqueue_qr_render
+from .tokens import issue_access_token
 from django.conf import settings
 import requests
-class QboxSerializer(serializers.ModelSerializer):
+class QboxSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """
+    ``packages`` holds only the QBOX_RECENT_PACKAGES_LIMIT newest packages and
+    ``package_count`` the total (archived packages included); the full list
+    is served by ``qbox/<id>/packages``. Use setup_queryset() on list/detail
+    querysets so both come from one prefetch and one annotation.
+    """
     packages = serializers.SerializerMethodField()
+    package_count = serializers.SerializerMethodField()
     qbox_image_url = serializers.SerializerMethodField()
     
     class Meta:
@@ -16,13 +26,55 @@ class QboxSerializer(serializers.ModelSerializer):
             "short_address_snapshot", "city_snapshot", "status",
             "led_indicator", "camera_status", "last_online",
             "activation_date", "qbox_image", "qbox_image_url", "created_at", "updated_at",
-            "packages"
+            "packages", "package_count"
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
-    
+
+    @classmethod
+    def setup_queryset(cls, queryset, field_names=None, extra_columns=()):
+        """Prefetch the recent packages and annotate the package count."""
+        from packages.models import PackageCounter
+
+        if field_names is None or "packages" in field_names:
+            queryset = queryset.prefetch_related(
+                Prefetch("packages", queryset=cls.recent_packages_queryset(), to_attr="recent_packages")
+            )
+        if field_names is None or "package_count" in field_names:
+            queryset = queryset.annotate(package_total=Coalesce(
+                Subquery(
+                    PackageCounter.objects.filter(qbox=OuterRef("pk"))
+                    .order_by()
+                    .values("qbox")
+                    .annotate(total=Sum("count"))
+                    .values("total")
+                ),
+                0,
+            ))
+        return queryset
+
+    @staticmethod
+    def recent_packages_queryset(qbox=None):
+        from packages.models import Package
+        from packages.serializers import PackageSerializer
+
+        queryset = PackageSerializer.setup_queryset(Package.objects.all()).order_by("-created_at", "-id")
+        if qbox is not None:
+            queryset = queryset.filter(qbox=qbox)
+        return queryset[:settings.QBOX_RECENT_PACKAGES_LIMIT]
+
     def get_packages(self, obj):
         from packages.serializers import PackageSerializer
-        return PackageSerializer(obj.packages.all(), many=True).data
+        packages = getattr(obj, "recent_packages", None)
+        if packages is None:
+            packages = self.recent_packages_queryset(obj)
+        return PackageSerializer(packages, many=True).data
+
+    def get_package_count(self, obj):
+        from packages.models import PackageCounter
+        total = getattr(obj, "package_total", None)
+        if total is None:
+            total = PackageCounter.objects.filter(qbox=obj).aggregate(total=Sum("count"))["total"] or 0
+        return total
     
     def get_qbox_image_url(self, obj):
         """Return full working URL for the qbox image"""
@@ -52,14 +104,17 @@ class QboxSerializer(serializers.ModelSerializer):
      
                 return value
             elif value.startswith('data:image'):
-             
-                return value
+                # Checked here, stored as a file by create/update
+                try:
+                    return decode_image(value)
+                except InvalidImage as e:
+                    raise serializers.ValidationError(str(e))
         
         return value
     
     def create(self, validated_data):
         """Handle qbox_image URL/string upload"""
-        qbox_image = validated_data.pop('qbox_image', None)
+        qbox_image = stored_url(validated_data.pop('qbox_image', None))
         qbox = Qbox.objects.create(**validated_data)
         
         if qbox_image:
@@ -70,7 +125,7 @@ class QboxSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         """Handle qbox_image URL/string update"""
-        qbox_image = validated_data.pop('qbox_image', None)
+        qbox_image = stored_url(validated_data.pop('qbox_image', None))
         
         if qbox_image:
             instance.qbox_image = qbox_image
@@ -129,9 +184,11 @@ class QboxCreateSerializer(serializers.ModelSerializer):
                 # Store HTTP URLs directly
                 return value
             elif value.startswith('data:image'):
-                # Handle base64 data URI - return as-is for URLField storage
-                # This makes the image accessible as a data URL
-                return value
+                # Checked here, stored as a file by create/update
+                try:
+                    return decode_image(value)
+                except InvalidImage as e:
+                    raise serializers.ValidationError(str(e))
         
         return value
     
@@ -146,7 +203,7 @@ class QboxCreateSerializer(serializers.ModelSerializer):
             except CustomHomeOwner.DoesNotExist:
                 pass
         
-        qbox_image = validated_data.pop('qbox_image', None)
+        qbox_image = stored_url(validated_data.pop('qbox_image', None))
         qbox = Qbox.objects.create(homeowner=homeowner_obj, **validated_data)
         
         if qbox_image:
@@ -186,15 +243,17 @@ class QboxUpdateSerializer(serializers.ModelSerializer):
                 # Store HTTP URLs directly
                 return value
             elif value.startswith('data:image'):
-                # Handle base64 data URI - return as-is for URLField storage
-                # This makes the image accessible as a data URL
-                return value
+                # Checked here, stored as a file by create/update
+                try:
+                    return decode_image(value)
+                except InvalidImage as e:
+                    raise serializers.ValidationError(str(e))
         
         return value
     
     def update(self, instance, validated_data):
         old_homeowner = instance.homeowner
-        qbox_image = validated_data.pop('qbox_image', None)
+        qbox_image = stored_url(validated_data.pop('qbox_image', None))
         
         if qbox_image:
             instance.qbox_image = qbox_image
@@ -217,6 +276,25 @@ class QboxStatusUpdateSerializer(serializers.Serializer):
     is_active = serializers.BooleanField(required=True)
 
 
+class QboxHeartbeatSerializer(serializers.Serializer):
+    """
+    Device heartbeat. Devices may use the compact keys q/s/l/c instead of
+    qbox_id/status/led_indicator/camera_status and send only what changed;
+    last_online is set by the server.
+    """
+    COMPACT_KEYS = {"q": "qbox_id", "s": "status", "l": "led_indicator", "c": "camera_status"}
+
+    qbox_id = serializers.CharField(max_length=20, help_text="Unique device identifier of the QBox (compact key: q)")
+    status = serializers.ChoiceField(choices=Qbox.Status.choices, required=False, help_text="Compact key: s")
+    led_indicator = serializers.ChoiceField(choices=Qbox.LedIndicator.choices, required=False, help_text="Compact key: l")
+    camera_status = serializers.ChoiceField(choices=Qbox.CameraStatus.choices, required=False, help_text="Compact key: c")
+
+    def to_internal_value(self, data):
+        if hasattr(data, "items"):
+            data = {self.COMPACT_KEYS.get(key, key): value for key, value in data.items()}
+        return super().to_internal_value(data)
+
+
 class VerifyQboxIdSerializer(serializers.Serializer):
     qbox_id = serializers.CharField(required=False, max_length=20, help_text="Unique device identifier of the QBox")
     
@@ -256,59 +334,20 @@ class QboxAccessQRCodeCreateSerializer(serializers.Serializer):
         return attrs
 
     def create(self, validated_data):
-        import secrets
-        from io import BytesIO
-        from django.core.files import File
-        
         qbox = validated_data.pop('qbox')
         qbox_id = validated_data.pop('qbox_id')  # Remove qbox_id as it's not a model field
         
         # Homeowner is optional - only set if explicitly provided
         homeowner = None
         
-        # Generate unique access token
-        access_token = secrets.token_urlsafe(32)
-        
-        qr_code = QboxAccessQRCode.objects.create(
-            qbox=qbox,
-            homeowner=homeowner,
-            access_token=access_token,
-            **validated_data
-        )
-        
-        # Generate and save QR code image
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
-        # QR code data contains comprehensive information for display
-        qr_data = {
-            "qbox_id": qbox.qbox_id,
-            "qr_name": qr_code.name,
-            "location": qr_code.location,
-            "short_address": qbox.short_address_snapshot,
-            "city": qbox.city_snapshot,
-            "max_users": qr_code.max_users,
-            "valid_duration": f"{qr_code.valid_duration} {qr_code.duration_type}",
-            "qbox_image": qbox.qbox_image if qbox.qbox_image else None,
-            "expires_at": qr_code.expires_at.isoformat() if qr_code.expires_at else None
-        }
-        qr.add_data(str(qr_data))
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
+        qr_code = QboxAccessQRCode(qbox=qbox, homeowner=homeowner, **validated_data)
+        # Signed tokens carry the expiry, so it is fixed before the token is issued
+        qr_code.expires_at = qr_code.default_expires_at()
+        qr_code.access_token = issue_access_token(qr_code)
+        qr_code.save()
         
-        # Save QR code image to model
-        filename = f"qrcode_{qr_code.id}.png"
-        qr_code.qr_code_image.save(filename, File(buffer), save=True)
-        qr_code.qr_code_url = qr_code.qr_code_image.url
-        qr_code.save(update_fields=['qr_code_url'])
+        # The image is rendered in the background; the response reports it as Pending
+        enqueue_qr_render(qr_code.id)
         
         return qr_code
 
@@ -330,11 +369,11 @@ class QboxAccessQRCodeSerializer(serializers.ModelSerializer):
             "name", "location", "address",
             "max_users", "current_users", "remaining_users",
             "duration_type", "valid_duration", "expires_at",
-            "access_token", "qr_code_image",
+            "access_token", "qr_code_image", "image_status",
             "is_active", "status", "expiresIn",
             "created_at", "updated_at"
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "access_token"]
+        read_only_fields = ["id", "created_at", "updated_at", "access_token", "image_status"]
     
     def get_remaining_users(self, obj):
         return obj.max_users - obj.current_users
@@ -346,47 +385,8 @@ class QboxAccessQRCodeSerializer(serializers.ModelSerializer):
         return obj.get_expires_in()
     
     def get_qr_code_image(self, obj):
-        """Generate and return full QR code image URL"""
-        from django.conf import settings
-        
-        if obj.qr_code_url:
-            return obj.qr_code_url
-        
-        # Generate QR code image
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
-        # QR code data contains comprehensive information for display
-        qr_data = {
-            "qbox_id": obj.qbox.qbox_id,
-            "qr_name": obj.name,
-            "location": obj.location,
-            "short_address": obj.qbox.short_address_snapshot,
-            "city": obj.qbox.city_snapshot,
-            "max_users": obj.max_users,
-            "valid_duration": f"{obj.valid_duration} {obj.duration_type}",
-            "qbox_image": obj.qbox.qbox_image if obj.qbox.qbox_image else None,
-            "expires_at": obj.expires_at.isoformat() if obj.expires_at else None
-        }
-        qr.add_data(str(qr_data))
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Save to model
-        filename = f"qrcode_{obj.id}.png"
-        obj.qr_code_image.save(filename, File(buffer), save=True)
-        obj.qr_code_url = obj.qr_code_image.url
-        obj.save(update_fields=['qr_code_url', 'qr_code_image'])
-        
-        return obj.qr_code_url
+        """QR code image URL, or None while image_status is Pending/Failed"""
+        return obj.qr_code_url or None
 
 
 class QboxAccessQRCodeListSerializer(serializers.ModelSerializer):
@@ -478,14 +478,26 @@ class QboxAccessRequestSerializer(serializers.Serializer):
     Serializer for validating access requests via QR code
     """
     access_token = serializers.CharField(required=True, help_text="Access token from the QR code")
-    user_identifier = serializers.CharField(required=True, help_text="User identifier (email, phone, or custom ID)")
-    user_name = serializers.CharField(required=False, allow_blank=True, default="", help_text="User's name if provided")
+    user_identifier = serializers.CharField(required=True, max_length=200, help_text="User identifier (email, phone, or custom ID)")
+    user_name = serializers.CharField(required=False, allow_blank=True, max_length=200, default="", help_text="User's name if provided")
 
-    def validate_access_token(self, value):
-        try:
-            qr_code = QboxAccessQRCode.objects.get(access_token=value)
-            if not qr_code.is_valid():
-                raise serializers.ValidationError("This QR code has expired or reached maximum users")
-            return value
-        except QboxAccessQRCode.DoesNotExist:
-            raise serializers.ValidationError("Invalid QR code")
+
+class QboxOfflineRedemptionSerializer(serializers.Serializer):
+    access_token = serializers.CharField(max_length=500, help_text="Token of the QR code the box accepted")
+    user_identifier = serializers.CharField(max_length=200, help_text="User identifier (email, phone, or custom ID)")
+    user_name = serializers.CharField(required=False, allow_blank=True, max_length=200, default="", help_text="User's name if provided")
+    redeemed_at = serializers.DateTimeField(help_text="When the box admitted the user")
+
+
+class QboxOfflineRedemptionBatchSerializer(serializers.Serializer):
+    """
+    Redemptions a box admitted while offline, uploaded once it reconnects
+    in a request signed with its device key (see q_box.device_auth)
+    """
+    redemptions = QboxOfflineRedemptionSerializer(many=True, allow_empty=False)
+
+    def validate_redemptions(self, value):
+        limit = settings.QR_RECONCILE_MAX_ITEMS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} redemptions per request.")
+        return value
@@ -0,0 +1,55 @@
+"""
+Invalidate the cached fleet summary (see fleet.py) when a Qbox changes, and
+resync the homeowner snapshots (see snapshots.py) when an owner's profile or
+address changes.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from home_owner.models import CustomHomeOwner, CustomHomeOwnerAddress
+from .fleet import invalidate_fleet_summary
+from .models import Qbox
+from .snapshots import sync_homeowner_qboxes, sync_qbox_snapshots
+
+# CustomHomeOwner fields the snapshots are computed from
+SNAPSHOT_SOURCE_FIELDS = frozenset({"full_name", "address"})
+
+
+@receiver(post_save, sender=Qbox)
+@receiver(post_delete, sender=Qbox)
+def invalidate_fleet_summary_on_change(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_fleet_summary()
+
+
+@receiver(post_save, sender=CustomHomeOwner)
+def sync_snapshots_on_homeowner_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # New owners have no boxes yet; saves of unrelated fields (last_login,
+    # OTPs, ...) are skipped
+    if raw or created:
+        return
+    if update_fields is not None and not SNAPSHOT_SOURCE_FIELDS & set(update_fields):
+        return
+    sync_homeowner_qboxes([instance.pk])
+
+
+@receiver(post_save, sender=CustomHomeOwnerAddress)
+def sync_snapshots_on_address_save(sender, instance, created, raw=False, **kwargs):
+    # A new address only matters once an owner points to it, which saves the owner
+    if not raw and not created:
+        sync_qbox_snapshots(Qbox.objects.filter(homeowner__address=instance))
+
+
+@receiver(pre_delete, sender=CustomHomeOwnerAddress)
+def remember_address_owners(sender, instance, **kwargs):
+    # The owners' address column is cleared before post_delete runs
+    instance._snapshot_homeowner_ids = list(
+        CustomHomeOwner.objects.filter(address=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=CustomHomeOwnerAddress)
+def sync_snapshots_on_address_delete(sender, instance, **kwargs):
+    homeowner_ids = getattr(instance, "_snapshot_homeowner_ids", None)
+    if homeowner_ids:
+        sync_homeowner_qboxes(homeowner_ids)
@@ -0,0 +1,84 @@
+"""
+Keep the homeowner snapshot columns of Qbox in sync.
+
+Qbox copies the owner's name, short address and city into
+homeowner_name_snapshot, short_address_snapshot and city_snapshot so the
+box list can be searched and rendered without joining the owner tables.
+
+- sync_qbox_snapshots(queryset) recomputes the snapshots of the boxes in a
+  queryset from one query joining homeowner and address, and writes only the
+  boxes whose values changed with a single bulk_update.
+- signals.py calls it for all boxes of an owner when the CustomHomeOwner or
+  its CustomHomeOwnerAddress is saved or the address is deleted.
+- resync_all_qbox_snapshots() walks the whole fleet in primary-key batches
+  (the resync_qbox_snapshots command), which also repairs boxes whose owner
+  was deleted.
+
+bulk_update() sends no Qbox signals; updated_at is set explicitly.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Qbox
+
+
+def snapshot_queryset(queryset):
+    """queryset limited to the columns needed to compute snapshots."""
+    return queryset.select_related("homeowner__address").only(
+        "pk", *Qbox.SNAPSHOT_FIELDS,
+        "homeowner__full_name",
+        "homeowner__address__short_address",
+        "homeowner__address__building_number",
+        "homeowner__address__street",
+        "homeowner__address__city",
+    )
+
+
+def sync_qbox_snapshots(queryset):
+    """Resync the snapshots of every box in queryset; return how many changed."""
+    return _write_changed(snapshot_queryset(queryset))
+
+
+def sync_homeowner_qboxes(homeowner_ids):
+    """Resync the boxes owned by any of homeowner_ids."""
+    return sync_qbox_snapshots(Qbox.objects.filter(homeowner_id__in=homeowner_ids))
+
+
+def resync_all_qbox_snapshots(batch_size=None):
+    """
+    Resync every box, batch_size boxes per transaction. Batches follow the
+    primary key, so each one is a single indexed join query plus at most one
+    bulk_update. Return (checked, changed).
+    """
+    batch_size = batch_size or getattr(settings, "QBOX_SNAPSHOT_SYNC_BATCH_SIZE", 1000)
+    checked = changed = 0
+    last_pk = None
+    while True:
+        batch = snapshot_queryset(Qbox.objects.order_by("pk"))
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            qboxes = list(batch[:batch_size])
+            if not qboxes:
+                return checked, changed
+            changed += _write_changed(qboxes)
+        checked += len(qboxes)
+        last_pk = qboxes[-1].pk
+
+
+def _write_changed(qboxes):
+    """Recompute snapshots of loaded boxes and bulk_update the changed ones."""
+    changed = []
+    now = timezone.now()
+    for qbox in qboxes:
+        values = Qbox.snapshot_for(qbox.homeowner)
+        if all(getattr(qbox, field) == value for field, value in values.items()):
+            continue
+        for field, value in values.items():
+            setattr(qbox, field, value)
+        qbox.updated_at = now
+        changed.append(qbox)
+    if changed:
+        Qbox.objects.bulk_update(changed, [*Qbox.SNAPSHOT_FIELDS, "updated_at"])
+    return len(changed)
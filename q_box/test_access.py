@@ -0,0 +1,199 @@
+"""
+Database tests for q_box.access and q_box.access_log (run with
+``python manage.py test q_box``).
+
+Unlike tests.py these need no running server; they cover the claim on
+whichever database is configured.
+"""
+import json
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .access import Redemption, redeem_access_token
+from .access_log import _next_month, maintain_access_log
+from .device_auth import sign_request
+from .models import Qbox, QboxAccessEvent, QboxAccessQRCode, QboxAccessUser
+from .tokens import issue_access_token
+
+# Not reverse(): FORCE_SCRIPT_NAME prefixes it, but the test client does not strip it
+RECONCILE_URL = "/qbox/qr-codes/reconcile"
+
+
+class RedeemAccessTokenTests(TestCase):
+    def setUp(self):
+        self.qbox = Qbox.objects.create(qbox_id="QBOX-REDEEM")
+        self.qr_code = QboxAccessQRCode.objects.create(
+            qbox=self.qbox, name="Gate", location="Main Entrance", address="47B", max_users=2,
+        )
+
+    def redeem(self, user_identifier):
+        return redeem_access_token(self.qr_code.access_token, user_identifier, "Test User")
+
+    def test_granted(self):
+        redemption = self.redeem("a@example.com")
+
+        self.assertEqual(redemption.outcome, Redemption.GRANTED)
+        self.assertEqual(redemption.qr_code.pk, self.qr_code.pk)
+        self.assertEqual(redemption.qr_code.qbox.qbox_id, "QBOX-REDEEM")
+        self.assertEqual(redemption.qr_code.current_users, 1)
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.current_users, 1)
+        self.assertEqual(self.qr_code.status, QboxAccessQRCode.Status.ACTIVE)
+        self.assertTrue(QboxAccessUser.objects.filter(qr_code=self.qr_code, user_identifier="a@example.com").exists())
+
+    def test_already_granted(self):
+        self.redeem("a@example.com")
+        redemption = self.redeem("a@example.com")
+
+        self.assertEqual(redemption.outcome, Redemption.ALREADY_GRANTED)
+        self.assertEqual(redemption.qr_code.current_users, 1)
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.current_users, 1)
+        self.assertEqual(QboxAccessUser.objects.filter(qr_code=self.qr_code).count(), 1)
+
+    def test_full(self):
+        self.redeem("a@example.com")
+        last = self.redeem("b@example.com")
+        redemption = self.redeem("c@example.com")
+
+        self.assertEqual(last.outcome, Redemption.GRANTED)
+        self.assertEqual(redemption.outcome, Redemption.FULL)
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.current_users, 2)
+        # The redemption that used the last slot expired the code
+        self.assertEqual(self.qr_code.status, QboxAccessQRCode.Status.EXPIRED)
+        self.assertFalse(QboxAccessUser.objects.filter(user_identifier="c@example.com").exists())
+
+    def test_already_granted_when_full(self):
+        self.redeem("a@example.com")
+        self.redeem("b@example.com")
+
+        self.assertEqual(self.redeem("a@example.com").outcome, Redemption.ALREADY_GRANTED)
+
+    def test_invalid_and_inactive(self):
+        self.assertEqual(redeem_access_token("no-such-token", "a@example.com").outcome, Redemption.INVALID)
+        QboxAccessQRCode.objects.filter(pk=self.qr_code.pk).update(is_active=False)
+        self.assertEqual(self.redeem("a@example.com").outcome, Redemption.EXPIRED)
+
+
+@override_settings(QR_SIGNED_TOKENS=True)
+class ReconcileOfflineRedemptionsTests(TestCase):
+    def setUp(self):
+        self.qbox = Qbox.objects.create(qbox_id="QBOX-OFFLINE")
+        self.qr_code = self.signed_code(self.qbox, max_users=2)
+        self.client = APIClient()
+        # Keep access log events out of the process-wide buffer
+        patcher = mock.patch("q_box.access.record_access")
+        self.record_access = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def signed_code(self, qbox, **fields):
+        qr_code = QboxAccessQRCode(qbox=qbox, name="Gate", location="Main Entrance", address="47B", **fields)
+        qr_code.expires_at = qr_code.default_expires_at()
+        qr_code.access_token = issue_access_token(qr_code)
+        qr_code.save()
+        return qr_code
+
+    def upload(self, redemptions, qbox_id="QBOX-OFFLINE", signer=None):
+        body = json.dumps({"redemptions": redemptions}).encode()
+        timestamp = str(int(time.time()))
+        return self.client.post(
+            RECONCILE_URL,
+            data=body,
+            content_type="application/json",
+            HTTP_X_QBOX_ID=qbox_id,
+            HTTP_X_QBOX_TIMESTAMP=timestamp,
+            HTTP_X_QBOX_SIGNATURE=sign_request(signer or qbox_id, timestamp, body),
+        )
+
+    def entry(self, user_identifier, access_token=None, redeemed_at=None):
+        return {
+            "access_token": access_token or self.qr_code.access_token,
+            "user_identifier": user_identifier,
+            "redeemed_at": (redeemed_at or timezone.now() - timedelta(minutes=5)).isoformat(),
+        }
+
+    def recorded(self):
+        return QboxAccessUser.objects.filter(qr_code=self.qr_code).count()
+
+    def test_requires_box_signature(self):
+        response = self.client.post(
+            RECONCILE_URL, {"redemptions": [self.entry("a")]}, format="json"
+        )
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual(self.upload([self.entry("a")], signer="QBOX-OTHER").status_code, 401)
+        self.assertEqual(self.recorded(), 0)
+
+    def test_records_up_to_max_users(self):
+        response = self.upload([self.entry(f"user-{i}") for i in range(5)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["recorded"], 2)
+        self.assertEqual(self.record_access.call_count, 2)
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.current_users, 2)
+        self.assertEqual(self.qr_code.status, QboxAccessQRCode.Status.EXPIRED)
+
+    def test_rejects_inactive_codes_and_random_tokens(self):
+        QboxAccessQRCode.objects.filter(pk=self.qr_code.pk).update(is_active=False)
+        unsigned = QboxAccessQRCode.objects.create(
+            qbox=self.qbox, name="Old", location="-", address="-", max_users=2
+        )
+        response = self.upload(
+            [self.entry(f"user-{i}") for i in range(5)]
+            + [self.entry("x", access_token=unsigned.access_token)]
+        )
+
+        self.assertEqual(response.data["data"]["accepted"], 0)
+        self.assertFalse(QboxAccessUser.objects.exists())
+
+    def test_rejects_tokens_of_other_boxes(self):
+        other = self.signed_code(Qbox.objects.create(qbox_id="QBOX-OTHER"))
+        response = self.upload([self.entry("a", access_token=other.access_token)])
+
+        self.assertEqual(response.data["data"]["accepted"], 0)
+        self.assertFalse(QboxAccessUser.objects.exists())
+
+    def test_rejects_redemptions_after_expiry(self):
+        late = self.qr_code.expires_at + timedelta(seconds=1)
+        QboxAccessQRCode.objects.filter(pk=self.qr_code.pk).update(expires_at=late + timedelta(days=1))
+        response = self.upload([self.entry("a", redeemed_at=late)])
+
+        # The token's own expiry still applies after the code was extended
+        self.assertEqual(response.data["data"]["accepted"], 0)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "the event table is only partitioned on PostgreSQL")
+class MaintainAccessLogTests(TestCase):
+    def count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(table)}")
+            return cursor.fetchone()[0]
+
+    def test_moves_rows_out_of_the_default_partition(self):
+        # Migration 0009 creates three months; the sixth lands in the default
+        month = timezone.now().date().replace(day=1)
+        for _ in range(5):
+            month = _next_month(month)
+        table = QboxAccessEvent._meta.db_table
+        QboxAccessEvent.objects.create(
+            user_identifier="a",
+            outcome=QboxAccessEvent.Outcome.GRANTED,
+            accessed_at=timezone.make_aware(datetime(month.year, month.month, 2)),
+        )
+        self.assertEqual(self.count(table + "_default"), 1)
+
+        created, _, _ = maintain_access_log(months_ahead=5)
+
+        partition = f"{table}_p{month:%Y%m}"
+        self.assertIn(partition, created)
+        self.assertEqual(self.count(partition), 1)
+        self.assertEqual(self.count(table + "_default"), 0)
+        self.assertEqual(QboxAccessEvent.objects.count(), 1)
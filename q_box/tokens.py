@@ -0,0 +1,127 @@
+"""
+Signed access tokens for QboxAccessQRCode.
+
+With QR_SIGNED_TOKENS on, new QR codes get a token that carries its own
+claims instead of token_urlsafe(32):
+
+    <base64url(payload)>.<base64url(HMAC-SHA256(payload)[:16])>
+
+    payload = version (1 byte) | QR code id (16 bytes)
+            | expires_at as unix seconds, 0 for never (4 bytes)
+            | max_users (2 bytes) | qbox_id (UTF-8, rest)
+
+Random tokens contain no ".", so both kinds can be told apart and live
+side by side. A box or edge node holding QR_TOKEN_SIGNING_KEY can verify
+the signature, that the code is for its qbox_id and that it has not
+expired, without calling the backend; redeem_access_token() does the same
+before touching the database. The claims are frozen when the code is
+created: later edits of max_users/duration and deactivation are only
+known to the server. Boxes that admit users offline upload the redemptions
+later with a signed request (device_auth.py); reconcile_offline_redemptions
+in access.py accepts only signed tokens issued for the uploading box.
+
+The key is a shared secret (HMAC); public-key signatures would need the
+cryptography package, which the project does not depend on.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import struct
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+VERSION = 1
+SIGNATURE_BYTES = 16
+_HEADER = struct.Struct(">B16sIH")
+
+
+class InvalidAccessToken(Exception):
+    """The token is malformed or its signature does not match."""
+
+
+class ExpiredAccessToken(InvalidAccessToken):
+    """The token is authentic but past its expiry."""
+
+
+class AccessTokenClaims:
+    __slots__ = ("qr_code_id", "qbox_id", "expires_at", "max_users")
+
+    def __init__(self, qr_code_id, qbox_id, expires_at, max_users):
+        self.qr_code_id = qr_code_id
+        self.qbox_id = qbox_id
+        self.expires_at = expires_at
+        self.max_users = max_users
+
+
+def signed_tokens_enabled():
+    return getattr(settings, "QR_SIGNED_TOKENS", False)
+
+
+def _signing_key():
+    key = getattr(settings, "QR_TOKEN_SIGNING_KEY", "")
+    if key:
+        return key.encode()
+    # Derived from SECRET_KEY; set QR_TOKEN_SIGNING_KEY to provision boxes
+    return hashlib.sha256(f"q_box.tokens:{settings.SECRET_KEY}".encode()).digest()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(_signing_key(), payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def is_signed_token(token):
+    return "." in token
+
+
+def issue_access_token(qr_code):
+    """A token for a QR code that is about to be saved (expires_at set)."""
+    if not signed_tokens_enabled():
+        return secrets.token_urlsafe(32)
+    expires = int(qr_code.expires_at.timestamp()) if qr_code.expires_at else 0
+    payload = _HEADER.pack(
+        VERSION, qr_code.id.bytes, expires, min(qr_code.max_users, 0xFFFF)
+    ) + qr_code.qbox.qbox_id.encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_access_token(token, now=None, allow_expired=False):
+    """
+    Check a signed token and return its AccessTokenClaims. Raises
+    InvalidAccessToken, or ExpiredAccessToken once expires_at has passed
+    (unless allow_expired, for callers that compare expires_at themselves).
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise InvalidAccessToken("Malformed access token")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidAccessToken("Bad access token signature")
+    if len(payload) < _HEADER.size or payload[0] != VERSION:
+        raise InvalidAccessToken("Unsupported access token")
+
+    _, qr_code_id, expires, max_users = _HEADER.unpack_from(payload)
+    claims = AccessTokenClaims(
+        qr_code_id=uuid.UUID(bytes=qr_code_id),
+        qbox_id=payload[_HEADER.size:].decode(),
+        expires_at=datetime.fromtimestamp(expires, dt_timezone.utc) if expires else None,
+        max_users=max_users,
+    )
+    if allow_expired:
+        return claims
+    now = now or datetime.now(dt_timezone.utc)
+    if claims.expires_at and claims.expires_at <= now:
+        raise ExpiredAccessToken("Access token expired")
+    return claims
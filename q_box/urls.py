@@ -2,14 +2,20 @@ from django.urls import path
 from .views import (
     QboxListAPIView,
     QboxDetailAPIView,
+    QboxPackagesAPIView,
     QboxCreateAPIView,
     QboxUpdateAPIView,
     QboxStatusUpdateAPIView,
+    QboxHeartbeatAPIView,
+    QboxFleetSummaryAPIView,
+    QboxAccessStatsAPIView,
     QboxDeleteAPIView,
     VerifyQboxIdAPIView,
     QboxAccessQRCodeListAPIView,
     QboxAccessQRCodeCreateAPIView,
     QboxAccessQRCodeDetailAPIView,
+    QboxAccessQRCodeImageAPIView,
+    QboxAccessQRCodeReconcileAPIView,
     QboxAccessQRCodeAccessAPIView,
     QboxAccessQRCodeHistoryAPIView,
     QboxAccessQRCodeStatusUpdateAPIView,
@@ -19,15 +25,21 @@ urlpatterns = [
     path('', QboxListAPIView.as_view(), name='qbox-list'),
     path('create', QboxCreateAPIView.as_view(), name='qbox-create'),
     path('<uuid:id>', QboxDetailAPIView.as_view(), name='qbox-detail'),
+    path('<uuid:id>/packages', QboxPackagesAPIView.as_view(), name='qbox-packages'),
     path('<uuid:id>/update', QboxUpdateAPIView.as_view(), name='qbox-update'),
     path('<uuid:id>/change-status', QboxStatusUpdateAPIView.as_view(), name='qbox-status'),
+    path('<uuid:id>/access-stats', QboxAccessStatsAPIView.as_view(), name='qbox-access-stats'),
     path('<uuid:id>/delete', QboxDeleteAPIView.as_view(), name='qbox-delete'),
+    path('fleet-summary', QboxFleetSummaryAPIView.as_view(), name='qbox-fleet-summary'),
+    path('heartbeat', QboxHeartbeatAPIView.as_view(), name='qbox-heartbeat'),
     path('verify-id', VerifyQboxIdAPIView.as_view(), name='verify-qbox-id'),
     path('qr-codes/', QboxAccessQRCodeListAPIView.as_view(), name='qrcode-list'),
     path('qr-codes/create', QboxAccessQRCodeCreateAPIView.as_view(), name='qrcode-create'),
     path('qr-codes/<uuid:id>', QboxAccessQRCodeDetailAPIView.as_view(), name='qrcode-detail'),
+    path('qr-codes/<uuid:id>/image', QboxAccessQRCodeImageAPIView.as_view(), name='qrcode-image'),
     path('qr-codes/<uuid:id>/users', QboxAccessUsersListAPIView.as_view(), name='qrcode-users'),
     path('qr-codes/<uuid:id>/change-status', QboxAccessQRCodeStatusUpdateAPIView.as_view(), name='qrcode-status'),
+    path('qr-codes/reconcile', QboxAccessQRCodeReconcileAPIView.as_view(), name='qrcode-reconcile'),
     path('qr-codes/access', QboxAccessQRCodeAccessAPIView.as_view(), name='qrcode-access'),
     path('qr-codes/history', QboxAccessQRCodeHistoryAPIView.as_view(), name='qrcode-history'),
 ]
@@ -5,11 +5,30 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework import filters
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Qbox, QboxAccessQRCode, QboxAccessUser
+from core.mixins import QueryPlanViewMixin
+from core.pagination import StandardResultsPagination as PackagePagination
+from packages.models import Package
+from packages.serializers import PackageSerializer
+from django.utils import timezone
+from .access import Redemption, reconcile_offline_redemptions, redeem_access_token
+from .access_log import record_access
+from .device_auth import IsQboxDevice, QboxDeviceAuthentication
+from .fleet import get_fleet_summary
+from .heartbeats import heartbeat_buffer
+from .qr_images import FORMATS as QR_IMAGE_FORMATS, MAX_SIZE as QR_IMAGE_MAX_SIZE, MIN_SIZE as QR_IMAGE_MIN_SIZE
+from .qr_rendering import (
+    default_image_size,
+    enqueue_image_variant,
+    get_cached_image,
+    get_or_render_image,
+    qr_payload,
+)
+from .models import Qbox, QboxAccessDailyRollup, QboxAccessEvent, QboxAccessQRCode, QboxAccessUser
 from .serializers import (
     QboxSerializer,
     QboxCreateSerializer,
     QboxStatusUpdateSerializer,
+    QboxHeartbeatSerializer,
     VerifyQboxIdSerializer,
     QboxAccessQRCodeSerializer,
     QboxAccessQRCodeCreateSerializer,
@@ -19,6 +38,7 @@ from .serializers import (
     QboxAccessQRCodeStatusUpdateSerializer,
     QboxAccessUserSerializer,
     QboxAccessRequestSerializer,
+    QboxOfflineRedemptionBatchSerializer,
 )
 from home_owner.models import CustomHomeOwner
 from utils.swagger_schema import (
@@ -38,9 +58,13 @@ class StandardResultsPagination(PageNumberPagination):
     page_query_param = "page"
 
 
-class QboxListAPIView(generics.ListAPIView):
+class QboxListAPIView(QueryPlanViewMixin, generics.ListAPIView):
     '''
     Get: list all QBoxes with pagination and filters
+
+    Each QBox carries its newest packages and package_count (see
+    QboxSerializer). Supports ?fields= / ?omit= (e.g. ?omit=packages) to
+    leave fields out.
     '''
     queryset = Qbox.objects.all()
     serializer_class = QboxSerializer
@@ -129,7 +153,7 @@ class QboxCreateAPIView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class QboxDetailAPIView(generics.RetrieveAPIView):
+class QboxDetailAPIView(QueryPlanViewMixin, generics.RetrieveAPIView):
     '''
     Get: Retrieve a single QBox
     '''
@@ -156,6 +180,79 @@ class QboxDetailAPIView(generics.RetrieveAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class QboxPackagesAPIView(QueryPlanViewMixin, generics.ListAPIView):
+    '''
+    Get: Paginated packages of a single QBox, newest first
+
+    Query Parameters:
+    - package_type: Filter by package type (Incoming, Outgoing, Delivered)
+    - pagination: 'cursor' switches to keyset pagination; pass nextCursor back as cursor
+    '''
+    queryset = Package.objects.all()
+    serializer_class = PackageSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = PackagePagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(qbox_id=self.kwargs["id"]).order_by("-created_at", "-id")
+        package_type = self.request.query_params.get('package_type')
+        if package_type:
+            queryset = queryset.filter(package_type=package_type)
+        return queryset
+
+    @swagger_auto_schema(
+        operation_summary="[QBox] List QBox packages",
+        operation_description="Retrieve a paginated list of the packages of a QBox, newest first.",
+        tags=["QBox"],
+        manual_parameters=[
+            openapi.Parameter(
+                'package_type',
+                openapi.IN_QUERY,
+                description="Filter by package type (Incoming, Outgoing, Delivered)",
+                type=openapi.TYPE_STRING,
+                enum=Package.PackageType.values
+            ),
+            openapi.Parameter(
+                'pagination',
+                openapi.IN_QUERY,
+                description="Set to 'cursor' for keyset pagination (returns nextCursor instead of total)",
+                type=openapi.TYPE_STRING,
+                enum=["cursor"]
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque nextCursor value from the previous page (cursor pagination only)",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={
+            200: create_success_response(
+                get_serializer_schema(PackageSerializer, many=True),
+                description="QBox packages retrieved successfully"
+            ),
+            404: NotFoundResponse,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        if not Qbox.objects.filter(id=kwargs["id"]).exists():
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_404_NOT_FOUND,
+                "data": None,
+                "message": "QBox not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": self.paginator.get_paginated_data(serializer.data),
+            "message": "List QBox packages"
+        }, status=status.HTTP_200_OK)
+
+
 class QboxUpdateAPIView(generics.UpdateAPIView):
     '''
     Put: Update a QBox
@@ -224,6 +321,177 @@ class QboxStatusUpdateAPIView(generics.UpdateAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class QboxHeartbeatAPIView(generics.GenericAPIView):
+    '''
+    Post: Device heartbeat (status, LED, camera)
+
+    The heartbeat is buffered and written in batches a few seconds later (see
+    q_box.heartbeats), so the response does not wait for the database and
+    does not include the QBox.
+    '''
+    serializer_class = QboxHeartbeatSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[QBox] Device heartbeat",
+        operation_description="Report QBox status, LED indicator and camera status. Accepts the compact keys q/s/l/c. The update is applied asynchronously; last_online is set to the time the heartbeat was received.",
+        tags=["QBox"],
+        request_body=QboxHeartbeatSerializer,
+        responses={
+            202: create_success_response(description="Heartbeat accepted"),
+            400: ValidationErrorResponse,
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        qbox_id = values.pop("qbox_id")
+        values["last_online"] = timezone.now()
+        heartbeat_buffer.add(qbox_id, values)
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_202_ACCEPTED,
+            "data": None,
+            "message": "Heartbeat accepted"
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class QboxAccessStatsAPIView(generics.GenericAPIView):
+    '''
+    Get: Daily QR access counts of one QBox
+
+    Read from the daily rollups (QboxAccessDailyRollup), not the access log.
+
+    Query Parameters:
+    - days: Number of days up to today (default 30, max 366)
+    '''
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[QBox] Daily access stats",
+        operation_description="Granted, already granted and denied QR redemptions per day for the last `days` days, with totals.",
+        tags=["QBox"],
+        manual_parameters=[
+            openapi.Parameter(
+                'days',
+                openapi.IN_QUERY,
+                description="Number of days up to today (1-366, default 30)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            400: ValidationErrorResponse,
+            404: NotFoundResponse,
+        }
+    )
+    def get(self, request, id, *args, **kwargs):
+        try:
+            days = int(request.query_params.get('days', 30))
+            if not 1 <= days <= 366:
+                raise ValueError
+        except ValueError:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": "days must be an integer from 1 to 366."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not Qbox.objects.filter(id=id).exists():
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_404_NOT_FOUND,
+                "data": None,
+                "message": "QBox not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        since = timezone.localdate() - timezone.timedelta(days=days - 1)
+        daily = list(
+            QboxAccessDailyRollup.objects.filter(qbox_id=id, day__gte=since)
+            .order_by('day')
+            .values('day', 'granted', 'already_granted', 'denied')
+        )
+        totals = {
+            field: sum(row[field] for row in daily)
+            for field in ('granted', 'already_granted', 'denied')
+        }
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": {"since": since, "days": days, "totals": totals, "daily": daily},
+            "message": "QBox access stats"
+        }, status=status.HTTP_200_OK)
+
+
+class QboxFleetSummaryAPIView(generics.GenericAPIView):
+    '''
+    Get: Fleet health summary for dashboards
+
+    Counts of boxes per status, boxes with a broken camera, boxes that never
+    reported and boxes without a heartbeat for stale_minutes. Cached for
+    QBOX_FLEET_SUMMARY_TTL seconds and invalidated when a QBox is saved.
+
+    Query Parameters:
+    - stale_minutes: Minutes without a heartbeat before a box counts as stale (default QBOX_STALE_MINUTES)
+    '''
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[QBox] Fleet health summary",
+        operation_description="Counts of Online/Offline/Error boxes, boxes with camera Not Working and boxes whose last heartbeat is older than stale_minutes.",
+        tags=["QBox"],
+        manual_parameters=[
+            openapi.Parameter(
+                'stale_minutes',
+                openapi.IN_QUERY,
+                description="Minutes without a heartbeat before a box counts as stale",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: create_success_response(
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "total": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "byStatus": openapi.Schema(type=openapi.TYPE_OBJECT),
+                        "cameraNotWorking": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "neverOnline": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "stale": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "staleMinutes": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "staleSince": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+                        "generatedAt": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+                    }
+                ),
+                description="Fleet summary"
+            ),
+            400: ValidationErrorResponse,
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        stale_minutes = request.query_params.get('stale_minutes')
+        if stale_minutes is not None:
+            try:
+                stale_minutes = int(stale_minutes)
+                if stale_minutes < 1:
+                    raise ValueError
+            except ValueError:
+                return Response({
+                    "success": False,
+                    "statusCode": status.HTTP_400_BAD_REQUEST,
+                    "data": None,
+                    "message": "stale_minutes must be a positive integer."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": get_fleet_summary(stale_minutes),
+            "message": "QBox fleet summary"
+        }, status=status.HTTP_200_OK)
+
+
 class QboxDeleteAPIView(generics.DestroyAPIView):
     '''
     Delete: Remove a QBox
@@ -292,6 +560,15 @@ class VerifyQboxIdAPIView(generics.CreateAPIView):
 
 # QR Code APIs
 
+qr_status_parameter = openapi.Parameter(
+    'status',
+    openapi.IN_QUERY,
+    description="Only QR codes with this status (Expired once inactive, full or past expires_at; time-based expiry is applied by the periodic sweeper)",
+    type=openapi.TYPE_STRING,
+    enum=QboxAccessQRCode.Status.values
+)
+
+
 class QboxAccessQRCodeListAPIView(generics.ListAPIView):
     """
     Get: List all access QR codes for a Qbox
@@ -309,17 +586,21 @@ class QboxAccessQRCodeListAPIView(generics.ListAPIView):
         queryset = super().get_queryset()
         qbox_id = self.request.query_params.get('qbox_id')
         is_active = self.request.query_params.get('is_active')
+        qr_status = self.request.query_params.get('status')
         
         if qbox_id:
             queryset = queryset.filter(qbox__qbox_id=qbox_id)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        if qr_status in QboxAccessQRCode.Status.values:
+            queryset = queryset.filter(status=qr_status)
         return queryset
 
     @swagger_auto_schema(
         tags=["QBox QR Code"],
         operation_summary="List access QR codes",
-        operation_description="Retrieve a list of access QR codes for QBoxes with optional filtering."
+        operation_description="Retrieve a list of access QR codes for QBoxes with optional filtering.",
+        manual_parameters=[qr_status_parameter]
     )
     def get(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -366,7 +647,7 @@ class QboxAccessQRCodeCreateAPIView(generics.CreateAPIView):
     @swagger_auto_schema(
         tags=["QBox QR Code"],
         operation_summary="Create access QR code",
-        operation_description="Create a new access QR code for a Qbox. If duration_type is 'days', valid_duration is in days. If 'minutes', it's in minutes."
+        operation_description="Create a new access QR code for a Qbox. If duration_type is 'days', valid_duration is in days. If 'minutes', it's in minutes. The QR code image is rendered in the background: the response has image_status 'Pending' and qr_code_image null until the image is Ready."
     )
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -447,6 +728,81 @@ class QboxAccessQRCodeDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         })
 
 
+class QboxAccessQRCodeImageAPIView(generics.GenericAPIView):
+    """
+    Get: URL of the QR code image in a given format and size
+
+    Variants are rendered once per payload and then served from the cache.
+    SVGs are rendered on the first request; PNGs are queued for the
+    background renderer and reported as Pending (202) until stored.
+    """
+    queryset = QboxAccessQRCode.objects.only("id", "access_token")
+    permission_classes = [permissions.AllowAny]
+    lookup_field = "id"
+
+    @swagger_auto_schema(
+        tags=["QBox QR Code"],
+        operation_summary="Get QR code image",
+        operation_description="URL of the QR code image as PNG or SVG at the requested size in pixels. A PNG that is not rendered yet is queued and returned with status 'Pending' (HTTP 202); poll again for the URL.",
+        manual_parameters=[
+            openapi.Parameter(
+                'format',
+                openapi.IN_QUERY,
+                description="Image format",
+                type=openapi.TYPE_STRING,
+                enum=list(QR_IMAGE_FORMATS),
+                default="png"
+            ),
+            openapi.Parameter(
+                'size',
+                openapi.IN_QUERY,
+                description=f"Width and height in pixels ({QR_IMAGE_MIN_SIZE}-{QR_IMAGE_MAX_SIZE})",
+                type=openapi.TYPE_INTEGER
+            ),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        fmt = request.query_params.get('format', 'png').lower()
+        size = request.query_params.get('size')
+        try:
+            size = int(size) if size is not None else default_image_size()
+        except ValueError:
+            size = None
+        if fmt not in QR_IMAGE_FORMATS or size is None or not QR_IMAGE_MIN_SIZE <= size <= QR_IMAGE_MAX_SIZE:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": f"format must be one of {', '.join(QR_IMAGE_FORMATS)} and size an integer from {QR_IMAGE_MIN_SIZE} to {QR_IMAGE_MAX_SIZE}."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = qr_payload(self.get_object())
+        cached = get_cached_image(payload, fmt, size)
+        if cached is None and fmt == "svg":
+            cached = get_or_render_image(payload, fmt, size)
+        if cached is None:
+            enqueue_image_variant(payload, fmt, size)
+            return Response({
+                "success": True,
+                "statusCode": status.HTTP_202_ACCEPTED,
+                "data": {"format": fmt, "size": size, "status": "Pending", "url": None},
+                "message": "QR code image is being rendered"
+            }, status=status.HTTP_202_ACCEPTED)
+
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": {"format": fmt, "size": size, "status": "Ready", "url": cached[1]},
+            "message": "QR code image"
+        }, status=status.HTTP_200_OK)
+
+
+REDEMPTION_LOG_OUTCOMES = {
+    Redemption.GRANTED: QboxAccessEvent.Outcome.GRANTED,
+    Redemption.ALREADY_GRANTED: QboxAccessEvent.Outcome.ALREADY_GRANTED,
+}
+
+
 class QboxAccessQRCodeAccessAPIView(generics.CreateAPIView):
     """
     Post: Access Qbox via QR code
@@ -464,13 +820,20 @@ class QboxAccessQRCodeAccessAPIView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        access_token = serializer.validated_data['access_token']
-        user_identifier = serializer.validated_data['user_identifier']
-        user_name = serializer.validated_data.get('user_name', '')
+        redemption = redeem_access_token(
+            serializer.validated_data['access_token'],
+            serializer.validated_data['user_identifier'],
+            serializer.validated_data.get('user_name', ''),
+        )
+        qr_code = redemption.qr_code
+        record_access(
+            qr_code.qbox.id if qr_code else None,
+            qr_code.id if qr_code else None,
+            serializer.validated_data['user_identifier'],
+            REDEMPTION_LOG_OUTCOMES.get(redemption.outcome, QboxAccessEvent.Outcome.DENIED),
+        )
         
-        try:
-            qr_code = QboxAccessQRCode.objects.get(access_token=access_token)
-        except QboxAccessQRCode.DoesNotExist:
+        if redemption.outcome == Redemption.INVALID:
             return Response({
                 "success": False,
                 "statusCode": status.HTTP_404_NOT_FOUND,
@@ -478,8 +841,7 @@ class QboxAccessQRCodeAccessAPIView(generics.CreateAPIView):
                 "message": "Invalid QR code"
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if QR code is valid
-        if not qr_code.is_valid():
+        if redemption.outcome == Redemption.EXPIRED:
             return Response({
                 "success": False,
                 "statusCode": status.HTTP_400_BAD_REQUEST,
@@ -487,106 +849,129 @@ class QboxAccessQRCodeAccessAPIView(generics.CreateAPIView):
                 "message": "This QR code has expired or reached maximum users"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if user already has access
-        existing_access = QboxAccessUser.objects.filter(
-            qr_code=qr_code,
-            user_identifier=user_identifier
-        ).exists()
+        if redemption.outcome == Redemption.FULL:
+            return Response({
+                "success": False,
+                "statusCode": status.HTTP_400_BAD_REQUEST,
+                "data": None,
+                "message": "Maximum users reached for this QR code"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        qbox_data = {
+            "id": str(qr_code.qbox.id),
+            "qbox_id": qr_code.qbox.qbox_id,
+            "location": qr_code.location,
+            "address": qr_code.address
+        }
         
-        if existing_access:
+        if redemption.outcome == Redemption.ALREADY_GRANTED:
             return Response({
                 "success": True,
                 "statusCode": status.HTTP_200_OK,
                 "data": {
                     "message": "User already has access",
-                    "qbox": {
-                        "id": str(qr_code.qbox.id),
-                        "qbox_id": qr_code.qbox.qbox_id,
-                        "location": qr_code.location,
-                        "address": qr_code.address
-                    }
+                    "qbox": qbox_data
                 },
                 "message": "Access already granted"
             }, status=status.HTTP_200_OK)
         
-        # Increment usage and record access
-        if qr_code.increment_usage():
-            access_user = QboxAccessUser.objects.create(
-                qr_code=qr_code,
-                user_identifier=user_identifier,
-                user_name=user_name,
-                access_type="qr_code"
-            )
-            
-            return Response({
-                "success": True,
-                "statusCode": status.HTTP_200_OK,
-                "data": {
-                    "message": "Access granted successfully",
-                    "qbox": {
-                        "id": str(qr_code.qbox.id),
-                        "qbox_id": qr_code.qbox.qbox_id,
-                        "location": qr_code.location,
-                        "address": qr_code.address
-                    },
-                    "access": {
-                        "expires_at": qr_code.expires_at,
-                        "remaining_users": qr_code.max_users - qr_code.current_users
-                    }
-                },
-                "message": "Access granted successfully"
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                "success": False,
-                "statusCode": status.HTTP_400_BAD_REQUEST,
-                "data": None,
-                "message": "Maximum users reached for this QR code"
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": {
+                "message": "Access granted successfully",
+                "qbox": qbox_data,
+                "access": {
+                    "expires_at": qr_code.expires_at,
+                    "remaining_users": qr_code.max_users - qr_code.current_users
+                }
+            },
+            "message": "Access granted successfully"
+        }, status=status.HTTP_200_OK)
+
+
+class QboxAccessQRCodeReconcileAPIView(generics.GenericAPIView):
+    """
+    Post: Upload redemptions a box admitted offline with signed QR codes
+
+    The request must be signed by the box (X-Qbox-Id, X-Qbox-Timestamp and
+    X-Qbox-Signature headers, see q_box.device_auth). Only signed tokens
+    issued for that box are accepted.
+    """
+    serializer_class = QboxOfflineRedemptionBatchSerializer
+    authentication_classes = [QboxDeviceAuthentication]
+    permission_classes = [IsQboxDevice]
+
+    @swagger_auto_schema(
+        tags=["QBox QR Code"],
+        operation_summary="Reconcile offline QR redemptions",
+        operation_description="Record users a box let in while it could not reach the backend. The request is signed with the box's device key. Redemptions are rejected unless the token is a signed token issued for that box, redeemed_at is before the token's and the QR code's expiry, and the code is still active; at most max_users users are recorded per code. current_users of the affected QR codes is recounted.",
+        manual_parameters=[
+            openapi.Parameter('X-Qbox-Id', openapi.IN_HEADER, description="qbox_id of the uploading box", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('X-Qbox-Timestamp', openapi.IN_HEADER, description="Unix seconds when the request was signed", type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('X-Qbox-Signature', openapi.IN_HEADER, description="base64url HMAC-SHA256 of '<timestamp>.<body>' with the device key", type=openapi.TYPE_STRING, required=True),
+        ]
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        redemptions = serializer.validated_data['redemptions']
+        accepted, recorded = reconcile_offline_redemptions(request.auth, redemptions)
+        return Response({
+            "success": True,
+            "statusCode": status.HTTP_200_OK,
+            "data": {
+                "received": len(redemptions),
+                "accepted": accepted,
+                "rejected": len(redemptions) - accepted,
+                "recorded": recorded,
+            },
+            "message": "Offline redemptions reconciled"
+        }, status=status.HTTP_200_OK)
+
+
+class AccessUserPagination(PackagePagination):
+    """Page numbers by default; ?pagination=cursor for keyset pages"""
+    cursor_ordering = ("-accessed_at", "-id")
 
 
 class QboxAccessUsersListAPIView(generics.ListAPIView):
     """
     Get: List users who have accessed via a QR code
+
+    Newest first. ?pagination=cursor switches to keyset pages: pass the
+    returned nextCursor as ?cursor= for the next page.
     """
     serializer_class = QboxAccessUserSerializer
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardResultsPagination
+    pagination_class = AccessUserPagination
 
     def get_queryset(self):
         qr_code_id = self.kwargs.get('id')
-        return QboxAccessUser.objects.filter(qr_code_id=qr_code_id)
+        return (
+            QboxAccessUser.objects.filter(qr_code_id=qr_code_id)
+            .select_related('qr_code__qbox')
+            .order_by('-accessed_at', '-id')
+        )
 
     @swagger_auto_schema(
         tags=["QBox QR Code"],
         operation_summary="List QR code access users",
-        operation_description="List all users who have accessed via a specific QR code."
+        operation_description="List all users who have accessed via a specific QR code, newest first. Paginated by page number; use ?pagination=cursor and follow nextCursor with ?cursor= for keyset pages.",
+        manual_parameters=[
+            openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Items per page (max 100)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('pagination', openapi.IN_QUERY, description="Set to 'cursor' for keyset pagination (returns nextCursor instead of total)", type=openapi.TYPE_STRING, enum=["cursor"]),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque nextCursor value from the previous page (cursor pagination only)", type=openapi.TYPE_STRING),
+        ]
     )
     def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            "success": True,
-            "statusCode": status.HTTP_200_OK,
-            "data": serializer.data,
-            "message": "List access users"
-        })
-
-    def get_paginated_response(self, data):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
         return Response({
             "success": True,
             "statusCode": status.HTTP_200_OK,
-            "data": {
-                "items": data,
-                "total": self.paginator.page.paginator.count,
-                "page": self.paginator.page.number,
-                "limit": self.paginator.page_size,
-                "hasMore": self.paginator.page.has_next(),
-            },
+            "data": self.paginator.get_paginated_data(serializer.data),
             "message": "List access users"
         })
 
@@ -604,13 +989,21 @@ class QboxAccessQRCodeHistoryAPIView(generics.ListAPIView):
     pagination_class = StandardResultsPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["qbox__qbox_id", "name", "qbox__homeowner_name_snapshot"]
-    ordering_fields = ["created_at", "expires_at"]
+    ordering_fields = ["created_at", "expires_at", "status"]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related("qbox")
+        qr_status = self.request.query_params.get('status')
+        if qr_status in QboxAccessQRCode.Status.values:
+            queryset = queryset.filter(status=qr_status)
+        return queryset
+
     @swagger_auto_schema(
         tags=["QBox QR Code History"],
         operation_summary="QR Code History Log",
-        operation_description="Get a list of all QR codes with their status, valid users remaining, and expiration time."
+        operation_description="Get a list of all QR codes with their status, valid users remaining, and expiration time.",
+        manual_parameters=[qr_status_parameter]
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ServiceProviderConfig(AppConfig):
     name = 'service_provider'
+
+    def ready(self):
+        from . import signals  # noqa: F401
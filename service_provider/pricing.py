@@ -0,0 +1,223 @@
+"""
+Rate-card quoting from ServiceProvider pricing.
+
+Each active, approved provider's pricing columns are compiled once into a
+RateCard (plain Decimal multipliers, plus the casefolded names of the cities
+it serves) and the whole set is kept in the Django cache until a provider or
+city changes (see signals.py) or RATE_CARD_CACHE_TIMEOUT passes. Each change
+also moves rate_card_version(), which cached responses that show quoted
+charges include in their key. Quoting is then pure arithmetic:
+
+    subtotal = first_kg_charge + (billable_kg - 1) * additional_kg_charge
+    markup   = subtotal * markup_value / 100   (percentage)
+             | markup_value                    (fixed)
+    fuel     = (subtotal + markup) * fuel_surcharge_percentage / 100
+    total    = subtotal + markup + fuel
+
+billable_kg is the weight rounded up to a whole kilogram (at least 1), so a
+batch of quotes collapses to one computation per (provider, billable_kg).
+"""
+import math
+import re
+import secrets
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ServiceProvider
+
+RATE_CARDS_CACHE_KEY = "service_provider:rate_cards"
+RATE_CARDS_VERSION_KEY = "service_provider:rate_cards:version"
+CURRENCY = "SAR"
+CENT = Decimal("0.01")
+HUNDRED = Decimal(100)
+
+_WEIGHT_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+class RateCard:
+    """Compiled pricing of one ServiceProvider."""
+    __slots__ = (
+        "provider_id", "name", "first_kg", "additional_kg",
+        "markup_rate", "markup_fixed", "fuel_rate", "cities",
+    )
+
+    def __init__(self, provider, cities):
+        self.provider_id = provider.pk
+        self.name = provider.name
+        self.first_kg = provider.first_kg_charge
+        self.additional_kg = provider.additional_kg_charge
+        if provider.markup_type == ServiceProvider.MarkupType.FIXED:
+            self.markup_rate = Decimal(0)
+            self.markup_fixed = provider.markup_value
+        else:
+            self.markup_rate = provider.markup_value / HUNDRED
+            self.markup_fixed = Decimal(0)
+        self.fuel_rate = (
+            provider.fuel_surcharge_percentage / HUNDRED
+            if provider.fuel_surcharge_enabled else Decimal(0)
+        )
+        # An empty set means the provider has not restricted its cities
+        self.cities = frozenset(cities)
+
+    def serves(self, city):
+        return not city or not self.cities or city.strip().casefold() in self.cities
+
+    def quote(self, billable_kg):
+        """Return (charges, total) for a whole number of kilograms."""
+        additional = (billable_kg - 1) * self.additional_kg
+        subtotal = self.first_kg + additional
+        markup = subtotal * self.markup_rate + self.markup_fixed
+        fuel = (subtotal + markup) * self.fuel_rate
+        charges = [{"key": "Base delivery fee (First Kg)", "value": _money(self.first_kg)}]
+        if billable_kg > 1:
+            charges.append({"key": f"Additional per Kg (x{billable_kg - 1})", "value": _money(additional)})
+        if markup:
+            charges.append({"key": "Service fee", "value": _money(markup)})
+        if fuel:
+            charges.append({"key": "Tax Fuel", "value": _money(fuel)})
+        return charges, _money(subtotal + markup + fuel)
+
+
+class RateCardBook:
+    """All compiled rate cards, indexed by provider id and by name."""
+
+    def __init__(self, cards):
+        self.by_id = {card.provider_id: card for card in cards}
+        self.by_name = {card.name.strip().casefold(): card for card in cards}
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def get(self, provider_id):
+        return self.by_id.get(provider_id)
+
+    def get_by_name(self, name):
+        if not name:
+            return None
+        return self.by_name.get(name.strip().casefold())
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def compile_rate_cards():
+    """Build a RateCardBook from the database (two queries)."""
+    providers = (
+        ServiceProvider.objects.filter(is_active=True, is_approved=True)
+        .only(
+            "id", "name", "first_kg_charge", "additional_kg_charge", "markup_type",
+            "markup_value", "fuel_surcharge_percentage", "fuel_surcharge_enabled",
+        )
+        .prefetch_related("operating_cities")
+    )
+    cards = []
+    for provider in providers:
+        cities = set()
+        for city in provider.operating_cities.all():
+            if not city.is_active:
+                continue
+            cities.update(
+                name.strip().casefold() for name in (city.name, city.name_ar, city.code) if name
+            )
+        cards.append(RateCard(provider, cities))
+    return RateCardBook(cards)
+
+
+def get_rate_cards():
+    """Return the cached RateCardBook, compiling it on a miss."""
+    book = cache.get(RATE_CARDS_CACHE_KEY)
+    if book is None:
+        book = compile_rate_cards()
+        cache.set(RATE_CARDS_CACHE_KEY, book, getattr(settings, "RATE_CARD_CACHE_TIMEOUT", 60))
+    return book
+
+
+def _new_rate_card_version():
+    return secrets.token_hex(4)
+
+
+def rate_card_version():
+    """A token that changes whenever the rate cards are invalidated."""
+    return cache.get_or_set(RATE_CARDS_VERSION_KEY, _new_rate_card_version, None)
+
+
+def _drop_rate_cards():
+    cache.delete(RATE_CARDS_CACHE_KEY)
+    cache.set(RATE_CARDS_VERSION_KEY, _new_rate_card_version(), None)
+
+
+def invalidate_rate_cards():
+    """Drop the cached rate cards and move their version once the current transaction commits."""
+    transaction.on_commit(_drop_rate_cards)
+
+
+def billable_kg(weight):
+    """Whole kilograms charged for weight (rounded up, at least 1)."""
+    return max(1, math.ceil(weight))
+
+
+def parse_weight(value):
+    """
+    Read a weight in kg from free text such as "2.5", "2.5 kg" or "3kg".
+    Returns None if there is no number.
+    """
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    match = _WEIGHT_RE.search(value or "")
+    if not match:
+        return None
+    try:
+        return Decimal(match.group())
+    except InvalidOperation:
+        return None
+
+
+def quote_batch(items, book=None):
+    """
+    Price a list of {"weight": Decimal, "provider": id or None, "city": str}.
+
+    Items without a provider are quoted against every provider serving the
+    city. Returns one {"index", "quotes", "error"} result per item; identical
+    (provider, billable_kg) pairs are computed once.
+    """
+    if book is None:
+        book = get_rate_cards()
+    computed = {}
+    results = []
+    for index, item in enumerate(items):
+        kg = billable_kg(item["weight"])
+        city = item.get("city") or ""
+        provider_id = item.get("provider")
+        if provider_id is not None:
+            card = book.get(provider_id)
+            if card is None:
+                results.append({"index": index, "quotes": [], "error": "Unknown or inactive service provider"})
+                continue
+            if not card.serves(city):
+                results.append({"index": index, "quotes": [], "error": f"Service provider does not serve {city}"})
+                continue
+            cards = [card]
+        else:
+            cards = [card for card in book if card.serves(city)]
+
+        quotes = []
+        for card in cards:
+            key = (card.provider_id, kg)
+            if key not in computed:
+                computed[key] = card.quote(kg)
+            charges, total = computed[key]
+            quotes.append({
+                "provider": card.provider_id,
+                "providerName": card.name,
+                "billableWeight": kg,
+                "charges": charges,
+                "total": total,
+                "currency": CURRENCY,
+            })
+        quotes.sort(key=lambda quote: quote["total"])
+        results.append({"index": index, "quotes": quotes, "error": None})
+    return results
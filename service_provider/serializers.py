@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import ServiceProvider
 
@@ -19,3 +20,19 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
 
 class ServiceProviderApprovalSerializer(serializers.Serializer):
     is_approved = serializers.BooleanField()
+
+
+class QuoteItemSerializer(serializers.Serializer):
+    provider = serializers.IntegerField(required=False, allow_null=True, help_text="Service provider id; omit to quote every provider serving the city")
+    weight = serializers.DecimalField(max_digits=8, decimal_places=3, min_value=0, help_text="Package weight in kg")
+    city = serializers.CharField(required=False, allow_blank=True, default="", help_text="Destination city name or code")
+
+
+class QuoteBatchSerializer(serializers.Serializer):
+    items = QuoteItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        max_items = getattr(settings, "SERVICE_PROVIDER_QUOTE_MAX_ITEMS", 1000)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} items can be quoted per request.")
+        return value
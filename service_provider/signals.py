@@ -0,0 +1,24 @@
+"""
+Drop the cached rate cards (see pricing.py) whenever the pricing inputs change.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from locations.models import City
+from .models import ServiceProvider
+from .pricing import invalidate_rate_cards
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_rate_cards_on_change(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_rate_cards()
+
+
+@receiver(m2m_changed, sender=ServiceProvider.operating_cities.through)
+def invalidate_rate_cards_on_cities_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_rate_cards()
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import ServiceProviderListCreateView, ServiceProviderDetailView, ServiceProviderApprovalView
+from .views import ServiceProviderListCreateView, ServiceProviderDetailView, ServiceProviderApprovalView, ServiceProviderQuoteView
 
 urlpatterns = [
     path('', ServiceProviderListCreateView.as_view(), name='service-provider-list-create'),
+    path('quote', ServiceProviderQuoteView.as_view(), name='service-provider-quote'),
     path('<int:pk>', ServiceProviderDetailView.as_view(), name='service-provider-detail'),
     path('<int:pk>/approve', ServiceProviderApprovalView.as_view(), name='service-provider-approve'),
 ]
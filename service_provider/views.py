@@ -5,7 +5,8 @@ from rest_framework.permissions import AllowAny
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import ServiceProvider
-from .serializers import ServiceProviderSerializer, ServiceProviderApprovalSerializer
+from .pricing import quote_batch
+from .serializers import ServiceProviderSerializer, ServiceProviderApprovalSerializer, QuoteBatchSerializer
 from utils.swagger_schema import (
     SwaggerHelper,
     get_serializer_schema,
@@ -145,3 +146,42 @@ class ServiceProviderApprovalView(APIView):
                 status=status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ServiceProviderQuoteView(APIView):
+    """
+    POST: Price many (provider, weight, city) combinations in one request
+    Payload: items: [{provider (optional), weight, city (optional)}]
+
+    Quotes come from the cached rate cards, so the number of items does not
+    change the number of database queries.
+    """
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="[Service Provider] Quote delivery charges",
+        operation_description="Quote delivery charges for a batch of packages. Items without a provider are quoted against every active, approved provider serving the city, cheapest first.",
+        tags=["Service Provider"],
+        request_body=QuoteBatchSerializer,
+        responses={
+            200: openapi.Response(
+                description="One result per item, in request order",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "results": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                        ),
+                    }
+                )
+            ),
+            400: ValidationErrorResponse,
+        }
+    )
+    def post(self, request):
+        serializer = QuoteBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            results = quote_batch(serializer.validated_data["items"])
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)